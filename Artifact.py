@@ -0,0 +1,467 @@
+# Скомпилированная программа на диске (файл .tyc): повторный запуск обходится
+# без лексического и синтаксического анализа.
+#
+# Файл начинается с заголовка (сигнатура, версия формата, флаги, хеш исходного
+# текста, версия интерпретатора) и оглавления разделов. Разделы — массивы целых
+# чисел в порядке байтов записавшей файл машины: пул строк, пул целых чисел,
+# таблица слотов, константы таблицы символов, отчёт оптимизатора, AST в прямом
+# порядке обхода, байт-код VM с его таблицей констант и таблица позиций — адрес
+# первой инструкции и строка исходного текста каждого оператора. Загрузчик
+# отображает файл в память через mmap и читает массивы прямо из отображения.
+# Файл другой версии формата или интерпретатора, с другим порядком байтов или
+# построенный из другого исходного текста считается устаревшим и, если исходный
+# текст доступен, пересобирается.
+import gc
+import mmap
+import os
+import struct
+import sys
+from array import array
+from operator import itemgetter
+
+from Ast import (
+    Assign,
+    BinOp,
+    ClosedFor,
+    Const,
+    For,
+    LoopUpdate,
+    Program,
+    Read,
+    Shared,
+    SharedRef,
+    UnaryOp,
+    Var,
+    VarDecl,
+    VectorFor,
+    Write,
+    postorder,
+)
+from Bytecode import CLOSED_FOR as CLOSED_FOR_OP, VECTOR_FOR as VECTOR_FOR_OP, CodeObject
+from Cache import source_hash
+from Interpeter import VERSION, CompiledProgram, Lexer
+
+EXTENSION = '.tyc'
+MAGIC = b'TYC\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHH16s16s')  # Сигнатура, версия формата, флаги, хеш исходного текста, версия
+SECTION = struct.Struct('<QQ')  # Смещение и длина раздела
+SECTIONS = ('strings', 'integers', 'big_integers', 'slots', 'constants', 'report',
+            'ast', 'operations', 'arguments', 'code_constants', 'positions')
+ARRAY_TYPES = {'integers': 'q', 'operations': 'B'}  # Остальные числовые разделы — 'i'
+ALIGNMENT = 8
+
+# Флаги заголовка
+OPTIMIZED = 1
+BIG_ENDIAN = 2
+
+# Теги операторов и выражений в разделе ast. Операторы записаны в прямом
+# порядке, выражения — в обратной польской записи с END в конце
+ASSIGN, WRITE, READ, FOR, CLOSED_FOR, VECTOR_FOR = range(6)
+CONST, VAR, BINOP, NEG, SHARED, SHARED_REF, END = range(7)
+BINARY_OPERATORS = '+-*/'
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+
+class ArtifactError(ValueError):
+    """Файл .tyc повреждён или устарел."""
+
+
+def artifact_path(filename):
+    """Имя файла .tyc для файла с исходным текстом."""
+    return os.path.splitext(filename)[0] + EXTENSION
+
+
+def read_source(filename):
+    try:
+        with open(filename, 'r') as file:
+            return file.read()
+    except FileNotFoundError:
+        raise ValueError(f"Файл {filename} не найден.")
+
+
+class ArtifactWriter:
+    """Раскладывает CompiledProgram по разделам файла .tyc."""
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.strings = {}
+        self.integers = {}
+        self.big_integers = {}  # Числа вне int64 хранятся текстом
+        self.ast = array('i')
+        self.positions = array('i')
+        code = compiled.code
+        self.offsets = {id(node): offset for offset, node in code.statements}
+
+    def string(self, text):
+        return self.strings.setdefault(text, len(self.strings))
+
+    def integer(self, value):
+        """Ссылка на число: номер в пуле int64 или дополнение номера в пуле больших чисел."""
+        if INT64_MIN <= value <= INT64_MAX:
+            return self.integers.setdefault(value, len(self.integers))
+        return ~self.big_integers.setdefault(value, len(self.big_integers))
+
+    def sections(self, source_path):
+        compiled = self.compiled
+        code = compiled.code
+        self.string(source_path)  # Строка 0 — путь к исходному тексту относительно файла .tyc
+        slots = array('i')
+        for name, value in zip(compiled.names, compiled.initial_values):
+            slots.extend((self.string(name), value is not None, self.integer(value or 0)))
+        constants = array('i')
+        for text, value in compiled.constants.items():
+            constants.extend((self.string(text), self.integer(value)))
+        report = array('i', [self.string(line) for line in compiled.report])
+        self.write_program(compiled.program)
+        operations = array('B', [op for op, _ in code.instructions])
+        arguments = array('i', [arg if arg is not None else -1 for _, arg in code.instructions])
+        code_constants = array('i', [self.integer(value) for value in code.constants])
+        return {
+            'strings': '\0'.join(self.strings).encode(),
+            'integers': array('q', self.integers).tobytes(),
+            'big_integers': '\0'.join(map(str, self.big_integers)).encode(),
+            'slots': slots.tobytes(),
+            'constants': constants.tobytes(),
+            'report': report.tobytes(),
+            'ast': self.ast.tobytes(),
+            'operations': operations.tobytes(),
+            'arguments': arguments.tobytes(),
+            'code_constants': code_constants.tobytes(),
+            'positions': self.positions.tobytes(),
+        }
+
+    def write_program(self, program):
+        self.ast.append(len(program.declarations))
+        for declaration in program.declarations:
+            self.ast.append(len(declaration.slots))
+            self.ast.extend(declaration.slots)
+        self.write_block(program.body)
+
+    def write_block(self, statements):
+        self.ast.append(len(statements))
+        for statement in statements:
+            self.write_statement(statement)
+
+    def write_statement(self, node):
+        ast = self.ast
+        # Позиции идут в том же прямом порядке, что и операторы; у операторов
+        # тела VectorFor нет своих инструкций, и адрес у них -1
+        self.positions.extend((self.offsets.get(id(node), -1), node.line))
+        node_type = type(node)
+        if node_type is Assign:
+            ast.extend((ASSIGN, node.slot))
+            self.write_expression(node.value)
+        elif node_type is Write:
+            ast.append(WRITE)
+            self.write_expression(node.value)
+        elif node_type is Read:
+            ast.extend((READ, node.slot))
+        elif node_type is For or node_type is VectorFor:
+            ast.extend((FOR if node_type is For else VECTOR_FOR, node.slot))
+            self.write_expression(node.start)
+            self.write_expression(node.end)
+            self.write_block(node.body)
+        elif node_type is ClosedFor:
+            ast.extend((CLOSED_FOR, node.slot))
+            self.write_expression(node.start)
+            self.write_expression(node.end)
+            ast.append(len(node.updates))
+            for update in node.updates:
+                ast.extend((update.slot, update.accumulate, update.degree))
+                self.write_expression(update.value)
+        else:
+            raise SyntaxError(f"Неожиданное выражение: {node}")
+
+    def write_expression(self, node):
+        self.write_postfix(node)
+        self.ast.append(END)
+
+    def write_postfix(self, node):
+        ast = self.ast
+        for item in postorder(node):
+            item_type = type(item)
+            if item_type is Const:
+                ast.extend((CONST, self.integer(item.value)))
+            elif item_type is Var:
+                ast.extend((VAR, item.slot))
+            elif item_type is BinOp:
+                ast.extend((BINOP, BINARY_OPERATORS.index(item.op)))
+            elif item_type is UnaryOp:
+                ast.append(NEG)
+            elif item_type is Shared:
+                ast.extend((SHARED, item.cell))
+            elif item_type is SharedRef:
+                ast.extend((SHARED_REF, item.cell))
+            else:
+                raise SyntaxError(f"Неправильное выражение: {item}")
+
+
+class ArtifactReader:
+    """Восстанавливает CompiledProgram из разделов файла .tyc."""
+
+    def __init__(self, sections):
+        strings = sections['strings'].decode().split('\0')
+        big_text = sections['big_integers'].decode()
+        self.integers = sections['integers']
+        self.big_integers = [int(text) for text in big_text.split('\0')] if big_text else []
+        slots = sections['slots']
+        self.names = [strings[index] for index in slots[0::3]]
+        self.initial_values = [self.integer(value) if present else None
+                               for present, value in zip(slots[1::3], slots[2::3])]
+        constants = sections['constants']
+        self.constants = {strings[text]: self.integer(value) for text, value in zip(constants[0::2], constants[1::2])}
+        self.report = [strings[index] for index in sections['report']]
+        self.take = iter(sections['ast']).__next__
+        self.variables = [Var(name, slot) for slot, name in enumerate(self.names)]
+        self.leaves = {}  # Ссылка на число -> Const
+        positions = sections['positions']
+        self.positions = iter(zip(positions[0::2], positions[1::2])).__next__
+        self.statements = []
+        self.operations = sections['operations']
+        self.instructions = list(zip(self.operations, [arg if arg >= 0 else None for arg in sections['arguments']]))
+        self.code_constants = [self.integer(value) for value in sections['code_constants']]
+
+    def integer(self, reference):
+        return self.integers[reference] if reference >= 0 else self.big_integers[~reference]
+
+    def compiled(self):
+        take = self.take
+        names = self.names
+        declarations = []
+        for _ in range(take()):
+            slots = tuple(take() for _ in range(take()))
+            declarations.append(VarDecl(tuple(names[slot] for slot in slots), slots))
+        program = Program(tuple(declarations), self.read_block())
+        # Операторы в оглавлении байт-кода идут по возрастанию адреса, а циклы —
+        # в порядке инструкций CLOSED_FOR и VECTOR_FOR
+        statements = sorted(self.statements, key=itemgetter(0))
+        loops = [node for _, node in statements if type(node) is ClosedFor or type(node) is VectorFor]
+        if len(loops) != self.operations.count(CLOSED_FOR_OP) + self.operations.count(VECTOR_FOR_OP):
+            raise ArtifactError("Файл .tyc повреждён: байт-код не соответствует AST.")
+        code = CodeObject(self.instructions, self.code_constants, names, loops, statements)
+        return CompiledProgram(program, names, self.initial_values, self.constants, self.report, code)
+
+    def read_block(self):
+        return tuple(self.read_statement() for _ in range(self.take()))
+
+    def read_statement(self):
+        take = self.take
+        names = self.names
+        offset, line = self.positions()
+        tag = take()
+        if tag == ASSIGN:
+            slot = take()
+            node = Assign(names[slot], self.read_expression(), slot, line)
+        elif tag == WRITE:
+            node = Write(self.read_expression(), line)
+        elif tag == READ:
+            slot = take()
+            node = Read(names[slot], slot, line)
+        elif tag == FOR or tag == VECTOR_FOR:
+            slot = take()
+            start = self.read_expression()
+            end = self.read_expression()
+            node_type = For if tag == FOR else VectorFor
+            node = node_type(names[slot], start, end, self.read_block(), slot, line)
+        elif tag == CLOSED_FOR:
+            slot = take()
+            start = self.read_expression()
+            end = self.read_expression()
+            updates = []
+            for _ in range(take()):
+                update_slot = take()
+                accumulate = bool(take())
+                degree = take()
+                updates.append(LoopUpdate(names[update_slot], accumulate, self.read_expression(), degree,
+                                          update_slot))
+            node = ClosedFor(names[slot], start, end, tuple(updates), slot, line)
+        else:
+            raise ArtifactError(f"Файл .tyc повреждён: неизвестный оператор {tag}.")
+        if offset >= 0:
+            self.statements.append((offset, node))
+        return node
+
+    def read_expression(self):
+        # Узлы неизменяемы, поэтому одинаковые листья — общие объекты
+        take = self.take
+        leaves = self.leaves
+        stack = []
+        push = stack.append
+        while True:
+            tag = take()
+            if tag == VAR:
+                push(self.variables[take()])
+            elif tag == CONST:
+                reference = take()
+                node = leaves.get(reference)
+                if node is None:
+                    node = leaves[reference] = Const(self.integer(reference))
+                push(node)
+            elif tag == BINOP:
+                right = stack.pop()
+                stack[-1] = BinOp(BINARY_OPERATORS[take()], stack[-1], right)
+            elif tag == NEG:
+                stack[-1] = UnaryOp('-', stack[-1])
+            elif tag == SHARED:
+                stack[-1] = Shared(take(), stack[-1])
+            elif tag == SHARED_REF:
+                push(SharedRef(take()))
+            elif tag == END and len(stack) == 1:
+                return stack[0]
+            else:
+                raise ArtifactError(f"Файл .tyc повреждён: неправильное выражение (тег {tag}).")
+
+
+def flags(optimize):
+    return (OPTIMIZED if optimize else 0) | (BIG_ENDIAN if sys.byteorder == 'big' else 0)
+
+
+def write_artifact(compiled, filename, source, optimize, source_path=''):
+    """Записывает compiled в файл .tyc; source — исходный текст, source_path — путь к нему."""
+    if source_path:
+        source_path = os.path.relpath(source_path, os.path.dirname(os.path.abspath(filename)))
+    sections = ArtifactWriter(compiled).sections(source_path)
+    directory = bytearray()
+    body = bytearray()
+    position = HEADER.size + SECTION.size * len(SECTIONS)
+    for name in SECTIONS:
+        padding = -(position + len(body)) % ALIGNMENT
+        body += bytes(padding)
+        directory += SECTION.pack(position + len(body), len(sections[name]))
+        body += sections[name]
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, flags(optimize), bytes.fromhex(source_hash(source)),
+                         VERSION.encode().ljust(16, b'\0'))
+    # Файл заменяется целиком: одновременный запуск не увидит его недописанным
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(header + directory + body)
+    os.replace(temporary, filename)
+
+
+def read_header(view):
+    """Флаги, хеш исходного текста, версия интерпретатора и путь к исходному тексту (или None)."""
+    if len(view) < HEADER.size + SECTION.size * len(SECTIONS):
+        raise ArtifactError("Файл слишком короткий для файла .tyc.")
+    magic, format_version, header_flags, digest, version = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ArtifactError("Файл не является скомпилированной программой .tyc.")
+    if format_version != FORMAT_VERSION:
+        raise ArtifactError(f"Файл .tyc устарел: версия формата {format_version}, нужна {FORMAT_VERSION}.")
+    offset, length = section_bounds(view, 0)
+    with view[offset:offset + length] as part:
+        source_path = bytes(part).split(b'\0', 1)[0].decode()
+    return header_flags, digest.hex(), version.rstrip(b'\0').decode(), source_path or None
+
+
+def section_bounds(view, index):
+    offset, length = SECTION.unpack_from(view, HEADER.size + SECTION.size * index)
+    if offset + length > len(view):
+        raise ArtifactError(f"Файл .tyc повреждён: раздел {SECTIONS[index]} выходит за конец файла.")
+    return offset, length
+
+
+def read_sections(view):
+    """Разделы файла: текстовые — как bytes, остальные — списки чисел, прочитанные прямо из отображения."""
+    sections = {}
+    for index, name in enumerate(SECTIONS):
+        offset, length = section_bounds(view, index)
+        with view[offset:offset + length] as part:
+            if name == 'strings' or name == 'big_integers':
+                sections[name] = bytes(part)
+            else:
+                with part.cast(ARRAY_TYPES.get(name, 'i')) as items:
+                    sections[name] = items.tolist()
+    return sections
+
+
+def map_artifact(filename, handle):
+    """Отображает файл .tyc в память и возвращает handle(view)."""
+    try:
+        file = open(filename, 'rb')
+    except FileNotFoundError:
+        raise ArtifactError(f"Файл {filename} не найден.") from None
+    with file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ArtifactError(f"Файл {filename} пуст.")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source_map, memoryview(source_map) as view:
+            return handle(view)
+
+
+def resolve_source_path(filename, source_path):
+    if source_path is None:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(filename)), source_path)
+
+
+def artifact_source(filename):
+    """Путь к исходному тексту, из которого построен файл .tyc, или None."""
+    return resolve_source_path(filename, map_artifact(filename, read_header)[3])
+
+
+def read_artifact(filename, source=None, optimize=None):
+    """Загружает CompiledProgram из файла .tyc.
+
+    С source файл должен быть построен из этого исходного текста, с optimize —
+    в этом режиме оптимизации; иначе, как и при другой версии интерпретатора, ArtifactError.
+    """
+    def handle(view):
+        header_flags, digest, version, _ = read_header(view)
+        if version != VERSION:
+            raise ArtifactError(f"Файл .tyc записан интерпретатором версии {version}, текущая версия {VERSION}.")
+        if bool(header_flags & BIG_ENDIAN) != (sys.byteorder == 'big'):
+            raise ArtifactError("Файл .tyc записан на машине с другим порядком байтов.")
+        if source is not None and digest != source_hash(source):
+            raise ArtifactError("Файл .tyc построен из другого исходного текста.")
+        if optimize is not None and bool(header_flags & OPTIMIZED) != bool(optimize):
+            raise ArtifactError("Файл .tyc построен в другом режиме оптимизации.")
+        return read_sections(view)
+
+    sections = map_artifact(filename, handle)
+    # Узлы AST не образуют циклов, и сборщик мусора только тратил бы время
+    # на обход миллионов новых объектов
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return ArtifactReader(sections).compiled()
+    except (IndexError, StopIteration, UnicodeDecodeError):
+        raise ArtifactError("Файл .tyc повреждён.") from None
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def compile_artifact(interpreter, filename, artifact=None, source=None):
+    """Компилирует файл с исходным текстом и записывает рядом файл .tyc; возвращает CompiledProgram."""
+    if source is None:
+        source = read_source(filename)
+    # Потоковый разбор даёт операторам номера строк для профиля и сообщений об ограничениях
+    compiled = interpreter.compile(Lexer(source), stream=True)
+    write_artifact(compiled, artifact or artifact_path(filename), source, interpreter.optimize, filename)
+    return compiled
+
+
+def load_program(interpreter, filename):
+    """CompiledProgram для файла с исходным текстом или файла .tyc.
+
+    Для исходного текста берётся соседний файл .tyc, если он построен из этого
+    текста той же версией интерпретатора в том же режиме оптимизации, иначе
+    программа компилируется и .tyc записывается заново. Файл .tyc, исходный
+    текст которого доступен, пересобирается из него так же; без исходного
+    текста выполняется как есть.
+    """
+    if filename.endswith(EXTENSION):
+        artifact = filename
+        source_path = artifact_source(artifact)
+        if source_path is None or not os.path.isfile(source_path):
+            return read_artifact(artifact)
+    else:
+        artifact = artifact_path(filename)
+        source_path = filename
+    source = read_source(source_path)
+    try:
+        return read_artifact(artifact, source, interpreter.optimize)
+    except ArtifactError:
+        return compile_artifact(interpreter, source_path, artifact, source)
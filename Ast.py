@@ -0,0 +1,478 @@
+# Абстрактное синтаксическое дерево программы и его построение по лексемам
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True, slots=True)
+class Program:
+    declarations: tuple
+    body: tuple
+
+
+# Поле slot — номер ячейки переменной в ExecutionContext.values;
+# -1 означает, что имя ещё не разрешено (см. SlotResolver).
+# Поле line — строка исходного текста (0, если неизвестна); в сравнении узлов не участвует.
+
+@dataclass(frozen=True, slots=True)
+class VarDecl:
+    names: tuple
+    slots: tuple = ()
+
+
+@dataclass(frozen=True, slots=True)
+class Assign:
+    name: str
+    value: object
+    slot: int = -1
+    line: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class Write:
+    value: object
+    line: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class Read:
+    name: str
+    slot: int = -1
+    line: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class For:
+    var: str
+    start: object
+    end: object
+    body: tuple
+    slot: int = -1
+    line: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class BinOp:
+    op: str
+    left: object
+    right: object
+
+
+@dataclass(frozen=True, slots=True)
+class UnaryOp:
+    op: str
+    operand: object
+
+
+@dataclass(frozen=True, slots=True)
+class Const:
+    value: int
+
+
+@dataclass(frozen=True, slots=True)
+class Var:
+    name: str
+    slot: int = -1
+
+
+@dataclass(frozen=True, slots=True)
+class Shared:
+    """Общее подвыражение: вычисляется один раз и запоминается в ячейке cell."""
+    cell: int
+    value: object
+
+
+@dataclass(frozen=True, slots=True)
+class SharedRef:
+    cell: int
+
+
+@dataclass(frozen=True, slots=True)
+class LoopUpdate:
+    """Итог одного присваивания в теле цикла: name = name + value или name = value."""
+    name: str
+    accumulate: bool
+    value: object
+    degree: int
+    slot: int = -1
+
+
+@dataclass(frozen=True, slots=True)
+class ClosedFor:
+    """Цикл FOR, который выполняется без итераций, по формуле (см. Loops.py)."""
+    var: str
+    start: object
+    end: object
+    updates: tuple
+    slot: int = -1
+    line: int = field(default=0, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class VectorFor:
+    """Цикл FOR без зависимостей между итерациями, кроме переменной цикла;
+    выполняется операциями над массивами NumPy (см. Vector.py)."""
+    var: str
+    start: object
+    end: object
+    body: tuple
+    slot: int = -1
+    line: int = field(default=0, compare=False)
+
+
+# Приоритеты бинарных операций (все левоассоциативны): для разбора выражений и восстановления их текста
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+
+
+def postorder(node):
+    """Узлы выражения в порядке вычисления: операнды раньше операции.
+
+    Обход идёт по явному стеку, поэтому длина цепочки операций и глубина
+    вложенности не ограничены глубиной рекурсии Python.
+    """
+    stack = [(node, False)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node, expanded = pop()
+        node_type = type(node)
+        if expanded:
+            yield node
+        elif node_type is BinOp:
+            push((node, True))
+            push((node.right, False))
+            push((node.left, False))
+        elif node_type is UnaryOp:
+            push((node, True))
+            push((node.operand, False))
+        elif node_type is Shared:
+            push((node, True))
+            push((node.value, False))
+        else:
+            yield node
+
+
+def reduce_expression(node, visit):
+    """Сворачивает выражение снизу вверх без рекурсии и возвращает результат для корня.
+
+    visit(узел, *результаты операндов) вызывается для каждого узла в порядке postorder.
+    """
+    results = []
+    for item in postorder(node):
+        item_type = type(item)
+        if item_type is BinOp:
+            right = results.pop()
+            results[-1] = visit(item, results[-1], right)
+        elif item_type is UnaryOp or item_type is Shared:
+            results[-1] = visit(item, results[-1])
+        else:
+            results.append(visit(item))
+    return results[0]
+
+
+def unparse(node):
+    """Возвращает текст выражения с минимально необходимыми скобками."""
+
+    def visit(item, *operands):
+        # Результат — (текст, приоритет): операнд берётся в скобки, если его приоритет ниже нужного
+        item_type = type(item)
+        if item_type is Const:
+            return str(item.value), 0 if item.value < 0 else 4
+        if item_type is Var:
+            return item.name, 4
+        if item_type is SharedRef:
+            return f"${item.cell}", 4
+        if item_type is Shared:
+            return operands[0]
+        if item_type is UnaryOp:
+            return f"-{parenthesize(operands[0], 3)}", 3
+        precedence = PRECEDENCE[item.op]
+        left, right = operands
+        return f"{parenthesize(left, precedence)} {item.op} {parenthesize(right, precedence + 1)}", precedence
+
+    return reduce_expression(node, visit)[0]
+
+
+def parenthesize(operand, precedence):
+    text, own = operand
+    return f"({text})" if own < precedence else text
+
+
+def expression_reads(node, names):
+    """Добавляет в names все переменные, читаемые выражением."""
+    for item in postorder(node):
+        if type(item) is Var:
+            names.add(item.name)
+    return names
+
+
+class SlotResolver:
+    """Заменяет имена переменных номерами слотов; необъявленное имя — ошибка компиляции."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.slots = {name: slot for slot, name in enumerate(self.names)}
+
+    def slot(self, name):
+        if name not in self.slots:
+            raise NameError(f"Переменная '{name}' не объявлена.")
+        return self.slots[name]
+
+    def resolve(self, program):
+        declarations = []
+        for declaration in program.declarations:
+            for name in declaration.names:
+                if name not in self.slots:
+                    self.slots[name] = len(self.names)
+                    self.names.append(name)
+            declarations.append(VarDecl(declaration.names, tuple(self.slots[name] for name in declaration.names)))
+        return Program(tuple(declarations), self.resolve_block(program.body))
+
+    def resolve_block(self, statements):
+        return tuple(self.resolve_statement(statement) for statement in statements)
+
+    def resolve_statement(self, node):
+        node_type = type(node)
+        if node_type is Assign:
+            return Assign(node.name, self.resolve_expression(node.value), self.slot(node.name), node.line)
+        if node_type is Write:
+            return Write(self.resolve_expression(node.value), node.line)
+        if node_type is Read:
+            return Read(node.name, self.slot(node.name), node.line)
+        if node_type is For:
+            return For(node.var, self.resolve_expression(node.start), self.resolve_expression(node.end),
+                       self.resolve_block(node.body), self.slot(node.var), node.line)
+        if node_type is ClosedFor:
+            updates = tuple(
+                LoopUpdate(update.name, update.accumulate, self.resolve_expression(update.value), update.degree,
+                           self.slot(update.name))
+                for update in node.updates
+            )
+            return ClosedFor(node.var, self.resolve_expression(node.start), self.resolve_expression(node.end),
+                             updates, self.slot(node.var), node.line)
+        if node_type is VectorFor:
+            return VectorFor(node.var, self.resolve_expression(node.start), self.resolve_expression(node.end),
+                             self.resolve_block(node.body), self.slot(node.var), node.line)
+        raise SyntaxError(f"Неожиданное выражение: {node}")
+
+    def resolve_expression(self, node):
+        return reduce_expression(node, self.resolve_node)
+
+    def resolve_node(self, node, *operands):
+        node_type = type(node)
+        if node_type is Var:
+            return Var(node.name, self.slot(node.name))
+        if node_type is BinOp:
+            return BinOp(node.op, *operands)
+        if node_type is UnaryOp:
+            return UnaryOp(node.op, *operands)
+        if node_type is Shared:
+            return Shared(node.cell, *operands)
+        return node
+
+
+# Отметки открывающей скобки и унарного минуса в стеке отложенных операций разбора выражения
+OPEN_PAREN = (0, '(', None)
+NEGATION = (0, '-', None)
+
+
+class AstBuilder:
+    """Строит AST за один проход по лексемам, ничего не вычисляя."""
+
+    def __init__(self, tokens):
+        self._tokens = iter(tokens)
+        self.current_token = next(self._tokens, None)
+        self._leaves = {}  # Лексема -> общий для всех её вхождений узел Const или Var
+
+    def parse(self):
+        if not self.current_token:
+            raise ValueError("Нет токенов для анализа.")
+
+        declarations = []
+        while self.current_token and self.current_token[1] == 'VAR':
+            declarations.append(self.parse_variable_declaration())
+
+        body = self.parse_program()
+        return Program(tuple(declarations), body)
+
+    def parse_variable_declaration(self):
+        self.expect('KEYWORD', 'VAR')
+        names = []
+        while self.current_token and self.current_token[0] == 'IDENTIFIER':
+            names.append(self.current_token[1])
+            self.expect('IDENTIFIER')
+            if self.current_token and self.current_token[1] == ',':
+                self.expect('OPERATOR', ',')
+            elif self.current_token and self.current_token[1] == ':':
+                self.expect('OPERATOR', ':')
+                self.expect('IDENTIFIER', 'integer')
+                self.expect('OPERATOR', ';')
+                break
+            else:
+                raise SyntaxError("Ошибка в объявлении переменных. Ожидалось ',' или ':'.")
+        return VarDecl(tuple(names))
+
+    def parse_program(self):
+        self.expect('KEYWORD', 'BEGIN')
+        body = self.parse_block()
+
+        if not self.current_token:
+            raise SyntaxError("Программа завершена без ключевого слова END.")
+
+        self.expect('KEYWORD', 'END')
+
+        # Если после `END` остались токены, это ошибка
+        if self.current_token:
+            raise SyntaxError("Код после закрытия блока END недопустим.")
+        return body
+
+    def parse_block(self):
+        statements = []
+        while self.current_token and self.current_token[1] != 'END':
+            statements.append(self.parse_statement())
+            if self.current_token and self.current_token[1] == ';':
+                self.expect('OPERATOR', ';')
+        return tuple(statements)
+
+    def line(self):
+        # Позиции есть только у лексем из Lexer.iter_tokens: (тип, значение, строка, столбец)
+        token = self.current_token
+        return token[2] if token is not None and len(token) > 2 else 0
+
+    def parse_statement(self):
+        if self.current_token[0] == 'IDENTIFIER':
+            return self.parse_assignment()
+        elif self.current_token[1] == 'WRITE':
+            return self.parse_write()
+        elif self.current_token[1] == 'FOR':
+            return self.parse_for_loop()
+        elif self.current_token[1] == 'READ':
+            return self.parse_read()
+        else:
+            raise SyntaxError(f"Неожиданное выражение: {self.current_token}")
+
+    def parse_assignment(self):
+        line = self.line()
+        identifier = self.current_token[1]
+        self.expect('IDENTIFIER')
+        self.expect('OPERATOR', '=')
+        return Assign(identifier, self.parse_expression(), line=line)
+
+    def parse_for_loop(self):
+        line = self.line()
+        self.expect('KEYWORD', 'FOR')
+        if not self.current_token or self.current_token[0] != 'IDENTIFIER':
+            raise SyntaxError("Ожидалось имя переменной после FOR.")
+        loop_var = self.current_token[1]
+        self.expect('IDENTIFIER')
+        self.expect('OPERATOR', '=')
+        start = self.parse_expression()
+        self.expect('KEYWORD', 'TO')
+        end = self.parse_expression()
+        self.expect('KEYWORD', 'DO')
+        self.expect('KEYWORD', 'BEGIN')
+
+        body = self.parse_block()
+
+        if not self.current_token or self.current_token[1] != 'END':
+            raise SyntaxError("Ожидалось ключевое слово END для завершения цикла FOR.")
+
+        self.expect('KEYWORD', 'END')
+        return For(loop_var, start, end, body, line=line)
+
+    def parse_read(self):
+        line = self.line()
+        self.expect('KEYWORD', 'READ')
+        if self.current_token and self.current_token[0] == 'IDENTIFIER':
+            var_name = self.current_token[1]
+            self.expect('IDENTIFIER')
+            return Read(var_name, line=line)
+        raise SyntaxError("Ожидалось имя переменной после READ.")
+
+    def parse_write(self):
+        line = self.line()
+        self.expect('KEYWORD', 'WRITE')
+        return Write(self.parse_expression(), line)
+
+    def parse_expression(self):
+        """Разбирает выражение без рекурсии, методом предшествования с явным стеком.
+
+        pending — отложенные бинарные операции (приоритет, операция, левый операнд),
+        а также OPEN_PAREN и NEGATION. Унарный минус применяется сразу после своего
+        операнда, поэтому связывает сильнее '*' и '/'.
+        """
+        tokens = self._tokens
+        token = self.current_token
+        leaves = self._leaves
+        precedences = PRECEDENCE
+        pending = []
+        depth = 0  # Число незакрытых скобок
+        while True:
+            # Операнд с предшествующими унарными минусами и открывающими скобками
+            while True:
+                if token is None:
+                    self.current_token = None
+                    raise SyntaxError("Неожиданный конец программы. Ожидалось выражение.")
+                operand = leaves.get(token[1])
+                if operand is not None:
+                    break
+                kind = token[0]
+                if kind == 'CONSTANT':
+                    operand = leaves[token[1]] = Const(int(token[1]))
+                    break
+                if kind == 'IDENTIFIER':
+                    operand = leaves[token[1]] = Var(token[1])
+                    break
+                if token[1] == '(':
+                    pending.append(OPEN_PAREN)
+                    depth += 1
+                elif token[1] == '-':
+                    pending.append(NEGATION)
+                else:
+                    self.current_token = token
+                    raise SyntaxError(f"Неправильное выражение: {token}")
+                token = next(tokens, None)
+            token = next(tokens, None)
+
+            while pending and pending[-1] is NEGATION:
+                pending.pop()
+                operand = UnaryOp('-', operand)
+            # Закрывающие скобки: строим операции внутри них
+            while depth and token is not None and token[1] == ')':
+                entry = pending.pop()
+                while entry is not OPEN_PAREN:
+                    operand = BinOp(entry[1], entry[2], operand)
+                    entry = pending.pop()
+                depth -= 1
+                token = next(tokens, None)
+                while pending and pending[-1] is NEGATION:
+                    pending.pop()
+                    operand = UnaryOp('-', operand)
+
+            precedence = precedences.get(token[1]) if token is not None else None
+            if precedence is None:
+                # Конец выражения: строим отложенные операции
+                self.current_token = token
+                while pending:
+                    entry = pending.pop()
+                    if entry is OPEN_PAREN:
+                        self.expect('OPERATOR', ')')
+                    operand = BinOp(entry[1], entry[2], operand)
+                return operand
+            while pending and pending[-1][0] >= precedence:
+                _, operator, left = pending.pop()
+                operand = BinOp(operator, left, operand)
+            pending.append((precedence, token[1], operand))
+            token = next(tokens, None)
+
+    def expect(self, token_type, token_value=None):
+        if self.current_token is None:
+            raise SyntaxError(
+                f"Неожиданный конец программы. Ожидалось {token_type} {token_value if token_value else ''}."
+            )
+
+        if self.current_token[0] == token_type:
+            if token_value is None or self.current_token[1] == token_value:
+                self.current_token = next(self._tokens, None)
+            else:
+                raise SyntaxError(f"Ожидалось '{token_value}', но получено '{self.current_token[1]}'.")
+        else:
+            raise SyntaxError(f"Ожидался тип токена '{token_type}', но получено '{self.current_token[0]}'.")
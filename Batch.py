@@ -0,0 +1,102 @@
+# Пакетное выполнение программ из каталога или списка файлов в пуле процессов.
+# Результаты пишутся в формате JSON Lines по мере завершения программ.
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Input import ListReader
+from Interpeter import Interpreter, Lexer, LexerError, limits_from_args
+from Limits import Budget, LimitExceeded
+from Output import ListSink
+
+
+def collect_sources(target, pattern='*.txt'):
+    """Список файлов программ: все файлы каталога по шаблону или строки файла-манифеста."""
+    if os.path.isdir(target):
+        return sorted(glob.glob(os.path.join(target, pattern)))
+    if not os.path.isfile(target):
+        raise ValueError(f"Файл {target} не найден.")
+    base = os.path.dirname(os.path.abspath(target))
+    paths = []
+    with open(target, 'r') as manifest:
+        for line in manifest:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return paths
+
+
+def run_program(filename, engine='tree', optimize=False, limits=None):
+    """Выполняет одну программу и возвращает запись результата; исключения не выпускает.
+
+    limits — словарь ограничений для Limits.Budget; вывод до их превышения остаётся в записи.
+    """
+    result = {'file': filename, 'ok': False, 'output': [], 'identifiers': None, 'constants': None,
+              'error': None, 'timings': {}}
+    started = time.perf_counter()
+    output = ListSink()
+    interpreter = Interpreter(engine=engine, optimize=optimize)
+    try:
+        # Номера строк в сообщениях об ограничениях есть только при потоковом разборе
+        compiled = interpreter.compile(Lexer.from_file(filename), stream=bool(limits))
+        compiled_at = time.perf_counter()
+        result['timings']['compile'] = compiled_at - started
+        # READ в пакетном режиме читать неоткуда: входные данные пусты
+        context = interpreter.run(compiled, output=output, reader=ListReader(()),
+                                  budget=Budget(**limits) if limits else None)
+        result['timings']['run'] = time.perf_counter() - compiled_at
+        symbol_table = context.symbol_table
+        result['identifiers'] = symbol_table['identifiers']
+        result['constants'] = symbol_table['constants']
+        result['ok'] = True
+    except LexerError as e:
+        result['error'] = {'type': 'LexerError', 'message': str(e), 'errors': e.errors}
+    except LimitExceeded as e:
+        result['error'] = {'type': 'LimitExceeded', 'message': str(e), **e.details()}
+    except Exception as e:
+        result['error'] = {'type': type(e).__name__, 'message': str(e)}
+    result['output'] = output.lines()
+    result['timings']['total'] = time.perf_counter() - started
+    return result
+
+
+def run_batch(paths, results, jobs=None, engine='tree', optimize=False, limits=None):
+    """Выполняет программы paths в пуле из jobs процессов, записывая результаты в поток results.
+
+    Записи выдаются в порядке завершения; возвращает (число программ, число ошибок).
+    """
+    failures = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_program, path, engine, optimize, limits): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # Сюда попадают только сбои самого рабочего процесса
+                result = {'file': futures[future], 'ok': False, 'output': [], 'identifiers': None,
+                          'constants': None, 'error': {'type': type(e).__name__, 'message': str(e)},
+                          'timings': {}}
+            if not result['ok']:
+                failures += 1
+            results.write(json.dumps(result, ensure_ascii=False) + "\n")
+            results.flush()
+    return len(futures), failures
+
+
+def main(args):
+    try:
+        paths = collect_sources(args.batch, args.pattern)
+    except ValueError as e:
+        print(e)
+        return
+    if args.results == '-':
+        total, failures = run_batch(paths, sys.stdout, args.jobs, args.engine, args.optimize,
+                                    limits_from_args(args))
+    else:
+        with open(args.results, 'w') as results:
+            total, failures = run_batch(paths, results, args.jobs, args.engine, args.optimize,
+                                        limits_from_args(args))
+    print(f"Выполнено программ: {total}, с ошибками: {failures}.", file=sys.stderr)
@@ -0,0 +1,184 @@
+# Компиляция AST в плоский байт-код для стековой виртуальной машины
+import bisect
+
+from Ast import (
+    Assign,
+    BinOp,
+    ClosedFor,
+    Const,
+    For,
+    Read,
+    Shared,
+    SharedRef,
+    UnaryOp,
+    Var,
+    VectorFor,
+    Write,
+    postorder,
+)
+
+# Коды операций
+(
+    LOAD_CONST,
+    LOAD_VAR,
+    STORE_VAR,
+    BINARY_ADD,
+    BINARY_SUB,
+    BINARY_MUL,
+    BINARY_FLOORDIV,
+    NEG,
+    WRITE,
+    READ,
+    GET_ITER,
+    FOR_ITER,
+    JUMP,
+    SET_SHARED,
+    LOAD_SHARED,
+    CLOSED_FOR,
+    VECTOR_FOR,
+) = range(17)
+
+OPNAMES = [
+    'LOAD_CONST',
+    'LOAD_VAR',
+    'STORE_VAR',
+    'BINARY_ADD',
+    'BINARY_SUB',
+    'BINARY_MUL',
+    'BINARY_FLOORDIV',
+    'NEG',
+    'WRITE',
+    'READ',
+    'GET_ITER',
+    'FOR_ITER',
+    'JUMP',
+    'SET_SHARED',
+    'LOAD_SHARED',
+    'CLOSED_FOR',
+    'VECTOR_FOR',
+]
+
+BINARY_OPS = {'+': BINARY_ADD, '-': BINARY_SUB, '*': BINARY_MUL, '/': BINARY_FLOORDIV}
+
+# Операции, аргумент которых — индекс в таблице констант или номер слота
+CONST_ARG_OPS = frozenset({LOAD_CONST})
+NAME_ARG_OPS = frozenset({LOAD_VAR, STORE_VAR, READ})
+JUMP_ARG_OPS = frozenset({FOR_ITER, JUMP})
+
+
+class CodeObject:
+    def __init__(self, instructions, constants, names, loops=(), statements=()):
+        self.instructions = instructions  # Список пар (код операции, аргумент)
+        self.constants = constants
+        self.names = names  # Имена переменных по номерам слотов
+        self.loops = loops  # Узлы ClosedFor и VectorFor для CLOSED_FOR и VECTOR_FOR
+        self.statements = statements  # Пары (адрес первой инструкции, оператор) по возрастанию адреса
+
+    def statement_at(self, offset):
+        """Оператор, к которому относится инструкция по адресу offset."""
+        index = bisect.bisect_right(self.statements, offset, key=lambda entry: entry[0])
+        return self.statements[index - 1][1] if index else None
+
+
+class Compiler:
+    """Переводит AST с разрешёнными слотами в байт-код; names — имена слотов."""
+
+    def __init__(self, names):
+        self.instructions = []
+        self.constants = []
+        self.names = list(names)
+        self.loops = []
+        self.statements = []
+        self._constant_index = {}
+
+    def compile(self, program):
+        self.compile_block(program.body)
+        return CodeObject(self.instructions, self.constants, self.names, self.loops, self.statements)
+
+    def emit(self, op, arg=None):
+        self.instructions.append((op, arg))
+        return len(self.instructions) - 1
+
+    def constant(self, value):
+        if value not in self._constant_index:
+            self._constant_index[value] = len(self.constants)
+            self.constants.append(value)
+        return self._constant_index[value]
+
+    def compile_block(self, statements):
+        for statement in statements:
+            self.compile_statement(statement)
+
+    def compile_statement(self, node):
+        self.statements.append((len(self.instructions), node))
+        node_type = type(node)
+        if node_type is Assign:
+            self.compile_expression(node.value)
+            self.emit(STORE_VAR, node.slot)
+        elif node_type is Write:
+            self.compile_expression(node.value)
+            self.emit(WRITE)
+        elif node_type is For:
+            self.compile_for(node)
+        elif node_type is ClosedFor:
+            # Цикл выполняется один раз по формуле, без инструкций для тела
+            self.emit(CLOSED_FOR, len(self.loops))
+            self.loops.append(node)
+        elif node_type is VectorFor:
+            # Цикл выполняется массивами целиком (см. Vector.py)
+            self.emit(VECTOR_FOR, len(self.loops))
+            self.loops.append(node)
+        elif node_type is Read:
+            self.emit(READ, node.slot)
+        else:
+            raise SyntaxError(f"Неожиданное выражение: {node}")
+
+    def compile_for(self, node):
+        self.compile_expression(node.start)
+        self.compile_expression(node.end)
+        self.emit(GET_ITER)
+        loop_start = self.emit(FOR_ITER)
+        self.emit(STORE_VAR, node.slot)
+        self.compile_block(node.body)
+        self.emit(JUMP, loop_start)
+        # Адрес выхода из цикла известен только после тела
+        self.instructions[loop_start] = (FOR_ITER, len(self.instructions))
+
+    def compile_expression(self, node):
+        # Стековая машина вычисляет операнды раньше операции: инструкции идут в порядке postorder
+        for item in postorder(node):
+            item_type = type(item)
+            if item_type is Const:
+                self.emit(LOAD_CONST, self.constant(item.value))
+            elif item_type is Var:
+                self.emit(LOAD_VAR, item.slot)
+            elif item_type is BinOp:
+                self.emit(BINARY_OPS[item.op])
+            elif item_type is UnaryOp:
+                self.emit(NEG)
+            elif item_type is Shared:
+                # Значение остаётся на стеке и запоминается для SharedRef
+                self.emit(SET_SHARED, item.cell)
+            elif item_type is SharedRef:
+                self.emit(LOAD_SHARED, item.cell)
+            else:
+                raise SyntaxError(f"Неправильное выражение: {item}")
+
+
+def disassemble(code):
+    """Возвращает текстовое представление байт-кода, по строке на инструкцию."""
+    targets = {arg for op, arg in code.instructions if op in JUMP_ARG_OPS}
+    lines = []
+    for offset, (op, arg) in enumerate(code.instructions):
+        marker = '>>' if offset in targets else '  '
+        line = f"{marker} {offset:4} {OPNAMES[op]:<16}"
+        if arg is not None:
+            line += f" {arg}"
+            if op in CONST_ARG_OPS:
+                line += f" ({code.constants[arg]})"
+            elif op in NAME_ARG_OPS:
+                line += f" ({code.names[arg]})"
+            elif op == CLOSED_FOR or op == VECTOR_FOR:
+                line += f" ({code.loops[arg].var})"
+        lines.append(line.rstrip())
+    return "\n".join(lines)
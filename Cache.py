@@ -0,0 +1,127 @@
+# Кэш скомпилированных программ: повторные запуски одного исходного текста
+# не тратят время на лексический и синтаксический анализ
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from Interpeter import Interpreter, Lexer
+
+
+def source_hash(source):
+    return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+class ProgramCache:
+    """LRU-кэш CompiledProgram по хешу исходного текста.
+
+    Ограничивается числом записей (max_entries) и, если задано, суммарным
+    размером исходных текстов в байтах (max_bytes). Сами CompiledProgram не
+    измеряются: max_bytes — бюджет на длину исходников, а память под AST и
+    байт-код растёт примерно пропорционально ей. Для файлов запоминаются
+    mtime и размер: пока они не изменились, файл не перечитывается.
+    """
+
+    def __init__(self, interpreter=None, max_entries=256, max_bytes=None):
+        self.interpreter = interpreter or Interpreter()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # Ключ -> (CompiledProgram, размер)
+        self._files = {}  # Путь -> (mtime_ns, размер файла, ключ)
+        self._paths = {}  # Ключ -> пути из _files, которые на него указывают
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def key(self, source):
+        # Результат компиляции зависит от включённой оптимизации
+        return f"{source_hash(source)}:{int(bool(self.interpreter.optimize))}"
+
+    def get_source(self, source):
+        return self._get(self.key(source), source)
+
+    def get_file(self, filename):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            raise ValueError(f"Файл {filename} не найден.")
+        with self._lock:
+            known = self._files.get(filename)
+            if known and known[:2] == (stat.st_mtime_ns, stat.st_size) and known[2] in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(known[2])
+                return self._entries[known[2]][0]
+
+        with open(filename, 'r') as file:
+            source = file.read()
+        key = self.key(source)
+        compiled = self._get(key, source)
+        with self._lock:
+            # Путь запоминается, только пока его программа есть в кэше
+            if key in self._entries:
+                self._forget_file(filename)
+                self._files[filename] = (stat.st_mtime_ns, stat.st_size, key)
+                self._paths.setdefault(key, set()).add(filename)
+        return compiled
+
+    def _forget_file(self, filename):
+        known = self._files.pop(filename, None)
+        if known is not None:
+            paths = self._paths[known[2]]
+            paths.discard(filename)
+            if not paths:
+                del self._paths[known[2]]
+
+    def _get(self, key, source):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+
+        # Компилируем вне блокировки: ошибки компиляции не кэшируются
+        # Потоковый разбор даёт операторам номера строк для сообщений об ограничениях
+        compiled = self.interpreter.compile(Lexer(source), stream=True)
+        size = len(source.encode())
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (compiled, size)
+                self._size += size
+                self._evict()
+        return compiled
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._size > self.max_bytes and len(self._entries) > 1)
+        ):
+            key, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            for filename in self._paths.pop(key, ()):
+                del self._files[filename]
+
+    def run_file(self, filename):
+        """Выполняет программу из файла с новым контекстом поверх закэшированной компиляции."""
+        return self.interpreter.run(self.get_file(filename))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._files.clear()
+            self._paths.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,316 @@
+# Контрольные точки долгого выполнения и продолжение с последней из них.
+#
+# Программу с контрольными точками выполняет виртуальная машина (VM.py).
+# Точка записывается на обратном переходе цикла FOR, когда стек VM содержит
+# только итераторы циклов: адрес следующей инструкции, значения переменных по
+# слотам и стек циклов (адрес FOR_ITER, слот переменной цикла, текущее значение,
+# верхняя граница). Как и Limits.Budget, счёт идёт по итерациям циклов:
+# операторов вне циклов не больше длины программы. Вывод WRITE между точками
+# копится в памяти и отдаётся приёмнику при записи точки, а если его набралось
+# больше CheckpointSink.threshold байт — и раньше. Точка хранит смещение конца
+# вывода на момент записи, и файл вывода (--output) при продолжении обрезается
+# до него, поэтому продолжение выводит ровно то, что ещё не было выведено.
+# Стандартный вывод обрезать нельзя: строки, отданные после последней точки,
+# и строки, выведенные между сбросом вывода и заменой файла точки, при
+# продолжении повторятся. Если программа завершилась ошибкой, вывод
+# после последней точки отдаётся приёмнику, как при выполнении без точек; при
+# продолжении такого запуска он так же повторится в стандартном выводе.
+# Значения READ, прочитанные до точки, при продолжении пропускаются (кроме
+# интерактивного ввода).
+import hashlib
+import os
+import struct
+import time
+from array import array
+
+from Output import FileSink
+
+MAGIC = b'TYCP'
+FORMAT_VERSION = 1
+# Сигнатура, версия формата, отпечаток байт-кода, адрес, итерации, выведено строк,
+# смещение в файле вывода (-1 — нет), прочитано значений READ, число слотов, число циклов
+HEADER = struct.Struct('<4sH16sQQQqQQQ')
+LOOP_FIELDS = 4  # Адрес FOR_ITER, слот, текущее значение, верхняя граница
+
+
+class CheckpointError(ValueError):
+    """Файл контрольной точки повреждён или записан для другой программы."""
+
+
+def integer_bytes(value):
+    return value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+
+
+def code_fingerprint(code):
+    """Отпечаток байт-кода: точка подходит только той программе, для которой записана."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(array('B', [op for op, _ in code.instructions]).tobytes())
+    digest.update(array('q', [arg if arg is not None else -1 for _, arg in code.instructions]).tobytes())
+    for value in code.constants:
+        digest.update(integer_bytes(value))
+        digest.update(b'\0')
+    digest.update('\0'.join(code.names).encode())
+    return digest.digest()
+
+
+class Checkpoint:
+    """Состояние VM на обратном переходе цикла; loops — кортежи (адрес FOR_ITER, слот, значение, граница)."""
+
+    def __init__(self, fingerprint, pc, values, loops=(), iterations=0, output_lines=0, output_offset=None,
+                 reads=0):
+        self.fingerprint = fingerprint
+        self.pc = pc
+        self.values = values
+        self.loops = loops
+        self.iterations = iterations
+        self.output_lines = output_lines
+        self.output_offset = output_offset
+        self.reads = reads
+
+
+def write_checkpoint(filename, checkpoint):
+    """Записывает точку атомарно: файл заменяется целиком и уже сброшен на диск."""
+    integers = list(checkpoint.values)
+    for loop in checkpoint.loops:
+        integers.extend(loop)
+    chunks = [integer_bytes(value) if value is not None else b'' for value in integers]
+    sizes = array('q', [len(chunk) if value is not None else -1 for chunk, value in zip(chunks, integers)])
+    offset = checkpoint.output_offset if checkpoint.output_offset is not None else -1
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, checkpoint.fingerprint, checkpoint.pc, checkpoint.iterations,
+                         checkpoint.output_lines, offset, checkpoint.reads, len(checkpoint.values),
+                         len(checkpoint.loops))
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(header + sizes.tobytes() + b''.join(chunks))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, filename)
+
+
+def read_checkpoint(filename):
+    try:
+        with open(filename, 'rb') as file:
+            data = file.read()
+    except FileNotFoundError:
+        raise CheckpointError(f"Файл {filename} не найден.") from None
+    if len(data) < HEADER.size:
+        raise CheckpointError("Файл слишком короткий для контрольной точки.")
+    (magic, format_version, fingerprint, pc, iterations, output_lines, output_offset, reads, slot_count,
+     loop_count) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise CheckpointError("Файл не является контрольной точкой.")
+    if format_version != FORMAT_VERSION:
+        raise CheckpointError(f"Контрольная точка устарела: версия формата {format_version}, нужна {FORMAT_VERSION}.")
+    count = slot_count + loop_count * LOOP_FIELDS
+    sizes = array('q')
+    sizes.frombytes(data[HEADER.size:HEADER.size + count * sizes.itemsize])
+    if len(sizes) != count:
+        raise CheckpointError("Контрольная точка повреждена.")
+    integers = []
+    position = HEADER.size + count * sizes.itemsize
+    for size in sizes:
+        if size < 0:
+            integers.append(None)
+            continue
+        integers.append(int.from_bytes(data[position:position + size], 'little', signed=True))
+        position += size
+    if position != len(data):
+        raise CheckpointError("Контрольная точка повреждена.")
+    loop_integers = integers[slot_count:]
+    loops = [tuple(loop_integers[k:k + LOOP_FIELDS]) for k in range(0, len(loop_integers), LOOP_FIELDS)]
+    return Checkpoint(fingerprint, pc, integers[:slot_count], loops, iterations, output_lines,
+                      output_offset if output_offset >= 0 else None, reads)
+
+
+class LoopCursor:
+    """Итератор цикла FOR, запоминающий последнее выданное значение."""
+
+    def __init__(self, address, slot, end, iterator, current=None):
+        self.address = address
+        self.slot = slot
+        self.end = end
+        self.iterator = iterator
+        self.current = current
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.current = next(self.iterator)
+        return self.current
+
+
+def output_size(value):
+    """Примерный размер строки "OUTPUT: <значение>" в байтах: цифр в числе около 0,3 от числа битов."""
+    if type(value) is int:
+        return 10 + value.bit_length() * 3 // 10
+    return 9 + len(str(value))
+
+
+class CheckpointSink:
+    """Копит вывод до следующей контрольной точки; commit отдаёт его приёмнику sink.
+
+    Если накопилось больше threshold байт, вывод отдаётся приёмнику, не дожидаясь
+    точки: память не растёт с длиной вывода между точками. В точку при этом
+    по-прежнему попадают число строк и смещение на момент commit.
+    """
+
+    def __init__(self, sink, lines=0, threshold=1 << 20, check_every=4096):
+        self.sink = sink
+        self.lines = lines  # Сколько значений отдано приёмнику к последней точке
+        self.threshold = threshold
+        self.check_every = check_every  # Размер считается раз на столько значений, а не при каждом WRITE
+        self.pending = []
+        self.size = 0  # Примерный размер pending[:measured] в байтах
+        self.measured = 0
+        self.spilled = 0  # Значений, отданных приёмнику после последней точки
+
+    def write(self, value):
+        pending = self.pending
+        pending.append(value)
+        if len(pending) - self.measured >= self.check_every:
+            self.measure()
+
+    def extend(self, values):
+        self.pending.extend(values)
+        if len(self.pending) - self.measured >= self.check_every:
+            self.measure()
+
+    def measure(self):
+        pending = self.pending
+        self.size += sum(map(output_size, pending[self.measured:]))
+        self.measured = len(pending)
+        if self.size > self.threshold:
+            self.sink.extend(pending)
+            self.spilled += len(pending)
+            pending.clear()
+            self.size = self.measured = 0
+
+    def commit(self):
+        self.sink.extend(self.pending)
+        self.sink.flush()
+        self.lines += self.spilled + len(self.pending)
+        self.spilled = 0
+        self.pending.clear()
+        self.size = self.measured = 0
+
+    def offset(self):
+        """Смещение конца вывода в файле или None, если вывод идёт не в файл."""
+        return self.sink.stream.tell() if isinstance(self.sink, FileSink) else None
+
+    def flush(self):
+        pass  # Вывод после последней точки при продолжении повторится, поэтому он ждёт следующей точки
+
+    def close(self):
+        pass  # Приёмник закрывает его владелец
+
+
+class Checkpointer:
+    """Записывает контрольные точки VM в файл filename каждые every итераций циклов или interval секунд.
+
+    С resume выполнение продолжается с точки из filename, если файл есть.
+    После завершения программы в файл записывается итоговая точка: её
+    продолжение ничего не выполняет и не выводит.
+    """
+
+    def __init__(self, filename, every=None, interval=None, resume=False, check_every=4096):
+        if every is None and interval is None:
+            raise ValueError("Нужно задать частоту контрольных точек: число итераций или секунды.")
+        for name, value in (('every', every), ('interval', interval)):
+            if value is not None and value <= 0:
+                raise ValueError(f"Частота контрольных точек {name} должна быть положительной.")
+        self.filename = filename
+        self.every = every
+        self.interval = interval
+        self.check_every = check_every  # Часы, как и в Limits.Budget, смотрятся раз на столько итераций
+        self.checkpoint = read_checkpoint(filename) if resume and os.path.exists(filename) else None
+        self.iterations = self.checkpoint.iterations if self.checkpoint is not None else 0
+        self.saved_at = self.iterations
+        self.deadline = None
+        self.next_check = 0  # Итерация, на которой due в следующий раз проверит частоту точек
+        self.context = None
+        self.code = None
+        self.fingerprint = None
+        self.output = None
+
+    @property
+    def output_offset(self):
+        """Смещение в файле вывода, до которого его нужно обрезать при продолжении."""
+        return self.checkpoint.output_offset if self.checkpoint is not None else None
+
+    def start(self, context, code):
+        """Готовит context к выполнению code и возвращает начальные адрес и стек VM."""
+        self.context = context
+        self.code = code
+        self.fingerprint = code_fingerprint(code)
+        checkpoint = self.checkpoint
+        self.output = CheckpointSink(context.output, checkpoint.output_lines if checkpoint is not None else 0)
+        context.output = self.output
+        self.restart_timer()
+        if checkpoint is None:
+            return 0, []
+
+        if checkpoint.fingerprint != self.fingerprint or len(checkpoint.values) != len(context.values):
+            raise CheckpointError("Контрольная точка записана для другой программы или режима оптимизации.")
+        context.values[:] = checkpoint.values
+        reader = context.reader
+        if not reader.interactive:
+            for _ in range(checkpoint.reads):
+                reader.read('значения до контрольной точки')
+        budget = context.budget
+        stack = []
+        for address, slot, current, end in checkpoint.loops:
+            if budget is None:
+                iterator = iter(range(current + 1, end + 1))
+            else:
+                iterator = iter(budget.iterate(current + 1, end + 1, code.statement_at(address - 1)))
+            stack.append(LoopCursor(address, slot, end, iterator, current))
+        return checkpoint.pc, stack
+
+    def restart_timer(self):
+        self.deadline = time.monotonic() + self.interval if self.interval is not None else None
+        self.schedule()
+
+    def schedule(self):
+        checks = []
+        if self.every is not None:
+            checks.append(self.saved_at + self.every)
+        if self.deadline is not None:
+            checks.append(self.iterations + self.check_every)
+        self.next_check = min(checks)
+
+    def loop(self, address, slot, end, iterator):
+        """Итератор цикла, начатого инструкцией GET_ITER перед адресом address."""
+        return LoopCursor(address, slot, end, iterator)
+
+    def due(self):
+        """Учитывает итерацию цикла; истинно, если пора записать точку."""
+        self.iterations += 1
+        if self.iterations < self.next_check:
+            return False
+        if self.every is not None and self.iterations - self.saved_at >= self.every:
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        self.schedule()
+        return False
+
+    def save(self, pc, stack):
+        """Записывает точку; stack — стек VM на обратном переходе цикла (только LoopCursor)."""
+        self.output.commit()
+        loops = [(cursor.address, cursor.slot, cursor.current, cursor.end) for cursor in stack]
+        write_checkpoint(self.filename, Checkpoint(
+            self.fingerprint, pc, list(self.context.values), loops, self.iterations, self.output.lines,
+            self.output.offset(), getattr(self.context.reader, 'count', 0)))
+        self.saved_at = self.iterations
+        self.restart_timer()
+
+    def finish(self):
+        """Записывает итоговую точку после последней инструкции."""
+        self.save(len(self.code.instructions), [])
+
+    def abort(self):
+        """Отдаёт приёмнику вывод после последней точки: выполнение прервано ошибкой."""
+        if self.output is not None:
+            self.output.commit()
+
@@ -0,0 +1,99 @@
+# Клиент сервера интерпретатора (см. Server.py): отправляет программу и
+# печатает её вывод по мере поступления.
+#
+#     python Client.py source.txt --address 127.0.0.1:8765
+import argparse
+import asyncio
+import json
+import sys
+
+from Interpeter import limits_from_args
+from Server import DEFAULT_ADDRESS, parse_address
+
+
+class Client:
+    """Одно соединение с сервером; программы выполняются по очереди."""
+
+    def __init__(self, address=DEFAULT_ADDRESS):
+        self.address = address
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        kind, where = parse_address(self.address)
+        if kind == 'unix':
+            self.reader, self.writer = await asyncio.open_unix_connection(where, limit=1 << 26)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(*where, limit=1 << 26)
+        return self
+
+    async def run(self, source, engine='tree', optimize=False, values=(), on_output=None, limits=None):
+        """Выполняет программу на сервере; on_output получает списки строк вывода."""
+        request = {'source': source, 'engine': engine, 'optimize': optimize, 'input': list(values)}
+        if limits:
+            request['limits'] = limits
+        self.writer.write(json.dumps(request, ensure_ascii=False).encode() + b'\n')
+        await self.writer.drain()
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("Сервер закрыл соединение.")
+            message = json.loads(line)
+            if message.get('done'):
+                return message
+            if on_output is not None:
+                on_output(message['output'])
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def print_lines(lines):
+    sys.stdout.write(''.join(f"{line}\n" for line in lines))
+
+
+async def run_file(args):
+    try:
+        with open(args.filename, 'r') as file:
+            source = file.read()
+    except FileNotFoundError:
+        print(f"Файл {args.filename} не найден.")
+        return
+    async with Client(args.address) as client:
+        result = await client.run(source, args.engine, args.optimize, args.input, print_lines,
+                                  limits_from_args(args))
+    if result['ok']:
+        print("\nТаблица символов после выполнения:")
+        print("Идентификаторы:", result['identifiers'])
+        print("Константы:", result['constants'])
+    elif result['error']['type'] == 'LexerError':
+        print("Ошибки при лексическом анализе:")
+        for error in result['error']['errors']:
+            print(error)
+    else:
+        print(f"Ошибка: {result['error']['message']}")
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Клиент сервера интерпретатора")
+    arg_parser.add_argument('filename', nargs='?', default='source.txt')
+    arg_parser.add_argument('--address', default=DEFAULT_ADDRESS, help="хост:порт или unix:/путь")
+    arg_parser.add_argument('--engine', default='tree')
+    arg_parser.add_argument('-O', '--optimize', action='store_true')
+    arg_parser.add_argument('--input', type=int, nargs='*', default=[], help="значения для READ")
+    arg_parser.add_argument('--max-steps', type=int, help="ограничение на число итераций циклов")
+    arg_parser.add_argument('--timeout', type=float, help="ограничение времени выполнения в секундах")
+    arg_parser.add_argument('--max-bits', type=int, help="ограничение на размер произведений в битах")
+    return arg_parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_file(parse_args()))
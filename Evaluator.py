@@ -0,0 +1,135 @@
+# Интерпретатор AST: выполняет программу, не обращаясь к лексемам
+from Ast import (
+    Assign,
+    BinOp,
+    ClosedFor,
+    Const,
+    For,
+    Read,
+    Shared,
+    SharedRef,
+    UnaryOp,
+    Var,
+    VectorFor,
+    Write,
+    reduce_expression,
+)
+from Loops import execute_closed_for
+from Vector import execute_vector_for
+
+
+class Evaluator:
+    """Обходит AST с разрешёнными слотами; значения переменных лежат в context.values."""
+
+    def __init__(self, context):
+        self.context = context
+        self.values = context.values
+        self.output = context.output
+        self.reader = context.reader
+        self.budget = context.budget  # Нужен здесь только для ClosedFor, остальное проверяет LimitedEvaluator
+        self.shared = {}  # Значения общих подвыражений текущего оператора
+
+    def run(self, program):
+        self.exec_block(program.body)
+
+    def exec_block(self, statements):
+        for statement in statements:
+            self.exec_statement(statement)
+
+    def exec_statement(self, node):
+        node_type = type(node)
+        if node_type is Assign:
+            self.values[node.slot] = self.eval(node.value)
+        elif node_type is Write:
+            self.output.write(self.eval(node.value))
+        elif node_type is For:
+            self.exec_for(node)
+        elif node_type is ClosedFor:
+            execute_closed_for(node, self.eval, self.values, self.budget)
+        elif node_type is VectorFor:
+            execute_vector_for(node, self)
+        elif node_type is Read:
+            if self.reader.interactive:
+                self.output.flush()  # Приглашение к вводу должно идти после уже выведенного
+            self.values[node.slot] = self.reader.read(node.name)
+        else:
+            raise SyntaxError(f"Неожиданное выражение: {node}")
+
+    def exec_for(self, node):
+        start_value = self.eval(node.start)
+        end_value = self.eval(node.end)
+        values = self.values
+        loop_slot = node.slot
+        body = node.body
+        for i in range(start_value, end_value + 1):
+            values[loop_slot] = i
+            for statement in body:
+                self.exec_statement(statement)
+
+    def eval(self, node):
+        node_type = type(node)
+        if node_type is Const:
+            return node.value
+        if node_type is Var:
+            return self.values[node.slot]
+        if node_type is BinOp:
+            try:
+                left_value = self.eval(node.left)
+                right_value = self.eval(node.right)
+            except RecursionError:
+                # Слишком длинная цепочка операций: выражение вычисляется заново без рекурсии.
+                # До этого места оно ничего не изменило, кроме ячеек общих подвыражений
+                return self.eval_deep(node)
+            operator = node.op
+            if operator == '+':
+                return left_value + right_value
+            if operator == '-':
+                return left_value - right_value
+            if operator == '*':
+                return left_value * right_value
+            if right_value == 0:
+                raise ZeroDivisionError("Ошибка: деление на ноль.")
+            return left_value // right_value
+        if node_type is UnaryOp:
+            try:
+                return -self.eval(node.operand)
+            except RecursionError:
+                return self.eval_deep(node)
+        if node_type is SharedRef:
+            return self.shared[node.cell]
+        if node_type is Shared:
+            value = self.shared[node.cell] = self.eval(node.value)
+            return value
+        raise SyntaxError(f"Неправильное выражение: {node}")
+
+    def eval_deep(self, node):
+        """Вычисляет выражение по явному стеку: медленнее eval, но для любой глубины."""
+        return reduce_expression(node, self.eval_node)
+
+    def eval_node(self, node, *operands):
+        node_type = type(node)
+        if node_type is Const:
+            return node.value
+        if node_type is Var:
+            return self.values[node.slot]
+        if node_type is BinOp:
+            return self.binary(node.op, *operands)
+        if node_type is UnaryOp:
+            return -operands[0]
+        if node_type is SharedRef:
+            return self.shared[node.cell]
+        if node_type is Shared:
+            value = self.shared[node.cell] = operands[0]
+            return value
+        raise SyntaxError(f"Неправильное выражение: {node}")
+
+    def binary(self, operator, left_value, right_value):
+        if operator == '+':
+            return left_value + right_value
+        if operator == '-':
+            return left_value - right_value
+        if operator == '*':
+            return left_value * right_value
+        if right_value == 0:
+            raise ZeroDivisionError("Ошибка: деление на ноль.")
+        return left_value // right_value
@@ -0,0 +1,305 @@
+# Инкрементальный анализ редактируемого текста для интеграции с редактором.
+#
+# Лексемы хранятся по строкам (лексема никогда не переходит на другую строку),
+# поэтому правка заново разбирает на лексемы только затронутые строки.
+# Операторы основного блока BEGIN ... END хранятся вместе с позициями; после
+# правки заново разбираются только операторы, задевающие изменённые строки,
+# пока разбор не выйдет на начало уже известного оператора или на END.
+# Пока в участке есть синтаксическая ошибка, его операторы заменены заглушкой,
+# а следующие правки расширяют этот участок. Правка объявлений VAR, строк
+# BEGIN или END и изменение вложенности блоков приводят к полному разбору
+# (лексемы при этом по-прежнему берутся готовые).
+import bisect
+
+from Ast import AstBuilder, Assign, For, Program, Read, Write
+from Interpeter import TOKEN_PATTERN, Lexer, new_symbol_table
+
+
+class Diagnostic:
+    def __init__(self, line, column, message):
+        self.line = line
+        self.column = column
+        self.message = message
+
+    def __repr__(self):
+        return f"Diagnostic({self.line}, {self.column}, {self.message!r})"
+
+    def __str__(self):
+        return f"строка {self.line}, столбец {self.column}: {self.message}"
+
+
+class StatementRecord:
+    __slots__ = ('node', 'line', 'column', 'last_line', 'node_line')
+
+    def __init__(self, node, line, column, last_line):
+        self.node = node
+        self.line = line  # Позиция первой лексемы оператора
+        self.column = column
+        self.last_line = last_line  # Строка последней лексемы (включая ';')
+        self.node_line = line  # Строка, на которой стоял оператор, когда строился node
+
+
+def positioned_tokens(line_tokens, line, column):
+    """Лексемы (тип, значение, строка, столбец) документа начиная с позиции (line, column)."""
+    if line > len(line_tokens):
+        return
+    tokens = line_tokens[line - 1]
+    index = bisect.bisect_left(tokens, column, key=lambda token: token[2])
+    for token_type, value, token_column in tokens[index:]:
+        yield token_type, value, line, token_column
+    for line in range(line + 1, len(line_tokens) + 1):
+        for token_type, value, token_column in line_tokens[line - 1]:
+            yield token_type, value, line, token_column
+
+
+def relocate(node, delta):
+    """Копия оператора со сдвинутыми на delta номерами строк."""
+    node_type = type(node)
+    line = node.line + delta
+    if node_type is Assign:
+        return Assign(node.name, node.value, node.slot, line)
+    if node_type is Write:
+        return Write(node.value, line)
+    if node_type is Read:
+        return Read(node.name, node.slot, line)
+    return For(node.var, node.start, node.end, tuple(relocate(statement, delta) for statement in node.body),
+               node.slot, line)
+
+
+class Document:
+    """Текст программы, который можно править по частям, с готовыми AST и диагностикой."""
+
+    def __init__(self, source=''):
+        self.lines = source.split('\n')
+        self.line_tokens = []
+        self.line_errors = []
+        self._lexer = Lexer('')  # Нужен только для классификации лексем
+        self._known = {}  # Лексема -> тип, как в Lexer.tokenize
+        for line in self.lines:
+            tokens, errors = self.lex_line(line)
+            self.line_tokens.append(tokens)
+            self.line_errors.append(errors)
+        self.relexed_lines = len(self.lines)
+        self.reparsed_statements = 0
+        self.begin_position = self.end_position = (0, 0)
+        self.parse_full()
+
+    @property
+    def text(self):
+        return '\n'.join(self.lines)
+
+    def lex_line(self, line):
+        """Лексемы строки (тип, значение, столбец) и ошибки (столбец, сообщение)."""
+        lexer = self._lexer
+        known = self._known
+        tokens = []
+        errors = []
+        for match in TOKEN_PATTERN.finditer(line):
+            raw_token = match[match.lastindex]
+            column = match.start(match.lastindex) + 1
+            token_type = known.get(raw_token)
+            if token_type is None:
+                token_type = lexer.classify(match)
+                if token_type is None:
+                    errors.extend((column, message) for message in lexer.errors)
+                    lexer.errors.clear()
+                    continue
+                known[raw_token] = token_type
+            tokens.append((token_type, raw_token, column))
+        return tokens, errors
+
+    def edit(self, start, end, text):
+        """Заменяет текст между позициями start и end (строка, столбец; с 1, end не включается)."""
+        start_line, start_column = start
+        end_line, end_column = end
+        first = start_line - 1
+        last = end_line - 1
+        replaced = self.lines[first][:start_column - 1] + text + self.lines[last][end_column - 1:]
+        new_lines = replaced.split('\n')
+        lexed = [self.lex_line(line) for line in new_lines]
+        self.lines[first:last + 1] = new_lines
+        self.line_tokens[first:last + 1] = [tokens for tokens, _ in lexed]
+        self.line_errors[first:last + 1] = [errors for _, errors in lexed]
+        self.relexed_lines = len(new_lines)
+        self.reparsed_statements = 0
+
+        if self.records is None or start_line <= self.begin_position[0] or end_line >= self.end_position[0]:
+            self.parse_full()
+            return
+        # Операторы, начинавшиеся в заменённых строках, устарели, а операторы
+        # после правки сдвигаются вместе с текстом
+        delta = len(new_lines) - (last - first + 1)
+        new_end_line = start_line + len(new_lines) - 1
+        records = self.records
+        stale = bisect.bisect_left(records, start_line, key=lambda record: record.line)
+        following = bisect.bisect_right(records, end_line, key=lambda record: record.line)
+        if delta:
+            for record in records[following:]:
+                record.line += delta
+                record.last_line += delta
+            self.end_position = (self.end_position[0] + delta, self.end_position[1])
+        del records[stale:following]
+        self.dirty = self.merge_dirty(start_line, end_line, new_end_line, delta)
+        if not self.parse_region(*self.dirty):
+            self.parse_full()
+
+    def merge_dirty(self, start_line, end_line, new_end_line, delta):
+        """Объединяет строки новой правки с ещё не разобранными строками прошлых правок."""
+        if self.dirty is None:
+            return start_line, new_end_line
+
+        def moved(line, inside):
+            if line < start_line:
+                return line
+            return line + delta if line > end_line else inside
+
+        dirty_start, dirty_end = self.dirty
+        return (min(moved(dirty_start, start_line), start_line),
+                max(moved(dirty_end, new_end_line), new_end_line))
+
+    # Разбор
+
+    def parse_full(self):
+        self.records = None
+        self.dirty = None
+        self.program_node = None
+        self.parse_error = None
+        builder = AstBuilder(positioned_tokens(self.line_tokens, 1, 1))
+        try:
+            if not builder.current_token:
+                raise ValueError("Нет токенов для анализа.")
+            declarations = []
+            while builder.current_token and builder.current_token[1] == 'VAR':
+                declarations.append(builder.parse_variable_declaration())
+            if builder.current_token:
+                self.begin_position = builder.current_token[2:4]
+            builder.expect('KEYWORD', 'BEGIN')
+            records = []
+            while builder.current_token and builder.current_token[1] != 'END':
+                records.append(self.parse_record(builder))
+            if not builder.current_token:
+                raise SyntaxError("Программа завершена без ключевого слова END.")
+            self.end_position = builder.current_token[2:4]
+            builder.expect('KEYWORD', 'END')
+            if builder.current_token:
+                raise SyntaxError("Код после закрытия блока END недопустим.")
+        except (SyntaxError, ValueError, NameError) as e:
+            self.parse_error = self.diagnostic(builder, e)
+            return
+        self.declarations = tuple(declarations)
+        self.records = records
+        self.reparsed_statements = len(records)
+
+    def parse_record(self, builder):
+        _, _, line, column = builder.current_token
+        node = builder.parse_statement()
+        if builder.current_token and builder.current_token[1] == ';':
+            builder.expect('OPERATOR', ';')
+        return StatementRecord(node, line, column, self.previous_token_line(builder.current_token))
+
+    def previous_token_line(self, token):
+        """Строка лексемы, стоящей перед token (перед концом текста, если token — None)."""
+        if token is None:
+            line = len(self.lines) + 1
+        else:
+            line = token[2]
+            if self.line_tokens[line - 1][0][2] < token[3]:
+                return line
+        line -= 1
+        while not self.line_tokens[line - 1]:
+            line -= 1
+        return line
+
+    def parse_region(self, start_line, end_line):
+        """Разбирает заново операторы, задевающие строки start_line..end_line; False — нужен полный разбор."""
+        records = self.records
+        # Начинаем с оператора, который целиком выше правки: правка в начале
+        # строки может продолжить его выражение
+        first = bisect.bisect_left(records, start_line, key=lambda record: record.last_line)
+        while first > 0 and (first == len(records) or records[first].line >= start_line):
+            first -= 1
+        if records and records[first].line < start_line:
+            position = (records[first].line, records[first].column)
+        else:
+            first = 0
+            position = (self.begin_position[0], self.begin_position[1] + 1)
+        following = bisect.bisect_right(records, end_line, key=lambda record: record.line)
+
+        builder = AstBuilder(positioned_tokens(self.line_tokens, *position))
+        anchor = builder.current_token
+        if anchor is None:
+            return False
+        parsed = []
+        resync = following
+        try:
+            while True:
+                token = builder.current_token
+                if token is None:
+                    raise SyntaxError("Программа завершена без ключевого слова END.")
+                position = token[2:4]
+                if position[0] > end_line:
+                    while resync < len(records) and (records[resync].line, records[resync].column) < position:
+                        resync += 1
+                    if resync < len(records) and (records[resync].line, records[resync].column) == position:
+                        break
+                if token[1] == 'END':
+                    if position != self.end_position:
+                        return False  # Изменилась вложенность блоков
+                    resync = len(records)
+                    break
+                parsed.append(self.parse_record(builder))
+        except (SyntaxError, ValueError, NameError) as e:
+            # Устаревшие операторы участка заменяются заглушкой до следующей правки
+            self.parse_error = self.diagnostic(builder, e)
+            records[first:following] = [StatementRecord(None, anchor[2], anchor[3], end_line)]
+            self.program_node = None
+            return True
+        records[first:resync] = parsed
+        self.dirty = None
+        self.parse_error = None
+        self.program_node = None
+        self.reparsed_statements = len(parsed)
+        return True
+
+    def diagnostic(self, builder, error):
+        token = builder.current_token
+        if token is not None:
+            return Diagnostic(token[2], token[3], str(error))
+        return Diagnostic(len(self.lines), len(self.lines[-1]) + 1, str(error))
+
+    # Результаты
+
+    @property
+    def program(self):
+        """AST программы или None, если в тексте синтаксическая ошибка."""
+        if self.records is None or self.parse_error is not None:
+            return None
+        if self.program_node is None:
+            for record in self.records:
+                if record.line != record.node_line:
+                    record.node = relocate(record.node, record.line - record.node_line)
+                    record.node_line = record.line
+            self.program_node = Program(self.declarations, tuple(record.node for record in self.records))
+        return self.program_node
+
+    @property
+    def diagnostics(self):
+        result = [
+            Diagnostic(number, column, message)
+            for number, errors in enumerate(self.line_errors, 1) if errors
+            for column, message in errors
+        ]
+        if self.parse_error is not None:
+            result.append(self.parse_error)
+        return result
+
+    def symbol_table(self):
+        """Таблица символов, которую построил бы Lexer по всему тексту."""
+        symbol_table = new_symbol_table()
+        for tokens in self.line_tokens:
+            for token_type, value, _ in tokens:
+                if token_type == 'IDENTIFIER':
+                    symbol_table['identifiers'].setdefault(value, None)
+                elif token_type == 'CONSTANT':
+                    symbol_table['constants'].setdefault(value, int(value))
+        return symbol_table
@@ -0,0 +1,103 @@
+# Источники значений для оператора READ. Интерактивный источник спрашивает
+# каждое значение с приглашением, остальные читают готовые целые числа без
+# приглашений: из потока крупными блоками или из списка.
+
+
+class InputError(ValueError):
+    pass
+
+
+class PromptReader:
+    """Поведение по умолчанию: одно значение на строку стандартного ввода с приглашением."""
+
+    interactive = True
+
+    def read(self, name):
+        return int(input(f"Введите значение для {name}: "))
+
+    def close(self):
+        pass
+
+
+class StreamReader:
+    """Читает целые числа, разделённые пробельными символами, блоками по chunk_size символов."""
+
+    interactive = False
+
+    def __init__(self, stream, chunk_size=1 << 20):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.tokens = []
+        self.position = 0
+        self.tail = ''  # Незавершённое число в конце прочитанного блока
+        self.count = 0  # Сколько значений уже прочитано
+
+    def read(self, name):
+        if self.position == len(self.tokens):
+            self.fill(name)
+        token = self.tokens[self.position]
+        self.position += 1
+        self.count += 1
+        try:
+            return int(token)
+        except ValueError:
+            raise InputError(f"Некорректное значение '{token}' для {name} "
+                             f"(значение №{self.count}).") from None
+
+    def fill(self, name):
+        tokens = []
+        while not tokens:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                tokens = self.tail.split()
+                self.tail = ''
+                if not tokens:
+                    raise InputError(f"Входные данные закончились при чтении {name} "
+                                     f"(прочитано значений: {self.count}).")
+                break
+            data = self.tail + chunk
+            tokens = data.split()
+            self.tail = tokens.pop() if tokens and not data[-1].isspace() else ''
+        self.tokens = tokens
+        self.position = 0
+
+    def close(self):
+        pass  # Чужой поток (например, sys.stdin) закрывает его владелец
+
+
+class FileReader(StreamReader):
+    def __init__(self, filename, chunk_size=1 << 20):
+        try:
+            stream = open(filename, 'r')
+        except FileNotFoundError:
+            raise ValueError(f"Файл {filename} не найден.")
+        super().__init__(stream, chunk_size)
+
+    def close(self):
+        self.stream.close()
+
+
+class ListReader:
+    """Берёт значения из списка или любого итератора — для встраивания интерпретатора."""
+
+    interactive = False
+
+    def __init__(self, values):
+        self.values = iter(values)
+        self.count = 0
+
+    def read(self, name):
+        try:
+            value = next(self.values)
+        except StopIteration:
+            raise InputError(f"Входные данные закончились при чтении {name} "
+                             f"(прочитано значений: {self.count}).") from None
+        self.count += 1
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise InputError(f"Некорректное значение '{value}' для {name} "
+                             f"(значение №{self.count}).") from None
+
+    def close(self):
+        pass
@@ -1,5 +1,22 @@
 # Типы лексем
+import argparse
+import io
+import mmap
+import operator
+import os
 import re
+import sys
+
+from Ast import NEGATION, OPEN_PAREN, PRECEDENCE, AstBuilder, SlotResolver
+from Bytecode import Compiler, disassemble
+from Evaluator import Evaluator
+from Input import FileReader, PromptReader, StreamReader
+from Limits import Budget, LimitedEvaluator
+from Optimizer import Optimizer
+from Output import FileSink, NullSink, StreamSink
+from Profiler import Profiler, ProfilingEvaluator
+from Transpiler import transpile
+from VM import VM
 
 TOKEN_TYPES = {
     'KEYWORD': ['VAR', 'BEGIN', 'END', 'FOR', 'TO', 'READ', 'WRITE', 'DO'],
@@ -8,18 +25,118 @@ TOKEN_TYPES = {
     'CONSTANT': r'^\d+$'
 }
 
-# Таблица символов
-symbol_table = {
-    'identifiers': {},
-    'constants': {}
-}
+KEYWORDS = frozenset(TOKEN_TYPES['KEYWORD'])
+OPERATORS = frozenset(TOKEN_TYPES['OPERATOR'])
+MAX_IDENTIFIER_LENGTH = 10
+
+# Единое выражение для всех лексем: тип определяется именем сработавшей группы.
+# Ключевые слова сначала распознаются как идентификаторы и уточняются по KEYWORDS,
+# слишком длинные имена и посторонние символы попадают в отдельные группы.
+TOKEN_PATTERN = re.compile(rf'''\s*(?:
+    (?P<IDENTIFIER>[A-Za-z_][A-Za-z0-9_]{{0,{MAX_IDENTIFIER_LENGTH - 1}}}(?!\w))
+  | (?P<OPERATOR>[{re.escape(''.join(TOKEN_TYPES['OPERATOR']))}])
+  | (?P<CONSTANT>\d+(?!\w))
+  | (?P<LONG_IDENTIFIER>[A-Za-z_][A-Za-z0-9_]*(?!\w))
+  | (?P<UNKNOWN>\w+|\S)
+)''', re.VERBOSE)
+
+
+def new_symbol_table():
+    """Пустая таблица символов; у каждого лексера и запуска она своя."""
+    return {
+        'identifiers': {},
+        'constants': {}
+    }
+
+
+class LexerError(ValueError):
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+BEGIN_TOKEN = ('KEYWORD', 'BEGIN')
+END_TOKEN = ('KEYWORD', 'END')
+BLOCK_TOKENS = {'BEGIN': BEGIN_TOKEN, 'END': END_TOKEN}
+
+
+class BlockError(SyntaxError):
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def text_positions(text, offsets, first_line=1):
+    """Пары (строка, столбец) для возрастающих смещений offsets в text за один проход по тексту."""
+    positions = []
+    line = first_line
+    line_start = 0
+    scanned = 0
+    for offset in offsets:
+        newlines = text.count('\n', scanned, offset)
+        if newlines:
+            line += newlines
+            line_start = text.rfind('\n', scanned, offset) + 1
+        scanned = offset
+        positions.append((line, offset - line_start + 1))
+    return positions
+
+
+class BlockTable:
+    """Пары BEGIN и END, найденные за один проход по лексемам.
+
+    ends[i] — индекс лексемы END, закрывающей BEGIN с индексом i; errors —
+    сообщения о несбалансированных блоках. Позиция лексемы — (строка, столбец)
+    или None, тогда в сообщении указывается её номер.
+    """
+
+    def __init__(self):
+        self.ends = {}
+        self.errors = []
+        self._opened = []  # (индекс, позиция) ещё не закрытых BEGIN
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """Таблица для готового списка лексем; позиции берутся из лексем Lexer.iter_tokens."""
+        table = cls()
+        for index, token in enumerate(tokens):
+            if token[0] == 'KEYWORD' and (token[1] == 'BEGIN' or token[1] == 'END'):
+                table.add(token[1] == 'BEGIN', index, token[2:4] if len(token) > 3 else None)
+        return table.finish()
+
+    def add(self, opens, index, position):
+        if opens:
+            self._opened.append((index, position))
+        elif self._opened:
+            self.ends[self._opened.pop()[0]] = index
+        else:
+            self.errors.append(
+                f"Ключевое слово END{self.describe(index, position)} не закрывает ни одного блока BEGIN.")
+
+    def finish(self):
+        for index, position in self._opened:
+            self.errors.append(f"Блок BEGIN{self.describe(index, position)} не закрыт ключевым словом END.")
+        self._opened = []
+        return self
+
+    @staticmethod
+    def describe(index, position):
+        if position is None:
+            return f" (лексема {index + 1})"
+        return f" (строка {position[0]}, столбец {position[1]})"
+
+    def check(self):
+        if self.errors:
+            raise BlockError(self.errors)
 
 
 class Lexer:
-    def __init__(self, source):
+    def __init__(self, source, symbol_table=None):
         self.source = source
         self.tokens = []
         self.errors = []
+        self.symbol_table = symbol_table if symbol_table is not None else new_symbol_table()
+        self.blocks = None  # BlockTable, которую строит tokenize
 
     @classmethod
     def from_file(cls, filename):
@@ -31,63 +148,149 @@ class Lexer:
         except FileNotFoundError:
             raise ValueError(f"Файл {filename} не найден.")
 
+    @classmethod
+    def map_file(cls, filename):
+        """Создает объект Lexer, который читает файл через mmap, не загружая его целиком."""
+        try:
+            with open(filename, 'rb') as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return cls(b'')  # Пустой файл отобразить в память нельзя
+                return cls(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            raise ValueError(f"Файл {filename} не найден.")
+
+    def close(self):
+        if isinstance(self.source, mmap.mmap):
+            self.source.close()
+
     def tokenize(self):
-        pattern = r'(\bVAR\b|\bBEGIN\b|\bEND\b|\bFOR\b|\bTO\b|\bREAD\b|\bWRITE\b|\bDO\b|[+\-*/=(),;:]|\b\d+\b|\b[a-zA-Z_][a-zA-Z0-9_]*\b)'
-        raw_tokens = re.findall(pattern, self.source)
-
-        for raw_token in raw_tokens:
-            token_type = self.identify_token_type(raw_token)
-            if token_type:
-                if token_type == 'IDENTIFIER' and len(raw_token) > 10:
-                    self.errors.append(f"Имя переменной '{raw_token}' превышает допустимую длину (10 символов).")
+        tokens = self.tokens
+        append = tokens.append
+        known = {}  # Лексема -> готовый кортеж: повторные лексемы не классифицируются заново
+        marks = []  # (индекс, смещение в тексте) лексем BEGIN и END
+
+        for match in TOKEN_PATTERN.finditer(self.source):
+            raw_token = match[match.lastindex]
+            token = known.get(raw_token)
+            if token is None:
+                # BEGIN и END в known не попадают, и частые лексемы не проверяются лишний раз
+                token = BLOCK_TOKENS.get(raw_token)
+                if token is not None:
+                    marks.append((len(tokens), match.start(match.lastindex)))
                 else:
-                    self.tokens.append((token_type, raw_token))
-                    self.add_to_symbol_table(token_type, raw_token)
-            else:
-                self.errors.append(f"Неизвестный токен: {raw_token}")
-
+                    token_type = self.classify(match)
+                    if token_type is None:
+                        continue
+                    token = known[raw_token] = (token_type, raw_token)
+            append(token)
+
+        self.blocks = BlockTable()
+        positions = text_positions(self.source, [offset for _, offset in marks])
+        for (index, _), position in zip(marks, positions):
+            self.blocks.add(tokens[index] is BEGIN_TOKEN, index, position)
+        self.blocks.finish()
         return self.tokens if not self.errors else self.errors
 
-    def identify_token_type(self, token):
-        if token in TOKEN_TYPES['KEYWORD']:
-            return 'KEYWORD'
-        if token in TOKEN_TYPES['OPERATOR']:
-            return 'OPERATOR'
-        if re.match(TOKEN_TYPES['IDENTIFIER'], token):
-            return 'IDENTIFIER'
-        if re.match(TOKEN_TYPES['CONSTANT'], token):
-            return 'CONSTANT'
-        return None
+    def iter_tokens(self):
+        """Лениво выдаёт лексемы (тип, значение, строка, столбец), читая источник построчно.
+
+        Таблица блоков (blocks) заполняется по ходу и готова, когда лексемы кончились.
+        """
+        known = {}
+        blocks = self.blocks = BlockTable()
+        index = 0
+        for line_number, line in enumerate(self.iter_lines(), 1):
+            if isinstance(line, bytes):
+                line = line.decode()
+            for match in TOKEN_PATTERN.finditer(line):
+                raw_token = match[match.lastindex]
+                column = match.start(match.lastindex) + 1
+                token_type = known.get(raw_token)
+                if token_type is None:
+                    if raw_token in BLOCK_TOKENS:
+                        # Как и в tokenize, BEGIN и END не запоминаются в known
+                        blocks.add(raw_token == 'BEGIN', index, (line_number, column))
+                        token_type = 'KEYWORD'
+                    else:
+                        token_type = self.classify(match, f" (строка {line_number}, столбец {column})")
+                        if token_type is None:
+                            continue
+                        known[raw_token] = token_type
+                index += 1
+                yield token_type, raw_token, line_number, column
+        blocks.finish()
+
+    def iter_lines(self):
+        source = self.source
+        if isinstance(source, str):
+            return io.StringIO(source)
+        if isinstance(source, bytes):
+            return io.BytesIO(source)
+        if isinstance(source, mmap.mmap):
+            source.seek(0)
+            return iter(source.readline, b'')
+        return source  # Любой текстовый поток
+
+    def classify(self, match, position=''):
+        """Тип лексемы по сработавшей группе TOKEN_PATTERN; при ошибке возвращает None."""
+        token_type = match.lastgroup
+        raw_token = match[token_type]
+        if token_type == 'IDENTIFIER':
+            if raw_token in KEYWORDS:
+                return 'KEYWORD'
+        elif token_type == 'LONG_IDENTIFIER':
+            self.errors.append(
+                f"Имя переменной '{raw_token}' превышает допустимую длину ({MAX_IDENTIFIER_LENGTH} символов).{position}")
+            return None
+        elif token_type == 'UNKNOWN':
+            self.errors.append(f"Неизвестный токен: {raw_token}{position}")
+            return None
+        self.add_to_symbol_table(token_type, raw_token)
+        return token_type
 
     def add_to_symbol_table(self, token_type, token):
         if token_type == 'IDENTIFIER':
-            if token not in symbol_table['identifiers']:
-                symbol_table['identifiers'][token] = None
+            if token not in self.symbol_table['identifiers']:
+                self.symbol_table['identifiers'][token] = None
         elif token_type == 'CONSTANT':
-            if token not in symbol_table['constants']:
-                symbol_table['constants'][token] = int(token)
+            if token not in self.symbol_table['constants']:
+                self.symbol_table['constants'][token] = int(token)
+
+
+def floor_division(left, right):
+    if right == 0:
+        raise ZeroDivisionError("Ошибка: деление на ноль.")
+    return left // right
+
+
+# Бинарные операции выражений при непосредственном вычислении (Parser)
+BINARY_OPERATIONS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': floor_division}
 
 
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, symbol_table=None, output=None, reader=None, blocks=None):
         self.tokens = tokens
+        self.symbol_table = symbol_table if symbol_table is not None else new_symbol_table()
+        self.output = output if output is not None else StreamSink()
+        self.reader = reader if reader is not None else PromptReader()
         self.current_token_index = 0
         self.current_token = tokens[self.current_token_index] if tokens else None
-        self.block_depth = 0  # Счётчик вложенных BEGIN/END
+        # Пары BEGIN/END (Lexer.blocks): тело блока пропускается переходом к его END
+        self.blocks = blocks if blocks is not None else BlockTable.from_tokens(tokens)
 
     def parse(self):
         if not self.current_token:
             raise ValueError("Нет токенов для анализа.")
+        # Несбалансированные блоки обнаруживаются до выполнения первого оператора
+        self.blocks.check()
 
-        while self.current_token and self.current_token[1] == 'VAR':
-            self.parse_variable_declaration()
-
-        self.parse_program()
+        try:
+            while self.current_token and self.current_token[1] == 'VAR':
+                self.parse_variable_declaration()
 
-        if self.block_depth > 0:
-            raise SyntaxError("Программа завершена без закрытия всех блоков BEGIN/END.")
-        elif self.block_depth < 0:
-            raise SyntaxError("Обнаружено больше ключевых слов END, чем BEGIN.")
+            self.parse_program()
+        finally:
+            self.output.flush()
 
     def parse_variable_declaration(self):
         self.expect('KEYWORD', 'VAR')
@@ -103,26 +306,34 @@ class Parser:
                 break
             else:
                 raise SyntaxError("Ошибка в объявлении переменных. Ожидалось ',' или ':'.")
-            symbol_table['identifiers'][var_name] = 0
+            self.symbol_table['identifiers'][var_name] = 0
 
     def parse_program(self):
+        end_index = self.parse_block_start()
+        self.parse_block(end_index)
+        self.expect('KEYWORD', 'END')
+
+        # Если после `END` остались токены, это ошибка
+        if self.current_token:
+            raise SyntaxError("Код после закрытия блока END недопустим.")
+
+    def parse_block_start(self):
+        """Разбирает BEGIN и возвращает индекс закрывающего его END."""
+        begin_index = self.current_token_index
         self.expect('KEYWORD', 'BEGIN')
-        self.block_depth += 1  # Увеличиваем глубину блока
+        return self.blocks.ends[begin_index]
 
-        while self.current_token and self.current_token[1] != 'END':
+    def parse_block(self, end_index):
+        while self.current_token_index < end_index:
             self.parse_statement()
             if self.current_token and self.current_token[1] == ';':
                 self.expect('OPERATOR', ';')
+        if self.current_token_index != end_index:
+            raise SyntaxError("Ожидалось ключевое слово END для завершения блока.")
 
-        if not self.current_token:
-            raise SyntaxError("Программа завершена без ключевого слова END.")
-
-        self.expect('KEYWORD', 'END')
-        self.block_depth -= 1  # Уменьшаем глубину блока
-
-        # Если после `END` остались токены, это ошибка
-        if self.current_token:
-            raise SyntaxError("Код после закрытия блока END недопустим.")
+    def jump(self, index):
+        self.current_token_index = index
+        self.current_token = self.tokens[index] if index < len(self.tokens) else None
 
     def parse_statement(self):
         if self.current_token[0] == 'IDENTIFIER':
@@ -138,12 +349,12 @@ class Parser:
 
     def parse_assignment(self):
         identifier = self.current_token[1]
-        if identifier not in symbol_table['identifiers']:
+        if identifier not in self.symbol_table['identifiers']:
             raise NameError(f"Переменная '{identifier}' не объявлена.")
         self.expect('IDENTIFIER')
         self.expect('OPERATOR', '=')
         value = self.parse_expression()
-        symbol_table['identifiers'][identifier] = value
+        self.symbol_table['identifiers'][identifier] = value
 
     def parse_for_loop(self):
         self.expect('KEYWORD', 'FOR')
@@ -156,35 +367,28 @@ class Parser:
         self.expect('KEYWORD', 'TO')
         end_value = self.parse_expression()
         self.expect('KEYWORD', 'DO')
-        self.expect('KEYWORD', 'BEGIN')
-
-        saved_index = self.current_token_index
-        self.block_depth += 1  # Увеличиваем вложенность блока
+        end_index = self.parse_block_start()
+        body_index = self.current_token_index
 
         for i in range(start_value, end_value + 1):
-            symbol_table['identifiers'][loop_var] = i
-            self.current_token_index = saved_index
-            self.current_token = self.tokens[self.current_token_index]
-
-            while self.current_token and self.current_token[1] != 'END':
-                self.parse_statement()
-                if self.current_token and self.current_token[1] == ';':
-                    self.expect('OPERATOR', ';')
-
-        if not self.current_token or self.current_token[1] != 'END':
-            raise SyntaxError("Ожидалось ключевое слово END для завершения цикла FOR.")
+            self.symbol_table['identifiers'][loop_var] = i
+            self.jump(body_index)
+            self.parse_block(end_index)
 
+        # Тело цикла без итераций не разбирается: сразу переходим к его END
+        self.jump(end_index)
         self.expect('KEYWORD', 'END')
-        self.block_depth -= 1  # Уменьшаем вложенность блока
 
     def parse_read(self):
         self.expect('KEYWORD', 'READ')
         if self.current_token[0] == 'IDENTIFIER':
             var_name = self.current_token[1]
             self.expect('IDENTIFIER')
-            if var_name in symbol_table['identifiers']:
-                value = int(input(f"Введите значение для {var_name}: "))
-                symbol_table['identifiers'][var_name] = value
+            if var_name in self.symbol_table['identifiers']:
+                if self.reader.interactive:
+                    self.output.flush()
+                value = self.reader.read(var_name)
+                self.symbol_table['identifiers'][var_name] = value
             else:
                 raise NameError(f"Переменная '{var_name}' не объявлена.")
         else:
@@ -193,55 +397,82 @@ class Parser:
     def parse_write(self):
         self.expect('KEYWORD', 'WRITE')
         value = self.parse_expression()
-        print(f"OUTPUT: {value}")
+        self.output.write(value)
 
     def parse_expression(self):
-        left_value = self.parse_term()
-        while self.current_token and self.current_token[1] in ('+', '-'):
-            operator = self.current_token[1]
-            self.expect('OPERATOR', operator)
-            right_value = self.parse_term()
-            if operator == '+':
-                left_value += right_value
-            elif operator == '-':
-                left_value -= right_value
-        return left_value
-
-    def parse_term(self):
-        left_value = self.parse_factor()
-        while self.current_token and self.current_token[1] in ('*', '/'):
-            operator = self.current_token[1]
-            self.expect('OPERATOR', operator)
-            right_value = self.parse_factor()
-            if operator == '*':
-                left_value *= right_value
-            elif operator == '/':
-                if right_value == 0:
-                    raise ZeroDivisionError("Ошибка: деление на ноль.")
-                left_value //= right_value
-        return left_value
-
-    def parse_factor(self):
-        if self.current_token[0] == 'CONSTANT':
-            value = int(self.current_token[1])
-            self.expect('CONSTANT')
-            return value
-        elif self.current_token[0] == 'IDENTIFIER':
-            identifier = self.current_token[1]
-            if identifier not in symbol_table['identifiers']:
-                raise NameError(f"Переменная '{identifier}' не объявлена.")
-            self.expect('IDENTIFIER')
-            return symbol_table['identifiers'].get(identifier, 0)
-        elif self.current_token[1] == '(':
-            self.expect('OPERATOR', '(')
-            value = self.parse_expression()
-            self.expect('OPERATOR', ')')
-            return value
-        elif self.current_token[1] == '-':  # Унарный минус
-            self.expect('OPERATOR', '-')
-            return -self.parse_factor()
-        else:
-            raise SyntaxError(f"Неправильное выражение: {self.current_token}")
+        """Вычисляет выражение без рекурсии, как AstBuilder.parse_expression."""
+        tokens = self.tokens
+        count = len(tokens)
+        index = self.current_token_index
+        token = self.current_token
+        identifiers = self.symbol_table['identifiers']
+        constants = self.symbol_table['constants']
+        operations = BINARY_OPERATIONS
+        precedences = PRECEDENCE
+        pending = []  # (приоритет, операция, левый операнд), OPEN_PAREN и NEGATION
+        depth = 0  # Число незакрытых скобок
+        while True:
+            # Операнд с предшествующими унарными минусами и открывающими скобками
+            while True:
+                if token is None:
+                    self.jump(index)
+                    raise SyntaxError("Неожиданный конец программы. Ожидалось выражение.")
+                kind = token[0]
+                if kind == 'CONSTANT':
+                    value = constants.get(token[1])
+                    if value is None:
+                        value = int(token[1])
+                    break
+                if kind == 'IDENTIFIER':
+                    if token[1] not in identifiers:
+                        raise NameError(f"Переменная '{token[1]}' не объявлена.")
+                    value = identifiers[token[1]]
+                    break
+                if token[1] == '(':
+                    pending.append(OPEN_PAREN)
+                    depth += 1
+                elif token[1] == '-':
+                    pending.append(NEGATION)
+                else:
+                    self.jump(index)
+                    raise SyntaxError(f"Неправильное выражение: {token}")
+                index += 1
+                token = tokens[index] if index < count else None
+            index += 1
+            token = tokens[index] if index < count else None
+
+            while pending and pending[-1] is NEGATION:
+                pending.pop()
+                value = -value
+            # Закрывающие скобки: выполняем операции внутри них
+            while depth and token is not None and token[1] == ')':
+                entry = pending.pop()
+                while entry is not OPEN_PAREN:
+                    value = entry[1](entry[2], value)
+                    entry = pending.pop()
+                depth -= 1
+                index += 1
+                token = tokens[index] if index < count else None
+                while pending and pending[-1] is NEGATION:
+                    pending.pop()
+                    value = -value
+
+            precedence = precedences.get(token[1]) if token is not None else None
+            if precedence is None:
+                # Конец выражения: выполняем отложенные операции
+                self.jump(index)
+                while pending:
+                    entry = pending.pop()
+                    if entry is OPEN_PAREN:
+                        self.expect('OPERATOR', ')')
+                    value = entry[1](entry[2], value)
+                return value
+            while pending and pending[-1][0] >= precedence:
+                _, operation, left = pending.pop()
+                value = operation(left, value)
+            pending.append((precedence, operations[token[1]], value))
+            index += 1
+            token = tokens[index] if index < count else None
 
     def expect(self, token_type, token_value=None):
         if self.current_token is None:
@@ -251,10 +482,6 @@ class Parser:
 
         if self.current_token[0] == token_type:
             if token_value is None or self.current_token[1] == token_value:
-                # Если встречается END вне контекста блока
-                if token_value == 'END' and self.block_depth == 0:
-                    raise SyntaxError("Ключевое слово END найдено вне блока BEGIN.")
-
                 self.current_token_index += 1
                 if self.current_token_index < len(self.tokens):
                     self.current_token = self.tokens[self.current_token_index]
@@ -266,25 +493,340 @@ class Parser:
             raise SyntaxError(f"Ожидался тип токена '{token_type}', но получено '{self.current_token[0]}'.")
 
 
-# Загрузка исходного кода из файла
-filename = "source.txt"  # Укажите имя файла с исходным кодом
-try:
-    lexer = Lexer.from_file(filename)
-    tokens_or_errors = lexer.tokenize()
-
-    # Синтаксический анализ и интерпретация
-    if not lexer.errors:
-        parser = Parser(tokens_or_errors)
+class CompiledProgram:
+    """Результат компиляции, общий для любого числа запусков: AST со слотами и таблица имён."""
+
+    def __init__(self, program, names, initial_values, constants, report=(), code=None):
+        self.program = program
+        self.names = names  # Имена переменных по номерам слотов
+        self.initial_values = initial_values
+        self.constants = constants
+        self.report = report  # Отчёт оптимизатора
+        self._code = code  # Байт-код, если он уже есть (например, загружен из файла .tyc)
+        self._python = None
+        self._limited_python = {}  # Проверять ли размер произведений -> PythonCode
+
+    @property
+    def code(self):
+        """Байт-код для VM; компилируется при первом обращении."""
+        if self._code is None:
+            self._code = Compiler(self.names).compile(self.program)
+        return self._code
+
+    @property
+    def python(self):
+        """Программа, переведённая в Python (движок pyc); транслируется при первом обращении."""
+        if self._python is None:
+            self._python = transpile(self.program, self.names)
+        return self._python
+
+    def limited_python(self, check_bits):
+        """Вариант python с проверками ограничений Budget; check_bits — проверять и размер произведений."""
+        if check_bits not in self._limited_python:
+            self._limited_python[check_bits] = transpile(self.program, self.names, limited=True,
+                                                         check_bits=check_bits)
+        return self._limited_python[check_bits]
+
+
+class ExecutionContext:
+    """Состояние одного запуска: собственные значения переменных, разложенные по слотам,
+    приёмник вывода WRITE (по умолчанию буферизованный стандартный вывод) и источник
+    значений READ (по умолчанию стандартный ввод с приглашениями). budget — ограничения
+    выполнения (Limits.Budget) или None, если их нет."""
+
+    def __init__(self, compiled, output=None, reader=None, budget=None):
+        self.compiled = compiled
+        self.values = list(compiled.initial_values)
+        self.output = output if output is not None else StreamSink()
+        self.reader = reader if reader is not None else PromptReader()
+        self.budget = budget
+
+    @property
+    def symbol_table(self):
+        return {
+            'identifiers': dict(zip(self.compiled.names, self.values)),
+            'constants': dict(self.compiled.constants),
+        }
+
+
+class Interpreter:
+    """Компилирует и выполняет программы; не хранит состояния между запусками."""
+
+    def __init__(self, engine='tree', optimize=False):
+        self.engine = engine
+        self.optimize = optimize
+
+    def compile(self, lexer, stream=False):
+        tokens = lexer.iter_tokens() if stream else lexer.tokenize()
+        if lexer.errors:
+            raise LexerError(lexer.errors)
+        try:
+            if not stream and lexer.blocks is not None:
+                # Лексемы получены целиком: несбалансированные блоки видны до разбора
+                lexer.blocks.check()
+            program = AstBuilder(tokens).parse()
+        except Exception:
+            if stream:
+                # При потоковом разборе лексические ошибки и таблица блоков
+                # становятся известны по ходу: дочитываем лексемы до конца
+                for _ in tokens:
+                    pass
+            if lexer.errors:
+                raise LexerError(lexer.errors) from None
+            if lexer.blocks is not None and lexer.blocks.errors:
+                raise BlockError(lexer.blocks.errors) from None
+            raise
+        finally:
+            lexer.close()
+        if lexer.errors:
+            raise LexerError(lexer.errors)
+
+        report = []
+        if self.optimize:
+            optimizer = Optimizer()
+            program = optimizer.optimize(program)
+            report = optimizer.report
+
+        identifiers = lexer.symbol_table['identifiers']
+        resolver = SlotResolver(identifiers)
+        program = resolver.resolve(program)
+        initial_values = [identifiers.get(name) for name in resolver.names]
+        for declaration in program.declarations:
+            # Как и Parser.parse_variable_declaration: имя перед ':' не обнуляется
+            for slot in declaration.slots[:-1]:
+                initial_values[slot] = 0
+        return CompiledProgram(program, resolver.names, initial_values,
+                               dict(lexer.symbol_table['constants']), report)
+
+    def compile_source(self, source):
+        return self.compile(Lexer(source))
+
+    def run(self, compiled, context=None, output=None, reader=None, profiler=None, budget=None, checkpoints=None):
+        """Выполняет программу; с profiler — всегда обходом AST, с замером каждого оператора,
+        с checkpoints (Checkpoint.Checkpointer) — всегда на VM, с записью контрольных точек.
+
+        При превышении ограничений budget выбрасывает Limits.LimitExceeded.
+        """
+        if context is None:
+            context = ExecutionContext(compiled, output, reader, budget)
+        budget = context.budget
+        if budget is not None:
+            if profiler is not None:
+                raise ValueError("Профилирование нельзя сочетать с ограничениями выполнения.")
+            budget.start()
+        if profiler is not None and checkpoints is not None:
+            raise ValueError("Профилирование нельзя сочетать с контрольными точками.")
+        try:
+            if profiler is not None:
+                ProfilingEvaluator(context, profiler).run(compiled.program)
+            elif checkpoints is not None:
+                try:
+                    VM(context).run(compiled.code, checkpoints)
+                except Exception:
+                    # Ошибка программы, а не падение процесса: вывод до неё нужен, как и без точек
+                    checkpoints.abort()
+                    raise
+            elif self.engine == 'vm':
+                VM(context).run(compiled.code)
+            elif self.engine == 'pyc':
+                if budget is None:
+                    compiled.python.run(context)
+                else:
+                    compiled.limited_python(budget.max_bits is not None).run(context)
+            elif budget is not None:
+                LimitedEvaluator(context).run(compiled.program)
+            else:
+                Evaluator(context).run(compiled.program)
+        finally:
+            # Вывод, накопленный до ошибки, не должен потеряться
+            context.output.flush()
+        return context
+
+
+ENGINES = ('tree', 'vm', 'pyc')
+
+# Версия интерпретатора записывается в файлы .tyc (Artifact.py); её нужно менять
+# вместе с AST и байт-кодом, чтобы файлы прежних версий пересобирались
+VERSION = '1.20'
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Интерпретатор учебного языка.")
+    arg_parser.add_argument('filename', nargs='?', default="source.txt",
+                            help="файл с исходным кодом")
+    arg_parser.add_argument('--engine', choices=ENGINES, default='tree',
+                            help="механизм выполнения: обход AST, виртуальная машина или перевод в Python")
+    arg_parser.add_argument('--stream', action='store_true',
+                            help="читать файл через mmap и разбирать лексемы по мере чтения")
+    arg_parser.add_argument('--compact-tokens', action='store_true',
+                            help="хранить лексемы компактно: номер в словаре лексем на каждую (Tokens.py)")
+    arg_parser.add_argument('--lex-jobs', type=int, metavar='N',
+                            help="разбирать лексемы большого файла по кускам в N процессах")
+    arg_parser.add_argument('--compile', action='store_true',
+                            help="скомпилировать программу в файл .tyc рядом с исходным и не выполнять")
+    arg_parser.add_argument('--tyc', action='store_true',
+                            help="брать программу из файла .tyc рядом с исходным, пересобирая устаревший")
+    arg_parser.add_argument('--dis', action='store_true',
+                            help="вывести байт-код программы (для pyc — текст на Python) вместо выполнения")
+    arg_parser.add_argument('-O', '--optimize', action='store_true',
+                            help="оптимизировать AST перед выполнением")
+    arg_parser.add_argument('--report', action='store_true',
+                            help="вывести отчёт оптимизатора (вместе с -O)")
+    arg_parser.add_argument('--output', metavar='FILE',
+                            help="записывать вывод WRITE в файл вместо стандартного вывода")
+    arg_parser.add_argument('--no-output', action='store_true',
+                            help="не выводить результаты WRITE (для замеров скорости)")
+    arg_parser.add_argument('--flush-lines', type=int, default=4096,
+                            help="сбрасывать стандартный вывод каждые N строк WRITE")
+    arg_parser.add_argument('--input', metavar='FILE',
+                            help="брать значения READ из файла без приглашений ('-' — стандартный ввод)")
+    arg_parser.add_argument('--max-steps', type=int, metavar='N',
+                            help="прервать выполнение после N итераций циклов FOR")
+    arg_parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                            help="прервать выполнение через SECONDS секунд")
+    arg_parser.add_argument('--max-bits', type=int, metavar='N',
+                            help="прервать выполнение, если произведение длиннее N бит")
+    arg_parser.add_argument('--checkpoint', metavar='FILE',
+                            help="записывать контрольные точки выполнения в FILE (выполнение на VM)")
+    arg_parser.add_argument('--checkpoint-every', type=int, metavar='N',
+                            help="записывать контрольную точку каждые N итераций циклов FOR")
+    arg_parser.add_argument('--checkpoint-interval', type=float, metavar='SECONDS',
+                            help="записывать контрольную точку каждые SECONDS секунд (по умолчанию 60)")
+    arg_parser.add_argument('--resume', action='store_true',
+                            help="продолжить выполнение с контрольной точки из --checkpoint, если она есть")
+    arg_parser.add_argument('--profile', action='store_true',
+                            help="профилировать выполнение по операторам (обходом AST)")
+    arg_parser.add_argument('--profile-out', default='profile', metavar='PREFIX',
+                            help="куда сохранить профиль: PREFIX.json и PREFIX.folded (для flame graph)")
+    arg_parser.add_argument('--batch', metavar='PATH',
+                            help="выполнить все программы каталога или файла-манифеста")
+    arg_parser.add_argument('--jobs', type=int, default=None,
+                            help="число процессов для --batch (по умолчанию по числу ядер)")
+    arg_parser.add_argument('--parity', metavar='PATH',
+                            help="сверить все механизмы выполнения с Parser на программах каталога (например, corpus/)")
+    arg_parser.add_argument('--serve', nargs='?', const='127.0.0.1:8765', metavar='ADDRESS',
+                            help="запустить сервер интерпретатора (хост:порт или unix:/путь)")
+    arg_parser.add_argument('--max-concurrency', type=int, default=None,
+                            help="сколько программ сервер выполняет одновременно")
+    arg_parser.add_argument('--pattern', default='*.txt',
+                            help="шаблон имён файлов в каталоге для --batch и --parity")
+    arg_parser.add_argument('--results', default='results.jsonl',
+                            help="файл JSON Lines с результатами --batch ('-' — стандартный вывод)")
+    return arg_parser.parse_args(argv)
+
+
+def limits_from_args(args):
+    """Ограничения выполнения, заданные в командной строке (словарь для Limits.Budget)."""
+    return {name: value for name, value in
+            (('max_steps', args.max_steps), ('timeout', args.timeout), ('max_bits', args.max_bits))
+            if value is not None}
+
+
+def print_lexer_errors(errors):
+    print("Ошибки при лексическом анализе:")
+    for error in errors:
+        print(error)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.batch:
+        import Batch
+        Batch.main(args)
+        return
+    if args.parity:
+        import Parity
+        Parity.main(args)
+        return
+    if args.serve:
+        import Server
+        Server.main(args)
+        return
+
+    interpreter = Interpreter(engine=args.engine, optimize=args.optimize)
+    # Файл .tyc хранит уже скомпилированную программу, и лексемы не нужны
+    use_artifact = args.compile or args.tyc or args.filename.endswith('.tyc')
+    try:
+        if use_artifact:
+            lexer = None
+        elif args.lex_jobs:
+            from ParallelLexer import ParallelLexer
+            lexer = ParallelLexer.from_file(args.filename, args.lex_jobs)
+        elif args.stream:
+            lexer = Lexer.map_file(args.filename)
+        elif args.compact_tokens:
+            from Tokens import CompactLexer
+            lexer = CompactLexer.from_file(args.filename)
+        else:
+            lexer = Lexer.from_file(args.filename)
+    except ValueError as e:
+        print(e)
+        return
+
+    # Построение AST и его интерпретация
+    try:
+        limits = limits_from_args(args)
+        # Номера строк для профиля и сообщений об ограничениях есть только
+        # у лексем потокового анализатора
+        if use_artifact:
+            import Artifact
+            if args.compile:
+                compiled = Artifact.compile_artifact(interpreter, args.filename)
+            else:
+                compiled = Artifact.load_program(interpreter, args.filename)
+        else:
+            compiled = interpreter.compile(lexer, stream=args.stream or args.profile or bool(limits))
+        if args.report:
+            print("Отчёт оптимизатора:")
+            for line in compiled.report:
+                print(f"  {line}")
+        if args.compile:
+            print(f"Программа скомпилирована в {Artifact.artifact_path(args.filename)}")
+            return
+        if args.dis:
+            print(compiled.python.source if args.engine == 'pyc' else disassemble(compiled.code))
+            return
+        checkpoints = None
+        if args.checkpoint:
+            import Checkpoint
+            interval = args.checkpoint_interval
+            if interval is None and args.checkpoint_every is None:
+                interval = 60
+            checkpoints = Checkpoint.Checkpointer(args.checkpoint, args.checkpoint_every, interval, args.resume)
+        elif args.resume:
+            raise ValueError("Для --resume нужен файл контрольной точки --checkpoint.")
+        if args.no_output:
+            output = NullSink()
+        elif args.output:
+            # При продолжении вывод, сделанный после контрольной точки, отбрасывается
+            output = FileSink(args.output, offset=checkpoints.output_offset if checkpoints is not None else None)
+        else:
+            output = StreamSink(threshold=args.flush_lines)
+        if args.input == '-':
+            reader = StreamReader(sys.stdin)
+        elif args.input:
+            reader = FileReader(args.input)
+        else:
+            reader = PromptReader()
+        profiler = Profiler(compiled.program) if args.profile else None
+        budget = Budget(**limits) if limits else None
         try:
-            parser.parse()
-            print("\nТаблица символов после выполнения:")
-            print("Идентификаторы:", symbol_table['identifiers'])
-            print("Константы:", symbol_table['constants'])
-        except Exception as e:
-            print(f"Ошибка: {e}")
-    else:
-        print("Ошибки при лексическом анализе:")
-        for error in lexer.errors:
-            print(error)
-except ValueError as e:
-    print(e)
\ No newline at end of file
+            context = interpreter.run(compiled, output=output, reader=reader, profiler=profiler, budget=budget,
+                                      checkpoints=checkpoints)
+        finally:
+            output.close()
+            reader.close()
+            if profiler is not None:
+                print(profiler.report())
+                profiler.save(args.profile_out)
+        print("\nТаблица символов после выполнения:")
+        print("Идентификаторы:", context.symbol_table['identifiers'])
+        print("Константы:", context.symbol_table['constants'])
+    except LexerError as e:
+        print_lexer_errors(e.errors)
+    except Exception as e:
+        print(f"Ошибка: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# Ограничения выполнения: число итераций циклов, время и размер целых чисел.
+#
+# Итерации выдаются кусками range по check_every штук, и ограничения
+# проверяются один раз на кусок, поэтому тело цикла выполняется без
+# дополнительных проверок. Операторы вне циклов не считаются: их число
+# не больше длины программы. Без Budget механизмы выполнения ничего не проверяют.
+import time
+from itertools import chain
+
+from Ast import BinOp
+from Evaluator import Evaluator
+from Profiler import describe
+
+LIMIT_NAMES = ('max_steps', 'timeout', 'max_bits')
+
+MESSAGES = {
+    'steps': "Превышено ограничение на число итераций циклов ({limit})",
+    'time': "Превышено ограничение времени выполнения ({limit} с)",
+    'bits': "Превышено ограничение на размер целого числа ({limit} бит)",
+    'cancelled': "Выполнение отменено",
+}
+
+
+class LimitExceeded(RuntimeError):
+    """Выполнение прервано ограничением; node — оператор, на котором это случилось."""
+
+    def __init__(self, kind, limit, node, steps, elapsed):
+        self.kind = kind
+        self.limit = limit
+        self.line = node.line if node is not None else 0
+        self.statement = describe(node) if node is not None else None
+        self.steps = steps
+        self.elapsed = elapsed
+        message = MESSAGES[kind].format(limit=limit)
+        if self.line:
+            message += f" в строке {self.line}"
+        if self.statement:
+            message += f": {self.statement}"
+        super().__init__(message + ".")
+
+    def details(self):
+        return {
+            'kind': self.kind,
+            'limit': self.limit,
+            'line': self.line,
+            'statement': self.statement,
+            'steps': self.steps,
+            'elapsed': self.elapsed,
+        }
+
+
+def tighter(*limit_sets):
+    """Объединяет словари ограничений, оставляя для каждого самое строгое значение."""
+    result = {}
+    for limits in limit_sets:
+        for name, value in (limits or {}).items():
+            if name not in LIMIT_NAMES:
+                raise ValueError(f"Неизвестное ограничение: {name}.")
+            if value is None:
+                continue
+            # Значения приходят и из JSON-запросов сервера: true или "5" — не числа
+            if type(value) not in (int, float) or not value > 0:
+                raise ValueError(f"Ограничение {name} должно быть положительным числом.")
+            result[name] = value if result.get(name) is None else min(result[name], value)
+    return result
+
+
+class Budget:
+    """Ограничения одного запуска и израсходованная их часть.
+
+    max_steps — число итераций всех циклов FOR, timeout — секунды от начала
+    выполнения, max_bits — размер результата умножения в битах. cancel()
+    можно вызвать из другого потока: выполнение прервётся на ближайшей проверке.
+    """
+
+    def __init__(self, max_steps=None, timeout=None, max_bits=None, check_every=4096):
+        for name, value in (('max_steps', max_steps), ('timeout', timeout), ('max_bits', max_bits)):
+            if value is not None and (not isinstance(value, (int, float)) or value <= 0):
+                raise ValueError(f"Ограничение {name} должно быть положительным числом.")
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.max_bits = max_bits
+        self.check_every = check_every
+        self.steps = 0
+        self.started = time.monotonic()
+        self.deadline = None
+        self.cancelled = False
+
+    def start(self):
+        self.steps = 0
+        self.started = time.monotonic()
+        self.deadline = self.started + self.timeout if self.timeout is not None else None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def exceeded(self, kind, limit, node):
+        return LimitExceeded(kind, limit, node, self.steps, time.monotonic() - self.started)
+
+    def check(self, node):
+        if self.cancelled:
+            raise self.exceeded('cancelled', None, node)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise self.exceeded('time', self.timeout, node)
+
+    def reserve(self, wanted, node):
+        """Списывает до wanted итераций (не больше check_every) и возвращает их число."""
+        size = min(wanted, self.check_every)
+        if self.max_steps is not None:
+            size = min(size, self.max_steps - self.steps)
+            if size <= 0:
+                raise self.exceeded('steps', self.max_steps, node)
+        self.check(node)
+        self.steps += size
+        return size
+
+    def iterate(self, start, stop, node):
+        """Итерируемое по range(start, stop) для цикла node с проверкой ограничений перед каждым куском."""
+        count = stop - start
+        if count <= self.check_every and (self.max_steps is None or self.steps + count <= self.max_steps):
+            # Короткий цикл укладывается в один кусок
+            self.check(node)
+            self.steps += max(count, 0)
+            return range(start, stop)
+        return chain.from_iterable(self.chunks(start, stop, node))
+
+    def chunks(self, start, stop, node):
+        while start < stop:
+            size = self.reserve(stop - start, node)
+            yield range(start, start + size)
+            start += size
+
+    def charge(self, count, node):
+        """Списывает count итераций цикла node, выполненного без перебора (ClosedFor)."""
+        if self.max_steps is not None and self.steps + count > self.max_steps:
+            raise self.exceeded('steps', self.max_steps, node)
+        self.check(node)
+        self.steps += count
+
+    def multiply(self, left, right, node):
+        if self.max_bits is not None:
+            if type(left) is not int or type(right) is not int:
+                # Неинициализированная переменная: та же TypeError, что и без ограничений
+                return left * right
+            # Размер произведения известен заранее с точностью до бита
+            if left.bit_length() + right.bit_length() - 1 > self.max_bits:
+                raise self.exceeded('bits', self.max_bits, node)
+            value = left * right
+            if value.bit_length() > self.max_bits:
+                raise self.exceeded('bits', self.max_bits, node)
+            return value
+        return left * right
+
+
+class LimitedEvaluator(Evaluator):
+    """Evaluator, соблюдающий ограничения context.budget."""
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.max_bits = self.budget.max_bits
+        self.statement = None  # Выполняемый оператор — для сообщения об ошибке
+        if self.max_bits is None:
+            # Без ограничения на размер чисел следить за операторами и умножениями незачем
+            self.exec_statement = super().exec_statement
+            self.eval = super().eval
+
+    def exec_statement(self, node):
+        self.statement = node
+        super().exec_statement(node)
+
+    def exec_for(self, node):
+        start_value = self.eval(node.start)
+        end_value = self.eval(node.end)
+        values = self.values
+        loop_slot = node.slot
+        body = node.body
+        for i in self.budget.iterate(start_value, end_value + 1, node):
+            values[loop_slot] = i
+            for statement in body:
+                self.exec_statement(statement)
+
+    def eval(self, node):
+        if self.max_bits is not None and type(node) is BinOp and node.op == '*':
+            try:
+                left_value = self.eval(node.left)
+                right_value = self.eval(node.right)
+            except RecursionError:
+                return self.eval_deep(node)
+            return self.budget.multiply(left_value, right_value, self.statement)
+        return super().eval(node)
+
+    def binary(self, operator, left_value, right_value):
+        if self.max_bits is not None and operator == '*':
+            return self.budget.multiply(left_value, right_value, self.statement)
+        return super().binary(operator, left_value, right_value)
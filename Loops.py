@@ -0,0 +1,152 @@
+# Замена арифметических циклов FOR вычислением в замкнутой форме.
+#
+# Цикл подходит, если его тело состоит только из присваиваний вида
+#     v = v + g(i)   или   v = g(i),
+# где g — многочлен от переменной цикла i с коэффициентами из переменных,
+# которые тело не изменяет. Сумма g(i) по отрезку [a, b] считается через
+# конечные разности: sum = C(n, 1)·g(a) + C(n, 2)·Δg(a) + ... + C(n, d+1)·Δ^d g(a),
+# для чего достаточно вычислить g в d + 1 точке.
+from Ast import Assign, BinOp, ClosedFor, Const, LoopUpdate, UnaryOp, Var, expression_reads, reduce_expression
+
+
+def polynomial_degree(node, var):
+    """Степень выражения как многочлена от var или None, если это не многочлен."""
+
+    def visit(item, *operands):
+        item_type = type(item)
+        if item_type is Const:
+            return 0
+        if item_type is Var:
+            return 1 if item.name == var else 0
+        if item_type is UnaryOp:
+            return operands[0]
+        if item_type is BinOp:
+            left, right = operands
+            if left is None or right is None:
+                return None
+            if item.op in ('+', '-'):
+                return max(left, right)
+            if item.op == '*':
+                return left + right
+            # Целочисленное деление сохраняет многочлен только на инвариантах цикла
+            return 0 if left == 0 and right == 0 else None
+        return None
+
+    return reduce_expression(node, visit)
+
+
+def additive_terms(node, sign, terms):
+    """Раскладывает выражение в сумму слагаемых (знак, узел)."""
+    stack = [(sign, node)]
+    while stack:
+        sign, node = stack.pop()
+        if type(node) is BinOp and node.op in ('+', '-'):
+            stack.append((sign if node.op == '+' else -sign, node.right))
+            stack.append((sign, node.left))
+        else:
+            terms.append((sign, node))
+    return terms
+
+
+def join_terms(terms):
+    sign, node = terms[0]
+    result = node if sign > 0 else UnaryOp('-', node)
+    for sign, node in terms[1:]:
+        result = BinOp('+' if sign > 0 else '-', result, node)
+    return result
+
+
+def loop_update(statement, var, assigned):
+    """Описывает присваивание тела цикла через LoopUpdate или возвращает None."""
+    target = statement.name
+    terms = additive_terms(statement.value, 1, [])
+    own = [term for term in terms if type(term[1]) is Var and term[1].name == target]
+    if own:
+        # Накопление: ровно одно слагаемое +v, остальное не зависит от v
+        if len(own) != 1 or own[0][0] < 0 or len(terms) == 1:
+            return None
+        terms.remove(own[0])
+        value = join_terms(terms)
+        accumulate = True
+    else:
+        value = statement.value
+        accumulate = False
+    if expression_reads(value, set()) & assigned:
+        return None
+    degree = polynomial_degree(value, var)
+    if degree is None:
+        return None
+    return LoopUpdate(target, accumulate, value, degree)
+
+
+def closed_form(node):
+    """Возвращает ClosedFor, эквивалентный циклу node, или None."""
+    if not node.body or any(type(statement) is not Assign for statement in node.body):
+        return None
+    assigned = [statement.name for statement in node.body]
+    if node.var in assigned or len(set(assigned)) != len(assigned):
+        return None
+    updates = []
+    for statement in node.body:
+        update = loop_update(statement, node.var, set(assigned))
+        if update is None:
+            return None
+        updates.append(update)
+    return ClosedFor(node.var, node.start, node.end, tuple(updates), line=node.line)
+
+
+def closed_sum(function, start, count, degree):
+    """Сумма function(start + k) для k от 0 до count - 1, где function — многочлен степени degree."""
+    if count <= degree + 1:
+        total = 0
+        for k in range(count):
+            total += function(start + k)
+        return total
+    differences = [function(start + k) for k in range(degree + 1)]
+    total = 0
+    binomial = count  # C(count, j + 1)
+    for j in range(degree + 1):
+        total += binomial * differences[0]
+        differences = [right - left for left, right in zip(differences, differences[1:])]
+        binomial = binomial * (count - j - 1) // (j + 2)
+    return total
+
+
+def execute_closed_for(node, evaluate, values, budget=None):
+    """Выполняет ClosedFor: evaluate вычисляет выражение при текущих значениях слотов values.
+
+    С budget (см. Limits.Budget) итерации цикла списываются, как если бы он выполнялся.
+    """
+    start_value = evaluate(node.start)
+    end_value = evaluate(node.end)
+    count = end_value + 1 - start_value
+    if count <= 0:
+        return
+    if budget is not None:
+        budget.charge(count, node)
+    loop_slot = node.slot
+
+    def at(i, expression):
+        values[loop_slot] = i
+        return evaluate(expression)
+
+    # Сначала вычисляются новые значения всех переменных, и только потом они записываются
+    results = []
+    try:
+        for update in node.updates:
+            if update.accumulate:
+                total = closed_sum(lambda i: at(i, update.value), start_value, count, update.degree)
+                results.append(values[update.slot] + total)
+            else:
+                results.append(at(end_value, update.value))
+    except (ZeroDivisionError, TypeError):
+        # Тело делит только на инварианты цикла, а None в них от i не зависит,
+        # так что обычный цикл остановился бы на первой итерации: повторяем её
+        values[loop_slot] = start_value
+        for update in node.updates:
+            value = evaluate(update.value)
+            values[update.slot] = values[update.slot] + value if update.accumulate else value
+        raise
+    for update, result in zip(node.updates, results):
+        values[update.slot] = result
+    values[loop_slot] = end_value
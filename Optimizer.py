@@ -0,0 +1,358 @@
+# Оптимизация AST перед выполнением: свёртка констант, замена арифметических
+# циклов формулой, удаление мёртвых присваиваний, повторное использование
+# общих подвыражений и векторизация циклов без зависимостей между итерациями
+from collections import Counter
+
+from Ast import (
+    Assign,
+    BinOp,
+    ClosedFor,
+    Const,
+    For,
+    Program,
+    Read,
+    Shared,
+    SharedRef,
+    UnaryOp,
+    Var,
+    Write,
+    expression_reads,
+    postorder,
+    reduce_expression,
+    unparse,
+)
+from Loops import closed_form
+from Vector import numpy_module, vector_form
+
+
+def fold_binary(operator, left_value, right_value):
+    if operator == '+':
+        return left_value + right_value
+    if operator == '-':
+        return left_value - right_value
+    if operator == '*':
+        return left_value * right_value
+    return left_value // right_value
+
+
+def may_raise(node, initialized=None):
+    """Истина, если вычисление выражения может завершиться ошибкой.
+
+    Ошибку дают деление на ноль и арифметика над переменной, которой ещё не
+    присвоено значение (None). initialized — имена переменных, значение которых
+    к этому месту уже точно задано; None — считать заданными все.
+    """
+    for item in postorder(node):
+        item_type = type(item)
+        if item_type is BinOp:
+            if item.op == '/' and (type(item.right) is not Const or item.right.value == 0):
+                return True
+            operands = (item.left, item.right)
+        elif item_type is UnaryOp:
+            operands = (item.operand,)
+        else:
+            continue
+        if initialized is not None:
+            for operand in operands:
+                if type(operand) is Var and operand.name not in initialized:
+                    return True
+    return False
+
+def initialized_names(statements, names, before):
+    """Проход по блоку вперёд: before[id(оператор)] — имена, точно заданные перед оператором.
+
+    names — заданные к началу блока; возвращает заданные после него.
+    """
+    for statement in statements:
+        before[id(statement)] = names
+        statement_type = type(statement)
+        if statement_type is Assign or statement_type is Read:
+            # Если присваивание завершилось ошибкой, дальше программа не выполняется
+            names = names | {statement.name}
+        elif statement_type is For:
+            # Тело может не выполниться ни разу, поэтому после цикла заданных не прибавляется
+            initialized_names(statement.body, names | {statement.var}, before)
+    return names
+
+
+def block_reads(statements, names):
+    """Добавляет в names все переменные, читаемые операторами блока."""
+    for statement in statements:
+        statement_type = type(statement)
+        if statement_type is Assign or statement_type is Write:
+            expression_reads(statement.value, names)
+        elif statement_type is For:
+            expression_reads(statement.start, names)
+            expression_reads(statement.end, names)
+            block_reads(statement.body, names)
+        elif statement_type is ClosedFor:
+            expression_reads(statement.start, names)
+            expression_reads(statement.end, names)
+            for update in statement.updates:
+                if update.accumulate:
+                    names.add(update.name)
+                expression_reads(update.value, names)
+    return names
+
+
+class Optimizer:
+    """Конвейер оптимизаций AST; в report копится описание всех изменений."""
+
+    def __init__(self, fold=True, loops=True, dead_stores=True, shared=True, vectorize=True):
+        self.fold = fold
+        self.loops = loops
+        self.dead_stores = dead_stores
+        self.shared = shared
+        self.vectorize = vectorize
+        self.report = []
+
+    def optimize(self, program):
+        body = program.body
+        if self.fold:
+            body = self.fold_block(body)
+        if self.loops:
+            body = self.close_loops(body)
+        if self.dead_stores:
+            self.read_names = block_reads(body, set())
+            self.initialized = {}
+            # Как и Interpreter.compile: объявление обнуляет все имена, кроме стоящего перед ':'
+            declared = frozenset(name for declaration in program.declarations for name in declaration.names[:-1])
+            initialized_names(body, declared, self.initialized)
+            body = self.remove_dead_stores(body)
+        if self.shared:
+            body = self.share_block(body)
+        if self.vectorize:
+            body = self.vectorize_loops(body)
+        return Program(program.declarations, body)
+
+    # Свёртка констант
+
+    def fold_block(self, statements):
+        return tuple(self.fold_statement(statement) for statement in statements)
+
+    def fold_statement(self, node):
+        node_type = type(node)
+        if node_type is Assign:
+            return Assign(node.name, self.fold_expression(node.value), line=node.line)
+        if node_type is Write:
+            return Write(self.fold_expression(node.value), node.line)
+        if node_type is For:
+            return For(node.var, self.fold_expression(node.start), self.fold_expression(node.end),
+                       self.fold_block(node.body), line=node.line)
+        return node
+
+    def fold_expression(self, node):
+        # Свёрнутые выражения (узел, значение); запись о свёрнутом операнде заменяется
+        # записью о свёрнутом целиком выражении, а текст строится только для оставшихся
+        folds = []
+
+        def visit(item, *operands):
+            # Результат — (узел, есть ли о нём запись в folds)
+            item_type = type(item)
+            if item_type is BinOp:
+                (left, left_folded), (right, right_folded) = operands
+                if type(left) is Const and type(right) is Const:
+                    # Деление на ноль оставляем до выполнения, как в Parser.parse_term
+                    if not (item.op == '/' and right.value == 0):
+                        del folds[len(folds) - left_folded - right_folded:]
+                        folded = Const(fold_binary(item.op, left.value, right.value))
+                        folds.append((item, folded.value))
+                        return folded, True
+                return BinOp(item.op, left, right), False
+            if item_type is UnaryOp:
+                operand, operand_folded = operands[0]
+                if type(operand) is Const:
+                    if operand_folded:
+                        folds[-1] = (item, -operand.value)
+                    return Const(-operand.value), operand_folded
+                return UnaryOp(item.op, operand), False
+            return item, False
+
+        result = reduce_expression(node, visit)[0]
+        for expression, value in folds:
+            self.report.append(f"свёртка: {unparse(expression)} -> {value}")
+        return result
+
+    # Циклы в замкнутой форме
+
+    def close_loops(self, statements):
+        result = []
+        for statement in statements:
+            if type(statement) is For:
+                closed = closed_form(statement)
+                if closed is not None:
+                    self.report.append(f"цикл FOR {statement.var} = {unparse(statement.start)} TO "
+                                       f"{unparse(statement.end)} вычисляется в замкнутой форме")
+                    statement = closed
+                else:
+                    statement = For(statement.var, statement.start, statement.end,
+                                    self.close_loops(statement.body), line=statement.line)
+            result.append(statement)
+        return tuple(result)
+
+    # Векторизация (последней: тело цикла уже окончательное)
+
+    def vectorize_loops(self, statements):
+        result = []
+        for statement in statements:
+            if type(statement) is For:
+                vector = vector_form(statement)
+                # NumPy импортируется, только когда есть что векторизовать
+                if vector is not None and numpy_module() is not None:
+                    self.report.append(f"цикл FOR {statement.var} = {unparse(statement.start)} TO "
+                                       f"{unparse(statement.end)} выполняется массивами NumPy")
+                    statement = vector
+                else:
+                    statement = For(statement.var, statement.start, statement.end,
+                                    self.vectorize_loops(statement.body), line=statement.line)
+            result.append(statement)
+        return tuple(result)
+
+    # Удаление мёртвых присваиваний
+
+    def remove_dead_stores(self, statements):
+        # Проход с конца блока: overwritten — переменные, которые будут
+        # перезаписаны ниже раньше, чем кто-либо их прочитает
+        overwritten = set()
+        kept = []
+        for statement in reversed(statements):
+            statement_type = type(statement)
+            if statement_type is Assign:
+                if not may_raise(statement.value, self.initialized[id(statement)]):
+                    if statement.name not in self.read_names:
+                        self.report.append(
+                            f"удалено присваивание {statement.name} = {unparse(statement.value)}: значение не читается")
+                        continue
+                    if statement.name in overwritten:
+                        self.report.append(
+                            f"удалено присваивание {statement.name} = {unparse(statement.value)}: "
+                            f"значение перезаписывается")
+                        continue
+                overwritten.add(statement.name)
+                overwritten -= expression_reads(statement.value, set())
+            elif statement_type is Read:
+                overwritten.add(statement.name)
+            elif statement_type is Write:
+                overwritten -= expression_reads(statement.value, set())
+            elif statement_type is For:
+                # Тело может не выполниться ни разу, поэтому записи в нём ничего не перекрывают
+                statement = For(statement.var, statement.start, statement.end,
+                                self.remove_dead_stores(statement.body), line=statement.line)
+                overwritten -= block_reads((statement,), set())
+            elif statement_type is ClosedFor:
+                overwritten -= block_reads((statement,), set())
+            kept.append(statement)
+        return tuple(reversed(kept))
+
+    # Общие подвыражения
+
+    def share_block(self, statements):
+        return tuple(self.share_statement(statement) for statement in statements)
+
+    def share_statement(self, node):
+        node_type = type(node)
+        if node_type is Assign:
+            value, = self.share_expressions((node.value,))
+            return Assign(node.name, value, line=node.line)
+        if node_type is Write:
+            value, = self.share_expressions((node.value,))
+            return Write(value, node.line)
+        if node_type is For:
+            start, end = self.share_expressions((node.start, node.end))
+            return For(node.var, start, end, self.share_block(node.body), line=node.line)
+        return node
+
+    def share_expressions(self, roots):
+        # Одинаковые поддеревья получают одинаковые номера: хеш и сравнение самих
+        # узлов рекурсивны и на длинной цепочке операций медленны или невозможны
+        numbers = {}
+        keys = {}
+        counts = Counter()
+        for root in roots:
+            self.count_subexpressions(root, numbers, keys, counts)
+        if not any(count > 1 for count in counts.values()):
+            return roots
+
+        cells = {}
+        shared = []
+        references = Counter()
+        shared_roots = tuple(self.replace_repeated(root, keys, counts, cells, shared, references) for root in roots)
+        for cell, expression in enumerate(shared):
+            if references[cell]:
+                self.report.append(f"общее подвыражение {unparse(expression)} вычисляется один раз")
+        # Ячейки, на которые не осталось ссылок, снова разворачиваем в обычные узлы
+        return tuple(self.drop_unused(root, references) for root in shared_roots)
+
+    def count_subexpressions(self, node, numbers, keys, counts):
+        """Нумерует поддеревья node по структуре (keys[id(узел)]) и считает вхождения операций."""
+
+        def visit(item, *operands):
+            item_type = type(item)
+            if item_type is BinOp:
+                structure = (item.op, *operands)
+            elif item_type is UnaryOp:
+                structure = (item.op, operands[0])
+            elif item_type is Var:
+                structure = ('var', item.name)
+            else:
+                structure = ('const', item.value)
+            key = numbers.setdefault(structure, len(numbers))
+            if item_type is BinOp or item_type is UnaryOp:
+                keys[id(item)] = key
+                counts[key] += 1
+            return key
+
+        reduce_expression(node, visit)
+
+    def replace_repeated(self, node, keys, counts, cells, shared, references):
+        # Обход сверху вниз по явному стеку: ячейка заводится при первом вхождении
+        # подвыражения, а поддерево повторного вхождения не обходится вовсе
+        results = []
+        stack = [(node, None)]
+        while stack:
+            item, cell = stack.pop()
+            item_type = type(item)
+            if cell is not None:
+                # Операнды item уже на вершине results
+                if item_type is BinOp:
+                    right = results.pop()
+                    value = BinOp(item.op, results.pop(), right)
+                else:
+                    value = UnaryOp(item.op, results.pop())
+                results.append(Shared(cell, value) if cell >= 0 else value)
+                continue
+            if item_type is not BinOp and item_type is not UnaryOp:
+                results.append(item)
+                continue
+            key = keys[id(item)]
+            if counts[key] > 1:
+                if key in cells:
+                    # Вычисление идёт слева направо, поэтому первое вхождение уже
+                    # вычислено (и уже сообщило бы о делении на ноль)
+                    references[cells[key]] += 1
+                    results.append(SharedRef(cells[key]))
+                    continue
+                cell = cells[key] = len(shared)
+                shared.append(item)
+            else:
+                cell = -1
+            stack.append((item, cell))
+            if item_type is BinOp:
+                stack.append((item.right, None))
+                stack.append((item.left, None))
+            else:
+                stack.append((item.operand, None))
+        return results[0]
+
+    def drop_unused(self, node, references):
+        def visit(item, *operands):
+            item_type = type(item)
+            if item_type is Shared:
+                return Shared(item.cell, operands[0]) if references[item.cell] else operands[0]
+            if item_type is BinOp:
+                return BinOp(item.op, *operands)
+            if item_type is UnaryOp:
+                return UnaryOp(item.op, operands[0])
+            return item
+
+        return reduce_expression(node, visit)
@@ -0,0 +1,93 @@
+# Приёмники вывода оператора WRITE. Каждое значение выводится строкой
+# "OUTPUT: <значение>", но буферизация и место назначения зависят от приёмника.
+# extend выводит сразу много значений (так пишут векторизованные циклы, см. Vector.py).
+import sys
+
+
+class StreamSink:
+    """Копит значения и пишет их в поток одним блоком, когда набралось threshold строк.
+
+    Если stream не задан, используется текущий sys.stdout на момент сброса.
+    """
+
+    def __init__(self, stream=None, threshold=4096):
+        self.stream = stream
+        self.threshold = threshold
+        self.buffer = []
+
+    def write(self, value):
+        buffer = self.buffer
+        buffer.append(value)
+        if len(buffer) >= self.threshold:
+            self.flush()
+
+    def extend(self, values):
+        self.buffer.extend(values)
+        if len(self.buffer) >= self.threshold:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            stream = self.stream if self.stream is not None else sys.stdout
+            stream.write(''.join([f"OUTPUT: {value}\n" for value in self.buffer]))
+            self.buffer.clear()
+            stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+class FileSink(StreamSink):
+    """Пишет вывод в файл крупными блоками по block_size байт.
+
+    С offset вывод продолжает существующий файл, отбросив всё после первых offset байт.
+    """
+
+    def __init__(self, filename, block_size=1 << 20, threshold=65536, offset=None):
+        if offset is None:
+            stream = open(filename, 'w', buffering=block_size)
+        else:
+            stream = open(filename, 'a', buffering=block_size)
+            if stream.tell() < offset:
+                stream.close()
+                raise ValueError(f"Файл {filename} короче {offset} байт: вывод нельзя продолжить.")
+            stream.truncate(offset)
+        super().__init__(stream, threshold)
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+
+class ListSink:
+    """Собирает выведенные значения в список values — для встраивания и проверок."""
+
+    def __init__(self):
+        self.values = []
+        self.write = self.values.append
+        self.extend = self.values.extend
+
+    def lines(self):
+        return [f"OUTPUT: {value}" for value in self.values]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullSink:
+    """Отбрасывает вывод; нужен для замеров скорости без затрат на печать."""
+
+    def write(self, value):
+        pass
+
+    def extend(self, values):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,172 @@
+# Параллельный лексический анализ больших файлов в пуле процессов.
+#
+# Файл делится на куски по концам строк: лексема никогда не переходит на
+# другую строку, поэтому куски разбираются независимо. Каждый процесс сам
+# отображает файл в память через mmap и читает только свой кусок, так что
+# исходный текст не пересылается между процессами. Сначала процессы считают
+# строки в своих кусках (для глобальных номеров строк в позициях и
+# сообщениях об ошибках), затем разбирают куски. Кусок возвращается
+# компактно: словарь различных лексем и номера лексем в нём (array), а для
+# потокового разбора — ещё строки и столбцы. Результаты склеиваются по
+# порядку кусков и совпадают с результатами Lexer.tokenize и Lexer.iter_tokens;
+# таблицу блоков BEGIN/END tokenize и iter_tokens собирают из отметок, найденных в кусках.
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, repeat
+
+from Interpeter import BEGIN_TOKEN, END_TOKEN, TOKEN_PATTERN, BlockTable, Lexer, text_positions
+
+MIN_CHUNK_SIZE = 1 << 22  # Куски меньше 4 МБ не окупают пересылку результатов
+
+
+def read_range(filename, start, end):
+    with open(filename, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+        return source[start:end]
+
+
+def count_lines(filename, start, end):
+    return read_range(filename, start, end).count(b'\n')
+
+
+def tokenize_range(filename, start, end, first_line, positions):
+    """Разбирает байты start..end файла, первая строка которых имеет номер first_line.
+
+    Возвращает (лексемы словаря, номера лексем, строки, столбцы, отметки BEGIN/END,
+    ошибки, таблица символов). Строки и столбцы заполняются, только если positions
+    истинно; отметки (номер лексемы в куске, BEGIN ли это, строка, столбец) — всегда.
+    """
+    text = read_range(filename, start, end).decode()
+    lexer = Lexer('')
+    known = {}  # Лексема -> номер в entries
+    entries = []
+    indices = []
+    lines = []
+    columns = []
+    marks = []
+    # BEGIN и END занимают в словаре номера 0 и 1
+    known.update(BEGIN=0, END=1)
+    entries.extend((BEGIN_TOKEN, END_TOKEN))
+    if not positions:
+        # Без позиций, как и Lexer.tokenize, — одним проходом по всему куску
+        offsets = []
+        append = indices.append
+        for match in TOKEN_PATTERN.finditer(text):
+            raw_token = match[match.lastindex]
+            index = known.get(raw_token)
+            if index is None:
+                token_type = lexer.classify(match)
+                if token_type is None:
+                    continue
+                index = known[raw_token] = len(entries)
+                entries.append((token_type, raw_token))
+            elif index < 2:
+                offsets.append((len(indices), index == 0, match.start(match.lastindex)))
+            append(index)
+        block_positions = text_positions(text, [offset for _, _, offset in offsets], first_line)
+        marks = [(index, opens, line, column)
+                 for (index, opens, _), (line, column) in zip(offsets, block_positions)]
+    else:
+        for line_number, line in enumerate(text.split('\n'), first_line):
+            for match in TOKEN_PATTERN.finditer(line):
+                raw_token = match[match.lastindex]
+                column = match.start(match.lastindex) + 1
+                index = known.get(raw_token)
+                if index is None:
+                    token_type = lexer.classify(match, f" (строка {line_number}, столбец {column})")
+                    if token_type is None:
+                        continue
+                    index = known[raw_token] = len(entries)
+                    entries.append((token_type, raw_token))
+                elif index < 2:
+                    marks.append((len(indices), index == 0, line_number, column))
+                indices.append(index)
+                lines.append(line_number)
+                columns.append(column)
+    # Массивы пересылаются между процессами одним блоком байт
+    indices = array('I', indices)
+    lines = array('I', lines)
+    columns = array('I', columns)
+    return entries, indices, lines, columns, marks, lexer.errors, lexer.symbol_table
+
+
+def chunk_bounds(source, size, chunks):
+    """Границы кусков (начало, конец) — сразу после символов перевода строки."""
+    starts = [0]
+    for k in range(1, chunks):
+        newline = source.find(b'\n', max(size * k // chunks, starts[-1]))
+        if newline < 0:
+            break
+        if newline + 1 < size and newline + 1 > starts[-1]:
+            starts.append(newline + 1)
+    return list(zip(starts, starts[1:] + [size]))
+
+
+class ParallelLexer(Lexer):
+    """Lexer файла, который разбирает куски файла в пуле из jobs процессов."""
+
+    def __init__(self, filename, jobs=None, chunk_size=MIN_CHUNK_SIZE, symbol_table=None):
+        super().__init__(None, symbol_table)
+        self.filename = filename
+        self.jobs = jobs or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_file(cls, filename, jobs=None):
+        if not os.path.isfile(filename):
+            raise ValueError(f"Файл {filename} не найден.")
+        return cls(filename, jobs)
+
+    def results(self, positions):
+        """Результаты tokenize_range по кускам файла, по порядку."""
+        size = os.path.getsize(self.filename)
+        if size == 0:
+            return
+        chunks = max(1, min(self.jobs * 4, size // self.chunk_size))
+        if chunks == 1 or self.jobs == 1:
+            yield tokenize_range(self.filename, 0, size, 1, positions)
+            return
+        with open(self.filename, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            bounds = chunk_bounds(source, size, chunks)
+        starts = [start for start, _ in bounds]
+        ends = [end for _, end in bounds]
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            counts = list(pool.map(count_lines, repeat(self.filename), starts, ends))
+            first_lines = accumulate(counts[:-1], initial=1)
+            yield from pool.map(tokenize_range, repeat(self.filename), starts, ends, first_lines,
+                                repeat(positions))
+
+    def merge(self, errors, symbol_table):
+        self.errors.extend(errors)
+        # Порядок первых появлений имён сохраняется: куски идут по порядку
+        for name in symbol_table['identifiers']:
+            self.symbol_table['identifiers'].setdefault(name, None)
+        for constant, value in symbol_table['constants'].items():
+            self.symbol_table['constants'].setdefault(constant, value)
+
+    def tokenize(self):
+        known = {}  # Лексема -> кортеж, общий для всех её вхождений, как в Lexer.tokenize
+        self.blocks = BlockTable()
+        for entries, indices, _, _, marks, errors, symbol_table in self.results(positions=False):
+            self.merge(errors, symbol_table)
+            for index, opens, line, column in marks:
+                self.blocks.add(opens, len(self.tokens) + index, (line, column))
+            chunk_tokens = [known.setdefault(entry[1], entry) for entry in entries]
+            self.tokens.extend(map(chunk_tokens.__getitem__, indices))
+        self.blocks.finish()
+        return self.tokens if not self.errors else self.errors
+
+    def iter_tokens(self):
+        """Как Lexer.iter_tokens: таблица блоков готова, когда лексемы кончились."""
+        blocks = self.blocks = BlockTable()
+        count = 0  # Лексем в предыдущих кусках
+        for entries, indices, lines, columns, marks, errors, symbol_table in self.results(positions=True):
+            self.merge(errors, symbol_table)
+            for index, opens, line, column in marks:
+                blocks.add(opens, count + index, (line, column))
+            count += len(indices)
+            types = [token_type for token_type, _ in entries]
+            values = [raw_token for _, raw_token in entries]
+            yield from zip(map(types.__getitem__, indices), map(values.__getitem__, indices), lines, columns)
+        blocks.finish()
@@ -0,0 +1,74 @@
+# Проверка согласованности механизмов выполнения (tree, vm, pyc, с оптимизацией
+# и без) с эталонным Parser на наборе программ, например из каталога corpus/
+from Batch import collect_sources
+from Input import ListReader
+from Interpeter import ENGINES, ExecutionContext, Interpreter, Lexer, LexerError, Parser
+from Output import ListSink
+
+# Значения для READ, одинаковые для всех механизмов
+PARITY_INPUT = (3, 12, -5, 7, 0, 1, 4, 9)
+
+
+def run_reference(filename):
+    lexer = Lexer.from_file(filename)
+    tokens = lexer.tokenize()
+    output = ListSink()
+    error = None
+    if lexer.errors:
+        error = ('LexerError', "; ".join(lexer.errors))
+    else:
+        try:
+            Parser(tokens, lexer.symbol_table, output, ListReader(PARITY_INPUT), lexer.blocks).parse()
+        except Exception as e:
+            error = (type(e).__name__, str(e))
+    return output.values, error, dict(lexer.symbol_table['identifiers'])
+
+
+def run_engine(filename, engine, optimize=False):
+    interpreter = Interpreter(engine=engine, optimize=optimize)
+    output = ListSink()
+    error = None
+    context = None
+    try:
+        compiled = interpreter.compile(Lexer.from_file(filename))
+        context = ExecutionContext(compiled, output, ListReader(PARITY_INPUT))
+        interpreter.run(compiled, context)
+    except LexerError as e:
+        error = ('LexerError', "; ".join(e.errors))
+    except Exception as e:
+        error = (type(e).__name__, str(e))
+    return output.values, error, context.symbol_table['identifiers'] if context else None
+
+
+def check_parity(paths, engines=ENGINES, optimize=(False, True)):
+    """Возвращает список расхождений с Parser; пустой список — все механизмы согласованы.
+
+    С оптимизацией сравниваются только вывод и ошибка: удаление мёртвых
+    присваиваний законно меняет итоговые значения переменных.
+    """
+    mismatches = []
+    for path in paths:
+        expected_output, expected_error, expected_identifiers = run_reference(path)
+        for engine in engines:
+            for optimized in optimize:
+                output, error, identifiers = run_engine(path, engine, optimized)
+                label = f"{path} [{engine}{' -O' if optimized else ''}]"
+                if output != expected_output:
+                    mismatches.append(f"{label}: вывод {output} вместо {expected_output}")
+                if error != expected_error:
+                    mismatches.append(f"{label}: ошибка {error} вместо {expected_error}")
+                if not optimized and identifiers is not None and identifiers != expected_identifiers:
+                    mismatches.append(f"{label}: переменные {identifiers} вместо {expected_identifiers}")
+    return mismatches
+
+
+def main(args):
+    try:
+        paths = collect_sources(args.parity, args.pattern)
+    except ValueError as e:
+        print(e)
+        return
+    mismatches = check_parity(paths)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"Проверено программ: {len(paths)}, расхождений: {len(mismatches)}.")
@@ -0,0 +1,181 @@
+# Профилировщик выполнения: для каждого оператора считает число выполнений,
+# общее время, время вычисления выражений и время ввода-вывода WRITE/READ.
+# Работает через отдельный ProfilingEvaluator, поэтому без --profile обычные
+# механизмы выполнения ничего не замеряют.
+import json
+from time import perf_counter_ns
+
+from Ast import Assign, ClosedFor, For, Read, VectorFor, Write, unparse
+from Evaluator import Evaluator
+from Loops import execute_closed_for
+from Vector import execute_vector_for
+
+
+def describe(node):
+    """Короткий текст оператора для отчётов."""
+    node_type = type(node)
+    if node_type is Assign:
+        return f"{node.name} = {unparse(node.value)}"
+    if node_type is Write:
+        return f"WRITE {unparse(node.value)}"
+    if node_type is Read:
+        return f"READ {node.name}"
+    text = f"FOR {node.var} = {unparse(node.start)} TO {unparse(node.end)}"
+    if node_type is VectorFor:
+        return f"{text} (массивами)"
+    return text if node_type is For else f"{text} (в замкнутой форме)"
+
+
+class StatementProfile:
+    __slots__ = ('node', 'label', 'path', 'count', 'total', 'expression', 'io', 'iterations')
+
+    def __init__(self, node, label, path):
+        self.node = node
+        self.label = label
+        self.path = path  # Метки объемлющих циклов и самого оператора
+        self.count = 0
+        self.total = 0  # Все времена — в наносекундах, вместе с вложенными операторами
+        self.expression = 0
+        self.io = 0
+        self.iterations = 0  # Для циклов FOR: сколько раз выполнилось тело
+
+
+class Profiler:
+    """Собирает StatementProfile для всех операторов программы program."""
+
+    def __init__(self, program):
+        self.statements = {}  # id(узла) -> StatementProfile
+        self.order = []
+        self.total = 0
+        self.register(program.body, ())
+
+    def register(self, statements, path):
+        for node in statements:
+            label = describe(node)
+            if node.line:
+                label = f"{label} (строка {node.line})"
+            profile = StatementProfile(node, label, path + (label,))
+            self.statements[id(node)] = profile
+            self.order.append(profile)
+            if type(node) is For or type(node) is VectorFor:
+                self.register(node.body, profile.path)
+
+    def children_total(self, profile):
+        if type(profile.node) is not For and type(profile.node) is not VectorFor:
+            return 0
+        return sum(self.statements[id(child)].total for child in profile.node.body)
+
+    def hot_spots(self):
+        return sorted(self.order, key=lambda profile: profile.total, reverse=True)
+
+    def report(self, limit=20):
+        """Таблица операторов, отсортированная по общему времени, и список горячих циклов."""
+        total = self.total or 1
+        lines = [
+            f"Профиль выполнения: {self.total / 1e6:.3f} мс",
+            f"{'Строка':>6} {'Выполнений':>11} {'Всего, мс':>10} {'%':>6} {'Выраж., мс':>11} {'Ввод-вывод, мс':>15}  Оператор",
+        ]
+        for profile in self.hot_spots()[:limit]:
+            if not profile.count:
+                continue
+            lines.append(
+                f"{profile.node.line or '-':>6} {profile.count:>11} {profile.total / 1e6:>10.3f} "
+                f"{100 * profile.total / total:>6.1f} {profile.expression / 1e6:>11.3f} {profile.io / 1e6:>15.3f}  "
+                f"{describe(profile.node)}")
+        loops = [profile for profile in self.hot_spots() if type(profile.node) is For and profile.count]
+        if loops:
+            lines.append("Горячие циклы:")
+            for profile in loops[:limit]:
+                lines.append(f"  {profile.label}: {profile.iterations} итераций, {profile.total / 1e6:.3f} мс, "
+                             f"{profile.total / max(profile.iterations, 1) / 1e3:.3f} мкс на итерацию")
+        return "\n".join(lines)
+
+    def to_json(self):
+        return {
+            'total_ns': self.total,
+            'statements': [
+                {
+                    'line': profile.node.line,
+                    'statement': describe(profile.node),
+                    'path': list(profile.path),
+                    'count': profile.count,
+                    'total_ns': profile.total,
+                    'self_ns': profile.total - self.children_total(profile),
+                    'expression_ns': profile.expression,
+                    'io_ns': profile.io,
+                    'iterations': profile.iterations,
+                }
+                for profile in self.order
+            ],
+        }
+
+    def collapsed(self):
+        """Строки "цикл;оператор мкс" в свёрнутом формате стеков для flame graph."""
+        lines = []
+        for profile in self.order:
+            own = (profile.total - self.children_total(profile)) // 1000
+            if own > 0:
+                lines.append(f"{';'.join(profile.path)} {own}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, prefix):
+        with open(f"{prefix}.json", 'w') as file:
+            json.dump(self.to_json(), file, ensure_ascii=False, indent=2)
+        with open(f"{prefix}.folded", 'w') as file:
+            file.write(self.collapsed())
+
+
+class ProfilingEvaluator(Evaluator):
+    """Evaluator, который замеряет каждый выполненный оператор."""
+
+    def __init__(self, context, profiler):
+        super().__init__(context)
+        self.profiler = profiler
+        self.statements = profiler.statements
+
+    def run(self, program):
+        started = perf_counter_ns()
+        try:
+            self.exec_block(program.body)
+        finally:
+            self.profiler.total += perf_counter_ns() - started
+
+    def exec_statement(self, node):
+        profile = self.statements[id(node)]
+        node_type = type(node)
+        started = perf_counter_ns()
+        try:
+            if node_type is Assign:
+                self.values[node.slot] = self.eval(node.value)
+                profile.expression += perf_counter_ns() - started
+            elif node_type is Write:
+                value = self.eval(node.value)
+                evaluated = perf_counter_ns()
+                profile.expression += evaluated - started
+                self.output.write(value)
+                profile.io += perf_counter_ns() - evaluated
+            elif node_type is For:
+                start_value = self.eval(node.start)
+                end_value = self.eval(node.end)
+                profile.expression += perf_counter_ns() - started
+                for i in range(start_value, end_value + 1):
+                    self.values[node.slot] = i
+                    profile.iterations += 1
+                    for statement in node.body:
+                        self.exec_statement(statement)
+            elif node_type is ClosedFor:
+                execute_closed_for(node, self.eval, self.values)
+                profile.expression += perf_counter_ns() - started
+            elif node_type is VectorFor:
+                # Тело профилируется, только если часть итераций выполнилась по одной
+                execute_vector_for(node, self)
+            elif node_type is Read:
+                if self.reader.interactive:
+                    self.output.flush()
+                self.values[node.slot] = self.reader.read(node.name)
+                profile.io += perf_counter_ns() - started
+            else:
+                raise SyntaxError(f"Неожиданное выражение: {node}")
+        finally:
+            profile.count += 1
+            profile.total += perf_counter_ns() - started
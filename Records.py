@@ -0,0 +1,312 @@
+# Выполнение одной программы сразу для пакета входных записей.
+#
+# Запись — строка двумерного массива целых чисел: значения, которые по порядку
+# читают операторы READ. Все записи выполняются вместе операциями NumPy над
+# столбцами: значение переменной — либо число, общее для всех записей, либо
+# столбец int64 с элементом (полосой) на запись. Ход выполнения у всех полос
+# общий, поэтому границы циклов FOR должны совпадать; если они расходятся,
+# записи делятся на группы с одинаковыми границами, и каждая группа выполняется
+# заново. Полоса, в которой значение могло выйти за пределы int64 или
+# встретилось деление на ноль, помечается, и запись выполняется отдельно
+# обычным механизмом — так её вывод, итоговые значения и ошибка совпадают
+# с обычным запуском. Без NumPy отдельно выполняются все записи.
+from Ast import (
+    Assign,
+    ClosedFor,
+    Const,
+    For,
+    Read,
+    Shared,
+    SharedRef,
+    UnaryOp,
+    Var,
+    VectorFor,
+    Write,
+    expression_reads,
+    reduce_expression,
+)
+from Input import ListReader
+from Interpeter import CompiledProgram, ExecutionContext, Interpreter
+from Loops import execute_closed_for
+from Output import ListSink
+from Vector import INT64_MAX, numpy_module
+
+LIMIT = 1 << 62  # Значения полос меньше по модулю, поэтому сумма и разность двух полос не переполняют int64
+PRODUCT_LIMIT = float(1 << 61)  # С запасом на погрешность оценки произведения в float64
+MIN_LANES = 8  # Меньшую группу записей быстрее выполнить по одной
+
+
+class AllLanesFlagged(Exception):
+    """Продолжать выполнение полосами незачем: все записи нужно выполнить отдельно."""
+
+
+class Diverged(Exception):
+    """Граница цикла различается у записей; values — её значения по полосам."""
+
+    def __init__(self, values, flagged):
+        super().__init__()
+        self.values = values
+        self.flagged = flagged
+
+
+class RecordResults:
+    """Результаты run_records по записям.
+
+    outputs — значения WRITE каждой записи, columns — итоговые значения переменных
+    (имя -> массив по записям: int64 или, если значения туда не помещаются, object),
+    errors — None или (тип ошибки, сообщение), scalar — выполнялась ли запись
+    отдельно обычным механизмом.
+    """
+
+    def __init__(self, outputs, columns, errors, scalar):
+        self.outputs = outputs
+        self.columns = columns
+        self.errors = errors
+        self.scalar = scalar
+
+
+class LaneExecutor:
+    """Выполняет AST со слотами сразу для всех строк inputs (массив int64 записей на значения READ)."""
+
+    def __init__(self, np, compiled, inputs):
+        self.np = np
+        self.compiled = compiled
+        self.inputs = inputs
+        self.values = list(compiled.initial_values)
+        self.flagged = np.zeros(len(inputs), dtype=bool)
+        self.reads = 0
+        self.columns = []  # Значения WRITE по порядку: число или столбец
+        self.shared = {}
+        self.slots = {name: slot for slot, name in enumerate(compiled.names)}
+
+    def run(self):
+        # Переполнение в уже помеченных полосах не важно: их результат отбрасывается
+        with self.np.errstate(all='ignore'):
+            self.exec_block(self.compiled.program.body)
+
+    def exec_block(self, statements):
+        for statement in statements:
+            self.exec_statement(statement)
+
+    def exec_statement(self, node):
+        node_type = type(node)
+        if node_type is Assign:
+            self.values[node.slot] = self.eval(node.value)
+        elif node_type is Write:
+            self.columns.append(self.eval(node.value))
+        elif node_type is For or node_type is VectorFor:
+            self.exec_for(node)
+        elif node_type is ClosedFor:
+            self.exec_closed_for(node)
+        elif node_type is Read:
+            self.exec_read(node)
+        else:
+            raise SyntaxError(f"Неожиданное выражение: {node}")
+
+    def exec_for(self, node):
+        start_value = self.uniform(self.eval(node.start))
+        end_value = self.uniform(self.eval(node.end))
+        values = self.values
+        for i in range(start_value, end_value + 1):
+            values[node.slot] = i
+            self.exec_block(node.body)
+
+    def exec_closed_for(self, node):
+        reads = expression_reads(node.start, set())
+        expression_reads(node.end, reads)
+        for update in node.updates:
+            expression_reads(update.value, reads)
+            reads.add(update.name)
+        if not any(isinstance(self.values[self.slots[name]], self.np.ndarray) for name in reads):
+            # Формула над общими для всех записей числами считается точно, как обычно
+            execute_closed_for(node, self.eval, self.values)
+            return
+        # Формулу над столбцами пришлось бы проверять на переполнение целиком: выполняем итерации
+        start_value = self.uniform(self.eval(node.start))
+        end_value = self.uniform(self.eval(node.end))
+        values = self.values
+        for i in range(start_value, end_value + 1):
+            values[node.slot] = i
+            for update in node.updates:
+                value = self.eval(update.value)
+                values[update.slot] = self.binary('+', values[update.slot], value) if update.accumulate else value
+
+    def exec_read(self, node):
+        if self.reads >= self.inputs.shape[1]:
+            raise AllLanesFlagged()  # Входные данные закончились у всех записей сразу
+        column = self.inputs[:, self.reads]
+        self.reads += 1
+        self.flagged |= (column >= LIMIT) | (column <= -LIMIT)
+        self.values[node.slot] = column
+
+    def uniform(self, value):
+        """Число, общее для всех непомеченных полос; иначе Diverged."""
+        if not isinstance(value, self.np.ndarray):
+            return value
+        active = value[~self.flagged]
+        if not active.size:
+            raise AllLanesFlagged()
+        first = active[0]
+        if (active != first).any():
+            raise Diverged(value, self.flagged.copy())
+        return int(first)
+
+    def eval(self, node):
+        return reduce_expression(node, self.eval_node)
+
+    def eval_node(self, node, *operands):
+        node_type = type(node)
+        if node_type is Const:
+            return node.value
+        if node_type is Var:
+            return self.values[node.slot]
+        if node_type is UnaryOp:
+            return -operands[0]
+        if node_type is SharedRef:
+            return self.shared[node.cell]
+        if node_type is Shared:
+            value = self.shared[node.cell] = operands[0]
+            return value
+        return self.binary(node.op, *operands)
+
+    def binary(self, operator, left, right):
+        np = self.np
+        left_lanes = isinstance(left, np.ndarray)
+        right_lanes = isinstance(right, np.ndarray)
+        if not left_lanes and not right_lanes:
+            # Общие для всех записей числа — без ограничений разрядности, как обычно
+            if operator == '+':
+                return left + right
+            if operator == '-':
+                return left - right
+            if operator == '*':
+                return left * right
+            if right == 0:
+                raise AllLanesFlagged()
+            return left // right
+        for operand, lanes in ((left, left_lanes), (right, right_lanes)):
+            if not lanes and not -LIMIT < operand < LIMIT:
+                raise AllLanesFlagged()  # Число не помещается в полосу ни одной записи
+        if operator == '+' or operator == '-':
+            result = left + right if operator == '+' else left - right
+            self.flagged |= (result >= LIMIT) | (result <= -LIMIT)
+            return result
+        if operator == '*':
+            estimate = np.multiply(left, right, dtype=np.float64)
+            self.flagged |= np.abs(estimate) >= PRODUCT_LIMIT
+            return left * right
+        if right_lanes:
+            zero = right == 0
+            if zero.any():
+                self.flagged |= zero
+                right = np.where(zero, 1, right)
+        elif right == 0:
+            raise AllLanesFlagged()
+        # Для целых NumPy, как и Python, округляет частное вниз; |a // b| <= |a|
+        return left // right
+
+
+def run_record(interpreter, compiled, row):
+    """Выполняет программу для одной записи обычным механизмом: (вывод, значения слотов, ошибка)."""
+    output = ListSink()
+    context = ExecutionContext(compiled, output, ListReader(row))
+    error = None
+    try:
+        interpreter.run(compiled, context)
+    except Exception as e:
+        error = (type(e).__name__, str(e))
+    return output.values, context.values, error
+
+
+def run_records(program, inputs, engine='tree', optimize=False):
+    """Выполняет программу для каждой записи inputs и возвращает RecordResults.
+
+    program — CompiledProgram или исходный текст, inputs — двумерный массив целых
+    чисел (строка — значения READ одной записи). engine — механизм выполнения
+    записей, которые приходится выполнять отдельно.
+    """
+    interpreter = Interpreter(engine=engine, optimize=optimize)
+    compiled = program if isinstance(program, CompiledProgram) else interpreter.compile_source(program)
+    np = numpy_module()
+    if np is not None:
+        inputs = np.asarray(inputs)
+        if inputs.ndim != 2 or inputs.dtype.kind not in 'iu':
+            raise ValueError("Записи должны быть двумерным массивом целых чисел.")
+        if inputs.dtype.kind == 'u' and inputs.size and int(inputs.max()) > INT64_MAX:
+            raise ValueError("Значения записей не помещаются в int64.")
+        inputs = inputs.astype(np.int64, copy=False)
+        count = len(inputs)
+    else:
+        inputs = [list(row) for row in inputs]
+        count = len(inputs)
+
+    outputs = [None] * count
+    slot_values = [[None] * count for _ in compiled.names]
+    errors = [None] * count
+    scalar = [False] * count
+    pending = []  # Номера записей для отдельного выполнения
+    groups = [np.arange(count)] if np is not None and count >= MIN_LANES else []
+    if not groups:
+        pending.extend(range(count))
+    while groups:
+        lanes = groups.pop()
+        executor = LaneExecutor(np, compiled, inputs[lanes])
+        try:
+            executor.run()
+        except AllLanesFlagged:
+            pending.extend(lanes.tolist())
+            continue
+        except TypeError:
+            # Например, чтение неинициализированной переменной: ошибку покажет обычное выполнение
+            pending.extend(lanes.tolist())
+            continue
+        except Diverged as e:
+            # Каждая группа записей с одинаковой границей цикла выполняется заново
+            pending.extend(lanes[e.flagged].tolist())
+            active = lanes[~e.flagged]
+            bounds, group_of = np.unique(e.values[~e.flagged], return_inverse=True)
+            for index in range(len(bounds)):
+                group = active[group_of == index]
+                if len(group) >= MIN_LANES:
+                    groups.append(group)
+                else:
+                    pending.extend(group.tolist())
+            continue
+        columns = executor.columns
+        if not all(isinstance(column, (int, np.integer, np.ndarray)) for column in columns):
+            # WRITE неинициализированной переменной выводит None: вывод соберёт обычное выполнение
+            pending.extend(lanes.tolist())
+            continue
+        pending.extend(lanes[executor.flagged].tolist())
+        done = ~executor.flagged
+        records = lanes[done].tolist()
+        wide = any(not isinstance(column, np.ndarray) and not -INT64_MAX - 1 <= column <= INT64_MAX
+                   for column in columns)
+        table = np.empty((len(records), len(columns)), dtype=object if wide else np.int64)
+        for index, column in enumerate(columns):
+            table[:, index] = column[done] if isinstance(column, np.ndarray) else column
+        for record, row in zip(records, table.tolist()):
+            outputs[record] = row
+        for slot, value in enumerate(executor.values):
+            column = value[done].tolist() if isinstance(value, np.ndarray) else [value] * len(records)
+            target = slot_values[slot]
+            for record, item in zip(records, column):
+                target[record] = item
+
+    for record in pending:
+        row = inputs[record].tolist() if np is not None else inputs[record]
+        outputs[record], values, errors[record] = run_record(interpreter, compiled, row)
+        for slot, value in enumerate(values):
+            slot_values[slot][record] = value
+        scalar[record] = True
+
+    columns = {}
+    for name, column in zip(compiled.names, slot_values):
+        if np is None:
+            columns[name] = column
+            continue
+        try:
+            columns[name] = np.array(column, dtype=np.int64)
+        except (OverflowError, TypeError):
+            columns[name] = np.array(column, dtype=object)
+    return RecordResults(outputs, columns, errors, np.array(scalar) if np is not None else scalar)
@@ -0,0 +1,183 @@
+# Сервер интерпретатора: держит интерпретатор и кэш скомпилированных программ
+# в памяти и выполняет программы, присланные по TCP или Unix-сокету.
+#
+# Протокол — JSON Lines. Клиент присылает по строке на программу:
+#     {"source": "...", "engine": "tree", "optimize": false, "input": [1, 2],
+#      "limits": {"max_steps": 1000000, "timeout": 5, "max_bits": 4096}}
+# Сервер по мере выполнения отвечает строками {"output": ["OUTPUT: 1", ...]}
+# и завершает ответ строкой {"done": true, "ok": ..., "identifiers": ...,
+# "constants": ..., "error": ..., "timings": {...}}. Запросы одного
+# соединения выполняются по очереди, разных соединений — параллельно, но не
+# больше max_concurrency одновременно. Из ограничений запроса и ограничений
+# сервера действует более строгое. Если вывод не удалось отправить
+# отключившемуся клиенту, программа прерывается на ближайшей проверке
+# ограничений; программу без вывода остановят только ограничения сервера.
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Cache import ProgramCache
+from Input import ListReader
+from Interpeter import ENGINES, ExecutionContext, Interpreter, LexerError, limits_from_args
+from Limits import Budget, LimitExceeded, tighter
+from Output import StreamSink
+
+DEFAULT_ADDRESS = '127.0.0.1:8765'
+
+
+def parse_address(address):
+    """'unix:/путь' или 'хост:порт' -> ('unix', путь) или ('tcp', (хост, порт))."""
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+class ChunkStream:
+    """Поток для StreamSink, передающий блоки вывода в asyncio-очередь из рабочего потока.
+
+    Очередь ограничена, поэтому медленный клиент притормаживает выполнение
+    программы, а не копит её вывод в памяти.
+    """
+
+    def __init__(self, queue, loop):
+        self.queue = queue
+        self.loop = loop
+
+    def write(self, text):
+        asyncio.run_coroutine_threadsafe(self.queue.put(text.splitlines()), self.loop).result()
+
+    def flush(self):
+        pass
+
+
+class InterpreterServer:
+    def __init__(self, max_concurrency=None, flush_lines=256, limits=None):
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.flush_lines = flush_lines
+        self.limits = limits or {}  # Ограничения выполнения для всех запросов
+        self.pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        self.caches = {}  # (engine, optimize) -> ProgramCache
+        self.requests = 0
+        self.semaphore = None
+
+    def cache(self, engine, optimize):
+        key = (engine, optimize)
+        if key not in self.caches:
+            self.caches[key] = ProgramCache(Interpreter(engine=engine, optimize=optimize))
+        return self.caches[key]
+
+    def budget(self, request):
+        limits = request.get('limits')
+        if limits is not None and not isinstance(limits, dict):
+            raise ValueError("Поле 'limits' должно быть JSON-объектом.")
+        return Budget(**tighter(self.limits, limits))
+
+    def execute(self, request, stream, budget):
+        """Выполняется в рабочем потоке: своя ExecutionContext на каждый запрос."""
+        result = {'done': True, 'ok': False, 'identifiers': None, 'constants': None, 'error': None, 'timings': {}}
+        started = time.perf_counter()
+        output = StreamSink(stream, self.flush_lines)
+        try:
+            engine = request.get('engine', 'tree')
+            if engine not in ENGINES:
+                raise ValueError(f"Неизвестный механизм выполнения: {engine}.")
+            cache = self.cache(engine, bool(request.get('optimize', False)))
+            compiled = cache.get_source(request['source'])
+            compiled_at = time.perf_counter()
+            result['timings']['compile'] = compiled_at - started
+            context = ExecutionContext(compiled, output, ListReader(request.get('input', ())), budget)
+            cache.interpreter.run(compiled, context)
+            result['timings']['run'] = time.perf_counter() - compiled_at
+            result['identifiers'] = context.symbol_table['identifiers']
+            result['constants'] = context.symbol_table['constants']
+            result['ok'] = True
+        except LexerError as e:
+            result['error'] = {'type': 'LexerError', 'message': str(e), 'errors': e.errors}
+        except LimitExceeded as e:
+            result['error'] = {'type': 'LimitExceeded', 'message': str(e), **e.details()}
+        except Exception as e:
+            result['error'] = {'type': type(e).__name__, 'message': str(e)}
+        finally:
+            output.flush()
+        result['timings']['total'] = time.perf_counter() - started
+        return result
+
+    async def handle_request(self, line, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Запрос должен быть JSON-объектом.")
+            if 'source' not in request:
+                raise ValueError("В запросе нет поля 'source'.")
+            budget = self.budget(request)
+        except (ValueError, TypeError) as e:
+            await self.send(writer, {'done': True, 'ok': False,
+                                     'error': {'type': 'ProtocolError', 'message': str(e)}})
+            return
+
+        queue = asyncio.Queue(maxsize=16)
+        async with self.semaphore:
+            self.requests += 1
+            future = loop.run_in_executor(self.pool, self.execute, request, ChunkStream(queue, loop), budget)
+            # None в очереди — признак того, что программа завершилась
+            future.add_done_callback(lambda _: asyncio.ensure_future(queue.put(None)))
+            try:
+                while (lines := await queue.get()) is not None:
+                    await self.send(writer, {'output': lines})
+            finally:
+                if not future.done():
+                    # Клиент отключился: прерываем программу и дочитываем её вывод,
+                    # чтобы не держать рабочий поток
+                    budget.cancel()
+                    while await queue.get() is not None:
+                        pass
+            result = await future
+        await self.send(writer, result)
+
+    async def send(self, writer, message):
+        writer.write(json.dumps(message, ensure_ascii=False).encode() + b'\n')
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await self.handle_request(line, writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, address=DEFAULT_ADDRESS):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        kind, where = parse_address(address)
+        # Лимит строки запроса — 64 МБ: программа передаётся одной строкой JSON
+        if kind == 'unix':
+            return await asyncio.start_unix_server(self.handle_connection, where, limit=1 << 26)
+        return await asyncio.start_server(self.handle_connection, *where, limit=1 << 26)
+
+    async def serve(self, address=DEFAULT_ADDRESS):
+        server = await self.start(address)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+def main(args):
+    server = InterpreterServer(args.max_concurrency, limits=limits_from_args(args))
+    print(f"Сервер интерпретатора: {args.serve}, одновременно не больше {server.max_concurrency} программ.")
+    try:
+        asyncio.run(server.serve(args.serve))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
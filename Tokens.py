@@ -0,0 +1,142 @@
+# Компактное хранение лексем большой программы.
+#
+# Lexer.tokenize хранит на каждую лексему ссылку на общий для её вхождений
+# кортеж (тип, значение) — 8 байт в списке. CompactLexer хранит вместо ссылки
+# номер лексемы в словаре различных лексем в array наименьшего подходящего типа:
+# 1 байт, пока различных лексем не больше 256, затем 2 и 4 байта. Тип лексемы
+# и её текст хранятся в словаре один раз. По желанию запоминаются и смещения
+# лексем в исходном тексте (ещё 4 или 8 байт на лексему), по которым строка,
+# столбец и текст лексемы вычисляются только при обращении.
+import bisect
+from array import array
+
+from Interpeter import BEGIN_TOKEN, END_TOKEN, TOKEN_PATTERN, BlockTable, Lexer, text_positions
+
+# Коды типов лексем
+KINDS = ('KEYWORD', 'OPERATOR', 'IDENTIFIER', 'CONSTANT')
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# Номера лексем растут вместе со словарём: тип array и его предел
+ID_TYPES = (('B', 1 << 8), ('H', 1 << 16), ('I', 1 << 32))
+
+
+class TokenArray:
+    """Лексемы как последовательность кортежей (тип, значение), хранящая по номеру на лексему.
+
+    vocabulary — различные лексемы (общие кортежи), ids — номера в нём по порядку
+    лексем, offsets — смещения лексем в source или None. Индексирование и перебор
+    дают те же кортежи, что и Lexer.tokenize, поэтому TokenArray можно передать
+    и AstBuilder, и Parser.
+    """
+
+    def __init__(self, source, vocabulary, ids, offsets=None):
+        self.source = source
+        self.vocabulary = vocabulary
+        self.ids = ids
+        self.offsets = offsets
+        self._line_starts = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(map(self.vocabulary.__getitem__, self.ids[index]))
+        return self.vocabulary[self.ids[index]]
+
+    def __iter__(self):
+        return map(self.vocabulary.__getitem__, self.ids)
+
+    def kind(self, index):
+        """Код типа лексемы (номер в KINDS)."""
+        return KIND_CODES[self.vocabulary[self.ids[index]][0]]
+
+    def text(self, index):
+        """Текст лексемы, вырезанный из исходного текста."""
+        offset = self.offsets[index]
+        return self.source[offset:offset + len(self.vocabulary[self.ids[index]][1])]
+
+    def position(self, index):
+        """(строка, столбец) лексемы; начала строк вычисляются при первом обращении."""
+        if self._line_starts is None:
+            starts = [0]
+            find = self.source.find
+            newline = find('\n')
+            while newline >= 0:
+                starts.append(newline + 1)
+                newline = find('\n', newline + 1)
+            self._line_starts = array('Q', starts)
+        offset = self.offsets[index]
+        line = bisect.bisect_right(self._line_starts, offset)
+        return line, offset - self._line_starts[line - 1] + 1
+
+    def positioned(self):
+        """Лексемы с позициями (тип, значение, строка, столбец), как у Lexer.iter_tokens; нужны смещения."""
+        vocabulary = self.vocabulary
+        for token_id, (line, column) in zip(self.ids, text_positions(self.source, self.offsets)):
+            token_type, raw_token = vocabulary[token_id]
+            yield token_type, raw_token, line, column
+
+    @property
+    def nbytes(self):
+        """Память под номера и смещения лексем в байтах (без словаря и исходного текста)."""
+        size = self.ids.itemsize * len(self.ids)
+        if self.offsets is not None:
+            size += self.offsets.itemsize * len(self.offsets)
+        return size
+
+
+class CompactLexer(Lexer):
+    """Lexer, который складывает лексемы в TokenArray; positions — запоминать смещения лексем."""
+
+    def __init__(self, source, symbol_table=None, positions=False):
+        super().__init__(source, symbol_table)
+        self.positions = positions
+
+    @classmethod
+    def from_file(cls, filename, positions=False):
+        lexer = super().from_file(filename)
+        lexer.positions = positions
+        return lexer
+
+    def tokenize(self):
+        source = self.source
+        vocabulary = [BEGIN_TOKEN, END_TOKEN]  # Номера 0 и 1 — BEGIN и END
+        block_ids = {'BEGIN': 0, 'END': 1}
+        known = {}  # Лексема -> номер в словаре; BEGIN и END сюда не попадают, как в Lexer.tokenize
+        id_type = 0
+        ids = array(ID_TYPES[id_type][0])
+        append = ids.append
+        offsets = array('I' if len(source) < 1 << 32 else 'Q') if self.positions else None
+        add_offset = offsets.append if offsets is not None else None
+        marks = []  # (индекс, смещение в тексте) лексем BEGIN и END
+
+        for match in TOKEN_PATTERN.finditer(source):
+            raw_token = match[match.lastindex]
+            token_id = known.get(raw_token)
+            if token_id is None:
+                token_id = block_ids.get(raw_token)
+                if token_id is not None:
+                    marks.append((len(ids), match.start(match.lastindex)))
+                else:
+                    token_type = self.classify(match)
+                    if token_type is None:
+                        continue
+                    token_id = known[raw_token] = len(vocabulary)
+                    vocabulary.append((token_type, raw_token))
+                    if token_id >= ID_TYPES[id_type][1]:
+                        # Номер не помещается в текущий тип: переходим к следующему
+                        id_type += 1
+                        ids = array(ID_TYPES[id_type][0], ids)
+                        append = ids.append
+            append(token_id)
+            if add_offset is not None:
+                add_offset(match.start(match.lastindex))
+
+        self.blocks = BlockTable()
+        for (index, _), position in zip(marks, text_positions(source, [offset for _, offset in marks])):
+            self.blocks.add(ids[index] == 0, index, position)
+        self.blocks.finish()
+        self.tokens = TokenArray(source, vocabulary, ids, offsets)
+        return self.tokens if not self.errors else self.errors
+
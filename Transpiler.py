@@ -0,0 +1,282 @@
+# Трансляция AST в исходный текст на Python. Программа становится одной
+# функцией: переменные — её локальными переменными, FOR — циклом по range,
+# '/' — оператором '//'. Текст компилируется встроенным compile() один раз.
+# Для запусков с ограничениями (Limits.Budget) строится отдельный вариант,
+# в котором циклы перебирают budget.iterate, а умножение идёт через budget.multiply.
+# Векторизованные циклы (VectorFor) выполняет Vector.py над списком values,
+# поэтому вокруг них локальные переменные сохраняются в values и читаются обратно.
+from Ast import (
+    PRECEDENCE,
+    Assign,
+    BinOp,
+    ClosedFor,
+    Const,
+    For,
+    Read,
+    Shared,
+    SharedRef,
+    UnaryOp,
+    Var,
+    VectorFor,
+    Write,
+    parenthesize,
+    postorder,
+    reduce_expression,
+)
+from Evaluator import Evaluator
+from Limits import LimitedEvaluator
+from Loops import closed_sum
+from Vector import execute_vector_for
+
+INDENT = '    '
+# Выражение глубже этого переводится по операции на строку: compile() в CPython
+# рекурсивен и не принимает слишком глубокие выражения и больше 200 вложенных скобок
+MAX_NESTING = 100
+
+
+class PythonCode:
+    """Результат трансляции: исходный текст и скомпилированная из него функция."""
+
+    def __init__(self, source, names, statements=None, loops=()):
+        self.source = source
+        self.names = names
+        self.limited = statements is not None
+        self.loops = loops  # Узлы VectorFor, на которые ссылается vector(номер)
+        try:
+            code = compile(source, '<pyc>', 'exec')
+        except SyntaxError as e:
+            # CPython ограничивает вложенность блоков (около 20 циклов)
+            raise SyntaxError(f"Программу нельзя перевести в Python: {e.msg}.") from None
+        namespace = {'closed_sum': closed_sum, 'statements': statements}
+        exec(code, namespace)
+        self.function = namespace['program']
+
+    def run(self, context):
+        output = context.output
+        reader = context.reader
+        if reader.interactive:
+            def read(name):
+                output.flush()  # Приглашение к вводу должно идти после уже выведенного
+                return reader.read(name)
+        else:
+            read = reader.read
+        arguments = [context.values, output.write, read]
+        if self.limited:
+            arguments.append(context.budget)
+        if self.loops:
+            evaluator_type = LimitedEvaluator if context.budget is not None else Evaluator
+            arguments.append(lambda index: execute_vector_for(self.loops[index], evaluator_type(context)))
+        self.function(*arguments)
+
+
+class Transpiler:
+    """Переводит AST с разрешёнными слотами в текст функции program(values, write, read).
+
+    С limited=True функция принимает ещё и budget, а операторы, на которые
+    ссылаются проверки, собираются в statements; check_bits — проверять и
+    размер произведений.
+    """
+
+    def __init__(self, names, limited=False, check_bits=False):
+        self.names = list(names)
+        self.locals = [f"v_{name}" for name in self.names]
+        self.lines = []
+        self.temporaries = 0
+        self.limited = limited
+        self.check_bits = check_bits
+        self.statements = []
+        self.statement = None  # Ссылка на текущий оператор в тексте, например 'statements[3]'
+        self.loops = []
+
+    def transpile(self, program):
+        self.emit(1, "try:")
+        self.transpile_block(program.body, 2)
+        if not program.body:
+            self.emit(2, "pass")
+        self.emit(1, "except ZeroDivisionError:")
+        self.emit(2, "raise ZeroDivisionError(\"Ошибка: деление на ноль.\") from None")
+        if self.locals:
+            # Значения переменных нужны в таблице символов и после ошибки
+            self.emit(1, "finally:")
+            self.emit(2, f"values[:] = [{', '.join(self.locals)}]")
+        # Параметры функции известны только после обхода тела
+        body = self.lines
+        self.lines = []
+        parameters = ['values', 'write', 'read']
+        if self.limited:
+            parameters.append('budget')
+        if self.loops:
+            parameters.append('vector')
+        self.emit(0, f"def program({', '.join(parameters)}):")
+        if self.limited:
+            self.emit(1, "loop, multiply, charge = budget.iterate, budget.multiply, budget.charge")
+        if self.locals:
+            self.emit(1, f"{', '.join(self.locals)}, = values")
+        self.lines.extend(body)
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, depth, line):
+        self.lines.append(INDENT * depth + line)
+
+    def temporary(self):
+        self.temporaries += 1
+        return f"t{self.temporaries}"
+
+    def transpile_block(self, statements, depth):
+        for statement in statements:
+            self.transpile_statement(statement, depth)
+
+    def transpile_statement(self, node, depth):
+        if self.limited:
+            self.statement = f"statements[{len(self.statements)}]"
+            self.statements.append(node)
+        node_type = type(node)
+        if node_type is Assign:
+            self.emit(depth, f"{self.locals[node.slot]} = {self.value(node.value, depth)}")
+        elif node_type is Write:
+            self.emit(depth, f"write({self.value(node.value, depth)})")
+        elif node_type is For:
+            start = self.value(node.start, depth)
+            end = self.value(node.end, depth)
+            if self.limited:
+                self.emit(depth, f"for {self.locals[node.slot]} in loop({start}, {end} + 1, {self.statement}):")
+            else:
+                self.emit(depth, f"for {self.locals[node.slot]} in range({start}, {end} + 1):")
+            self.transpile_block(node.body, depth + 1)
+            if not node.body:
+                self.emit(depth + 1, "pass")
+        elif node_type is ClosedFor:
+            self.transpile_closed_for(node, depth)
+        elif node_type is VectorFor:
+            variables = ', '.join(self.locals)
+            self.emit(depth, f"values[:] = [{variables}]")
+            self.emit(depth, f"vector({len(self.loops)})")
+            self.emit(depth, f"{variables}, = values")
+            self.loops.append(node)
+        elif node_type is Read:
+            self.emit(depth, f"{self.locals[node.slot]} = read({node.name!r})")
+        else:
+            raise SyntaxError(f"Неожиданное выражение: {node}")
+
+    def transpile_closed_for(self, node, depth):
+        # Та же последовательность действий, что в Loops.execute_closed_for: новые
+        # значения считаются по порядку обновлений и записываются только после всех
+        loop_var = self.locals[node.slot]
+        start = self.temporary()
+        end = self.temporary()
+        count = self.temporary()
+        self.emit(depth, f"{start} = {self.value(node.start, depth)}")
+        self.emit(depth, f"{end} = {self.value(node.end, depth)}")
+        self.emit(depth, f"{count} = {end} + 1 - {start}")
+        self.emit(depth, f"if {count} > 0:")
+        if self.limited:
+            self.emit(depth + 1, f"charge({count}, {self.statement})")
+        self.emit(depth + 1, "try:")
+        results = []
+        for update in node.updates:
+            target = self.locals[update.slot]
+            result = self.temporary()
+            results.append((target, result))
+            if update.accumulate:
+                self.emit(depth + 2, f"{result} = {target} + closed_sum({self.function(update.value, loop_var, depth + 2)}, "
+                                     f"{start}, {count}, {update.degree})")
+            else:
+                self.emit(depth + 2, f"{loop_var} = {end}")
+                self.emit(depth + 2, f"{result} = {self.value(update.value, depth + 2)}")
+        # Ошибка возможна только в инвариантах цикла: повторяем первую итерацию обычного цикла
+        self.emit(depth + 1, "except (ZeroDivisionError, TypeError):")
+        self.emit(depth + 2, f"{loop_var} = {start}")
+        for update in node.updates:
+            target = self.locals[update.slot]
+            if update.accumulate:
+                self.emit(depth + 2, f"{target} = {target} + {self.value(update.value, depth + 2, 2)}")
+            else:
+                self.emit(depth + 2, f"{target} = {self.value(update.value, depth + 2)}")
+        self.emit(depth + 2, "raise")
+        for target, result in results:
+            self.emit(depth + 1, f"{target} = {result}")
+        self.emit(depth + 1, f"{loop_var} = {end}")
+
+    def value(self, node, depth, parent_precedence=0):
+        """Текст значения выражения в операторе на отступе depth.
+
+        Слишком глубокое выражение сначала вычисляется строками во временные переменные.
+        """
+        if nesting(node) <= MAX_NESTING:
+            return self.expression(node, parent_precedence)
+        return self.steps(node, depth)
+
+    def function(self, node, parameter, depth):
+        """Функция от parameter, вычисляющая выражение: lambda или, для глубокого выражения, def."""
+        if nesting(node) <= MAX_NESTING:
+            return f"lambda {parameter}: {self.expression(node)}"
+        name = self.temporary()
+        self.emit(depth, f"def {name}({parameter}):")
+        self.emit(depth + 1, f"return {self.steps(node, depth + 1)}")
+        return name
+
+    def steps(self, node, depth):
+        """Вычисляет выражение по одной операции на строку в порядке вычисления; возвращает имя результата."""
+        results = []
+        for item in postorder(node):
+            item_type = type(item)
+            if item_type is BinOp:
+                right = results.pop()
+                left = results.pop()
+                text = self.binary(item.op, left, right)
+            elif item_type is UnaryOp:
+                text = f"-{results.pop()}"
+            elif item_type is Shared:
+                self.emit(depth, f"s{item.cell} = {results[-1]}")
+                continue
+            else:
+                results.append(self.expression(item))
+                continue
+            result = self.temporary()
+            self.emit(depth, f"{result} = {text}")
+            results.append(result)
+        return results[0]
+
+    def binary(self, operator, left, right):
+        if self.check_bits and operator == '*':
+            return f"multiply({left}, {right}, {self.statement})"
+        return f"{left} {'//' if operator == '/' else operator} {right}"
+
+    def expression(self, node, parent_precedence=0):
+        """Текст выражения на Python; скобки ставятся, как в Ast.unparse, только где их требует приоритет."""
+
+        def visit(item, *operands):
+            # Результат — (текст, приоритет), как в Ast.unparse
+            item_type = type(item)
+            if item_type is Const:
+                return f"({item.value})" if item.value < 0 else str(item.value), 4
+            if item_type is Var:
+                return self.locals[item.slot], 4
+            if item_type is BinOp:
+                left, right = operands
+                if self.check_bits and item.op == '*':
+                    return self.binary('*', left[0], right[0]), 4
+                precedence = PRECEDENCE[item.op]
+                return self.binary(item.op, parenthesize(left, precedence),
+                                   parenthesize(right, precedence + 1)), precedence
+            if item_type is UnaryOp:
+                # Унарный минус в Python связывает сильнее '*' и '//', как и в языке
+                return f"-{parenthesize(operands[0], 3)}", 3
+            if item_type is Shared:
+                return f"(s{item.cell} := {operands[0][0]})", 4
+            if item_type is SharedRef:
+                return f"s{item.cell}", 4
+            raise SyntaxError(f"Неправильное выражение: {item}")
+
+        return parenthesize(reduce_expression(node, visit), parent_precedence)
+
+
+def nesting(node):
+    """Глубина вложенности операций в выражении."""
+    return reduce_expression(node, lambda item, *operands: 1 + max(operands, default=0))
+
+
+def transpile(program, names, limited=False, check_bits=False):
+    transpiler = Transpiler(names, limited, check_bits)
+    source = transpiler.transpile(program)
+    return PythonCode(source, names, tuple(transpiler.statements) if limited else None, tuple(transpiler.loops))
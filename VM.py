@@ -0,0 +1,137 @@
+# Стековая виртуальная машина для байт-кода из Bytecode.py
+from Bytecode import (
+    BINARY_ADD,
+    BINARY_FLOORDIV,
+    BINARY_MUL,
+    BINARY_SUB,
+    CLOSED_FOR,
+    CONST_ARG_OPS,
+    FOR_ITER,
+    GET_ITER,
+    JUMP,
+    LOAD_CONST,
+    LOAD_SHARED,
+    LOAD_VAR,
+    NEG,
+    READ,
+    SET_SHARED,
+    STORE_VAR,
+    VECTOR_FOR,
+    WRITE,
+)
+from Evaluator import Evaluator
+from Limits import LimitedEvaluator
+from Loops import execute_closed_for
+from Vector import execute_vector_for
+
+
+class VM:
+    """Выполняет CodeObject; значения переменных лежат в context.values по слотам."""
+
+    def __init__(self, context):
+        self.context = context
+        self.values = context.values
+
+    def run(self, code, checkpoints=None):
+        """Выполняет code; checkpoints (Checkpoint.Checkpointer) — записывать контрольные точки
+        на обратных переходах циклов, начиная, возможно, с продолжения прежнего запуска."""
+        instructions = self.resolve(code)
+        pc = 0
+        stack = []
+        if checkpoints is not None:
+            # Подменяет вывод контекста и восстанавливает значения переменных
+            pc, stack = checkpoints.start(self.context, code)
+        values = self.values
+        write = self.context.output.write
+        reader = self.context.reader
+        budget = self.context.budget
+        max_bits = budget.max_bits if budget is not None else None
+        shared = {}
+        push = stack.append
+        pop = stack.pop
+        size = len(instructions)
+
+        while pc < size:
+            op, arg = instructions[pc]
+            pc += 1
+            if op == LOAD_VAR:
+                push(values[arg])
+            elif op == LOAD_CONST:
+                push(arg)
+            elif op == STORE_VAR:
+                values[arg] = pop()
+            elif op == BINARY_ADD:
+                right = pop()
+                stack[-1] += right
+            elif op == BINARY_SUB:
+                right = pop()
+                stack[-1] -= right
+            elif op == BINARY_MUL:
+                right = pop()
+                if max_bits is None:
+                    stack[-1] *= right
+                else:
+                    stack[-1] = budget.multiply(stack[-1], right, code.statement_at(pc - 1))
+            elif op == BINARY_FLOORDIV:
+                right = pop()
+                if right == 0:
+                    raise ZeroDivisionError("Ошибка: деление на ноль.")
+                stack[-1] //= right
+            elif op == NEG:
+                stack[-1] = -stack[-1]
+            elif op == FOR_ITER:
+                value = next(stack[-1], None)
+                if value is None:
+                    pop()
+                    pc = arg
+                else:
+                    push(value)
+            elif op == JUMP:
+                pc = arg
+                # Обратный переход цикла: на стеке только итераторы циклов
+                if checkpoints is not None and checkpoints.due():
+                    checkpoints.save(pc, stack)
+            elif op == GET_ITER:
+                end_value = pop()
+                start_value = pop()
+                if budget is None:
+                    iterator = iter(range(start_value, end_value + 1))
+                else:
+                    iterator = iter(budget.iterate(start_value, end_value + 1, code.statement_at(pc - 1)))
+                if checkpoints is not None:
+                    # За GET_ITER следуют FOR_ITER и STORE_VAR переменной цикла
+                    iterator = checkpoints.loop(pc, instructions[pc + 1][1], end_value, iterator)
+                push(iterator)
+            elif op == LOAD_SHARED:
+                push(shared[arg])
+            elif op == SET_SHARED:
+                shared[arg] = stack[-1]
+            elif op == CLOSED_FOR:
+                # Формула вычисляется один раз за цикл, поэтому хватает обхода AST
+                execute_closed_for(arg, Evaluator(self.context).eval, values, budget)
+            elif op == VECTOR_FOR:
+                # Значения и вывод общие с контекстом, поэтому цикл выполняет обход AST
+                evaluator = Evaluator(self.context) if budget is None else LimitedEvaluator(self.context)
+                execute_vector_for(arg, evaluator)
+            elif op == WRITE:
+                write(pop())
+            elif op == READ:
+                if reader.interactive:
+                    self.context.output.flush()
+                values[arg] = reader.read(code.names[arg])
+            else:
+                raise RuntimeError(f"Неизвестная инструкция: {op}")
+        if checkpoints is not None:
+            checkpoints.finish()
+
+    @staticmethod
+    def resolve(code):
+        """Подставляет в аргументы сами константы и циклы вместо индексов таблиц."""
+        instructions = []
+        for op, arg in code.instructions:
+            if op in CONST_ARG_OPS:
+                arg = code.constants[arg]
+            elif op == CLOSED_FOR or op == VECTOR_FOR:
+                arg = code.loops[arg]
+            instructions.append((op, arg))
+        return instructions
@@ -0,0 +1,204 @@
+# Векторизация циклов FOR: цикл, итерации которого связаны только переменной
+# цикла, выполняется операциями над массивами NumPy кусками по BLOCK_SIZE итераций.
+#
+# Подходит тело только из присваиваний и WRITE, в котором каждая переменная,
+# изменяемая телом, читается лишь после присваивания в той же итерации.
+# Перед каждым куском интервальная оценка проверяет, что все промежуточные
+# значения помещаются в int64. Если нет, а также при делении на ноль в куске
+# или без установленного NumPy, оставшиеся итерации выполняются по одной
+# обходом AST, поэтому результат и вывод совпадают с обычным циклом.
+from Ast import Assign, BinOp, Const, Shared, SharedRef, UnaryOp, Var, VectorFor, Write, expression_reads, reduce_expression
+
+BLOCK_SIZE = 1 << 16
+MIN_ITERATIONS = 64  # Короче этого цикл быстрее выполнить по одной итерации
+INT64_MAX = (1 << 63) - 1
+
+_numpy = None
+
+
+def numpy_module():
+    """Модуль numpy или None, если он не установлен; импортируется при первом обращении."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def vector_form(node):
+    """Возвращает VectorFor, эквивалентный циклу node, или None."""
+    if not node.body:
+        return None
+    if type(node.start) is Const and type(node.end) is Const and node.end.value - node.start.value < MIN_ITERATIONS:
+        return None
+    assigned = {statement.name for statement in node.body if type(statement) is Assign}
+    if node.var in assigned:
+        return None
+    defined = set()
+    for statement in node.body:
+        statement_type = type(statement)
+        if statement_type is not Assign and statement_type is not Write:
+            return None
+        if (expression_reads(statement.value, set()) & assigned) - defined:
+            return None  # Значение переходит из предыдущей итерации
+        if statement_type is Assign:
+            defined.add(statement.name)
+    return VectorFor(node.var, node.start, node.end, node.body, line=node.line)
+
+
+def bounds(node, intervals, values, shared, limit):
+    """Интервал (min, max) значений выражения или None, если он выходит за [-limit, limit]."""
+
+    def visit(item, *operands):
+        item_type = type(item)
+        if item_type is Const:
+            low = high = item.value
+        elif item_type is Var:
+            if item.slot in intervals:
+                return intervals[item.slot]
+            value = values[item.slot]
+            if type(value) is not int:
+                return None  # Неинициализированная переменная: ошибку покажет обычное выполнение
+            low = high = value
+        elif item_type is UnaryOp:
+            operand = operands[0]
+            if operand is None:
+                return None
+            low, high = -operand[1], -operand[0]
+        elif item_type is Shared:
+            interval = shared[item.cell] = operands[0]
+            return interval
+        elif item_type is SharedRef:
+            return shared[item.cell]
+        else:
+            left, right = operands
+            if left is None or right is None:
+                return None
+            if item.op == '+':
+                low, high = left[0] + right[0], left[1] + right[1]
+            elif item.op == '-':
+                low, high = left[0] - right[1], left[1] - right[0]
+            elif item.op == '*':
+                products = (left[0] * right[0], left[0] * right[1], left[1] * right[0], left[1] * right[1])
+                low, high = min(products), max(products)
+            else:
+                # |a // b| <= |a| при b != 0; деление на ноль проверяется при вычислении
+                high = max(abs(left[0]), abs(left[1]))
+                low = -high
+        if low < -limit or high > limit:
+            return None
+        return low, high
+
+    return reduce_expression(node, visit)
+
+
+def fits(node, first, last, values, limit):
+    """Истина, если итерации first..last цикла node не выходят за [-limit, limit]."""
+    if first < -limit or last > limit:
+        return False
+    intervals = {node.slot: (first, last)}
+    for statement in node.body:
+        interval = bounds(statement.value, intervals, values, {}, limit)
+        if interval is None:
+            return False
+        if type(statement) is Assign:
+            intervals[statement.slot] = interval
+    return True
+
+
+def vector_eval(np, node, arrays, values, shared):
+    """Значение выражения: массив по итерациям куска или число, если от итерации не зависит."""
+
+    def visit(item, *operands):
+        item_type = type(item)
+        if item_type is Const:
+            return item.value
+        if item_type is Var:
+            return arrays[item.slot] if item.slot in arrays else values[item.slot]
+        if item_type is BinOp:
+            left, right = operands
+            operator = item.op
+            if operator == '+':
+                return left + right
+            if operator == '-':
+                return left - right
+            if operator == '*':
+                return left * right
+            if not (right.all() if isinstance(right, np.ndarray) else right):
+                raise ZeroDivisionError("Ошибка: деление на ноль.")
+            # Для целых NumPy, как и Python, округляет частное вниз
+            return left // right
+        if item_type is UnaryOp:
+            return -operands[0]
+        if item_type is Shared:
+            value = shared[item.cell] = operands[0]
+            return value
+        if item_type is SharedRef:
+            return shared[item.cell]
+        raise SyntaxError(f"Неправильное выражение: {item}")
+
+    return reduce_expression(node, visit)
+
+
+def run_blocks(np, node, start_value, end_value, evaluator):
+    """Выполняет итерации кусками массивов; возвращает первую итерацию, которую так выполнить нельзя."""
+    values = evaluator.values
+    output = evaluator.output
+    budget = evaluator.budget
+    limit = INT64_MAX
+    if budget is not None and budget.max_bits is not None:
+        limit = min(limit, (1 << budget.max_bits) - 1)
+    position = start_value
+    while position <= end_value:
+        stop = min(position + BLOCK_SIZE, end_value + 1)
+        count = stop - position
+        if not fits(node, position, stop - 1, values, limit):
+            return position
+        if budget is not None and budget.max_steps is not None and budget.steps + count > budget.max_steps:
+            return position  # Точное место остановки найдёт обычное выполнение
+        arrays = {node.slot: np.arange(position, stop, dtype=np.int64)}
+        columns = []
+        try:
+            for statement in node.body:
+                value = vector_eval(np, statement.value, arrays, values, {})
+                if type(statement) is Assign:
+                    arrays[statement.slot] = value
+                else:
+                    columns.append(value)
+        except ZeroDivisionError:
+            return position  # Вывод до деления на ноль должны дать предыдущие итерации
+        if budget is not None:
+            budget.charge(count, node)
+        if columns:
+            # Значения WRITE идут по итерациям, а внутри итерации — по порядку операторов
+            table = np.empty((count, len(columns)), dtype=np.int64)
+            for index, column in enumerate(columns):
+                table[:, index] = column
+            output.extend(table.ravel().tolist())
+        for slot, value in arrays.items():
+            values[slot] = int(value[-1]) if isinstance(value, np.ndarray) else value
+        position = stop
+    return position
+
+
+def execute_vector_for(node, evaluator):
+    """Выполняет VectorFor; evaluator (Evaluator.Evaluator) даёт значения слотов, вывод и ограничения."""
+    start_value = evaluator.eval(node.start)
+    end_value = evaluator.eval(node.end)
+    position = start_value
+    np = numpy_module()
+    if np is not None and end_value + 1 - start_value >= MIN_ITERATIONS:
+        position = run_blocks(np, node, start_value, end_value, evaluator)
+    budget = evaluator.budget
+    if budget is None:
+        iterations = range(position, end_value + 1)
+    else:
+        iterations = budget.iterate(position, end_value + 1, node)
+    values = evaluator.values
+    for i in iterations:
+        values[node.slot] = i
+        for statement in node.body:
+            evaluator.exec_statement(statement)
@@ -0,0 +1,56 @@
+# Подготовка большой программы к запуску: компиляция исходного текста против
+# загрузки файла .tyc (Artifact.py).
+#
+#     python benchmarks/ArtifactStartup.py --statements 100000
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import Artifact  # noqa: E402
+from Generators import generate_program  # noqa: E402
+from Interpeter import Interpreter, Lexer  # noqa: E402
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Компиляция исходного текста против загрузки .tyc")
+    arg_parser.add_argument('--statements', type=int, default=50_000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('-O', '--optimize', action='store_true')
+    args = arg_parser.parse_args(argv)
+
+    interpreter = Interpreter(optimize=args.optimize)
+    program = generate_program(statements=args.statements, seed=3)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'program.txt')
+        with open(filename, 'w') as file:
+            file.write(program.source)
+        artifact = Artifact.artifact_path(filename)
+        Artifact.compile_artifact(interpreter, filename)
+        print(f"Исходный текст: {os.path.getsize(filename) / 2 ** 20:.1f} МБ, "
+              f".tyc: {os.path.getsize(artifact) / 2 ** 20:.1f} МБ")
+
+        compile_time = best_of(args.repeat, lambda: interpreter.compile(Lexer.from_file(filename), stream=True).code)
+        load_time = best_of(args.repeat, lambda: Artifact.read_artifact(artifact).code)
+        checked_time = best_of(args.repeat, lambda: Artifact.load_program(interpreter, filename).code)
+
+    print(f"{'компиляция':<28} {compile_time * 1000:9.1f} мс")
+    print(f"{'загрузка .tyc':<28} {load_time * 1000:9.1f} мс  ускорение {compile_time / load_time:.1f}")
+    print(f"{'загрузка с проверкой хеша':<28} {checked_time * 1000:9.1f} мс  ускорение {compile_time / checked_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
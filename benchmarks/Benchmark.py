@@ -0,0 +1,156 @@
+# Набор замеров производительности интерпретатора на синтетических программах.
+#
+#     python benchmarks/Benchmark.py --save baseline.json
+#     python benchmarks/Benchmark.py --compare baseline.json
+#
+# Лексический анализ, построение AST и выполнение замеряются по отдельности,
+# каждая фаза — repeat раз; сравнение с сохранённым запуском помечает фазы,
+# медиана которых выросла больше чем на threshold.
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Ast import AstBuilder  # noqa: E402
+from Generators import generate_program  # noqa: E402
+from Interpeter import ENGINES, Interpreter, Lexer  # noqa: E402
+from Output import NullSink  # noqa: E402
+
+# Базовые параметры и отклонения от них по каждой оси
+BASE = {'statements': 2000, 'depth': 3, 'iterations': 50, 'variables': 20, 'write_density': 0.1}
+CASES = {
+    'base': {},
+    'statements-20k': {'statements': 20000},
+    'depth-1': {'depth': 1},
+    'depth-6': {'depth': 6, 'statements': 500},
+    'iterations-2k': {'iterations': 2000},
+    'variables-2k': {'variables': 2000},
+    'writes-none': {'write_density': 0.0},
+    'writes-all': {'write_density': 1.0},
+}
+PHASES = ('lex', 'parse', 'run')
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(timings):
+    return {
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'min': min(timings),
+        'runs': timings,
+    }
+
+
+def run_case(parameters, engine='tree', optimize=False, repeat=5):
+    program = generate_program(**parameters)
+    source = program.source
+    tokens = Lexer(source).tokenize()
+    interpreter = Interpreter(engine=engine, optimize=optimize)
+    compiled = interpreter.compile(Lexer(source))
+    if engine == 'vm':
+        compiled.code  # Байт-код и текст на Python готовятся один раз, вне замеров
+    elif engine == 'pyc':
+        compiled.python
+
+    phases = {
+        'lex': summarize(measure(lambda: Lexer(source).tokenize(), repeat)),
+        'parse': summarize(measure(lambda: AstBuilder(tokens).parse(), repeat)),
+        'run': summarize(measure(lambda: interpreter.run(compiled, output=NullSink()), repeat)),
+    }
+    return {
+        'parameters': parameters,
+        'tokens': len(tokens),
+        'statements': program.statements,
+        'executed': program.executed,
+        'phases': phases,
+        'tokens_per_sec': len(tokens) / phases['lex']['median'],
+        'statements_per_sec': program.statements / phases['parse']['median'],
+        'executed_per_sec': program.executed / phases['run']['median'],
+    }
+
+
+def run_suite(cases, engine='tree', optimize=False, repeat=5):
+    results = {}
+    for name in cases:
+        results[name] = run_case({**BASE, **CASES[name]}, engine, optimize, repeat)
+        report_case(name, results[name])
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'engine': engine,
+        'optimize': optimize,
+        'repeat': repeat,
+        'cases': results,
+    }
+
+
+def report_case(name, result):
+    phases = result['phases']
+    timings = "  ".join(
+        f"{phase} {phases[phase]['median'] * 1000:8.2f} ± {phases[phase]['stdev'] * 1000:6.2f} мс" for phase in PHASES)
+    print(f"{name:<16} {timings}  {result['tokens_per_sec']:>11,.0f} лексем/с  "
+          f"{result['statements_per_sec']:>9,.0f} опер./с разбора  "
+          f"{result['executed_per_sec']:>11,.0f} опер./с выполнения")
+
+
+def compare(current, baseline, threshold):
+    """Список фаз, медиана которых выросла относительно baseline больше чем на threshold."""
+    regressions = []
+    for name, result in current['cases'].items():
+        stored = baseline['cases'].get(name)
+        if stored is None or stored['parameters'] != result['parameters']:
+            continue
+        for phase in PHASES:
+            ratio = result['phases'][phase]['median'] / stored['phases'][phase]['median']
+            if ratio > 1 + threshold:
+                regressions.append(f"{name}/{phase}: медленнее в {ratio:.2f} раза")
+    return regressions
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Замеры производительности интерпретатора")
+    arg_parser.add_argument('--engine', choices=ENGINES, default='tree')
+    arg_parser.add_argument('-O', '--optimize', action='store_true')
+    arg_parser.add_argument('--repeat', type=int, default=5, help="число повторов каждой фазы")
+    arg_parser.add_argument('--case', action='append', choices=sorted(CASES),
+                            help="выполнить только указанные наборы (можно повторять)")
+    arg_parser.add_argument('--save', metavar='FILE', help="сохранить результаты в JSON как эталон")
+    arg_parser.add_argument('--compare', metavar='FILE', help="сравнить с сохранённым эталоном")
+    arg_parser.add_argument('--threshold', type=float, default=0.15,
+                            help="допустимый рост медианы при сравнении (0.15 — на 15%%)")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_suite(args.case or list(CASES), args.engine, args.optimize, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("Регрессий не обнаружено.")
+
+
+if __name__ == "__main__":
+    main()
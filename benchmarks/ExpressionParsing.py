@@ -0,0 +1,84 @@
+# Разбор выражений: время на операнд длинного плоского выражения и глубина
+# вложенности, которую выдерживают AstBuilder (построение AST) и Parser
+# (непосредственное вычисление).
+#
+#     python benchmarks/ExpressionParsing.py --operands 200000 --depths 100 1000 100000
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Ast import AstBuilder  # noqa: E402
+from Interpeter import Lexer, Parser  # noqa: E402
+
+IDENTIFIERS = {'a': 3, 'b': 7}
+
+
+def tokenize(text):
+    return Lexer(text).tokenize()
+
+
+def flat_expression(operands):
+    """a + b * 3 - -a / 2 + ... из operands операндов."""
+    values = ('a', 'b', '3', '-a', '2')
+    operators = ('+', '*', '-', '/')
+    parts = [values[0]]
+    for k in range(1, operands):
+        parts.append(operators[(k - 1) % len(operators)])
+        parts.append(values[k % len(values)])
+    return ' '.join(parts)
+
+
+def parse_ast(tokens):
+    return AstBuilder(tokens).parse_expression()
+
+
+def evaluate(tokens):
+    return Parser(tokens, {'identifiers': dict(IDENTIFIERS), 'constants': {}}).parse_expression()
+
+
+def best_of(repeat, function, argument):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Разбор длинных и глубоко вложенных выражений")
+    arg_parser.add_argument('--operands', type=int, default=100_000)
+    arg_parser.add_argument('--depths', type=int, nargs='+', default=[100, 1_000, 10_000, 100_000])
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    tokens = tokenize(flat_expression(args.operands))
+    print(f"Плоское выражение: {args.operands} операндов, {len(tokens)} лексем")
+    for name, function in (('AstBuilder', parse_ast), ('Parser', evaluate)):
+        elapsed = best_of(args.repeat, function, tokens)
+        print(f"{name:<12} {elapsed * 1000:8.1f} мс  {elapsed / args.operands * 1e9:6.0f} нс/операнд")
+
+    print("Вложенность:")
+    for depth in args.depths:
+        nested = {
+            'скобки': '(' * depth + 'a' + ')' * depth,
+            'унарные минусы': '- ' * depth + 'a',
+            'скобки и минусы': '-(' * depth + 'a' + ')' * depth,
+        }
+        for shape, text in nested.items():
+            tokens = tokenize(text)
+            for name, function in (('AstBuilder', parse_ast), ('Parser', evaluate)):
+                try:
+                    function(tokens)
+                    result = "ok"
+                except RecursionError:
+                    result = "RecursionError"
+                print(f"  {depth:>8} {shape:<16} {name:<12} {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Генераторы синтетических программ для замеров. Программы детерминированы
+# (зависят только от параметров и seed) и корректны: все переменные
+# инициализируются до использования, делители — ненулевые константы, значения
+# не растут неограниченно, циклы выполняются хотя бы один раз.
+import argparse
+import random
+
+
+class GeneratedProgram:
+    def __init__(self, source, statements, executed):
+        self.source = source
+        self.statements = statements  # Операторов в тексте программы
+        self.executed = executed  # Операторов, выполняемых за один запуск
+
+
+def generate_expression(rng, names, depth):
+    """Сумма/разность 2**depth слагаемых: переменных, констант и долей переменных (v * a / b, a <= b)."""
+    if depth == 0:
+        kind = rng.random()
+        if kind < 0.5:
+            return rng.choice(names)
+        if kind < 0.8:
+            return str(rng.randint(0, 99))
+        numerator = rng.randint(1, 9)
+        return f"{rng.choice(names)} * {numerator} / {rng.randint(numerator, 9)}"
+    left = generate_expression(rng, names, depth - 1)
+    right = generate_expression(rng, names, depth - 1)
+    return f"({left} {rng.choice('+-')} {right})"
+
+
+def generate_program(statements=2000, depth=3, iterations=50, variables=20, write_density=0.1,
+                     loop_every=20, loop_body=3, seed=0):
+    """Программа из statements операторов верхнего уровня над variables переменными.
+
+    Каждый loop_every-й оператор — цикл FOR на iterations повторений с loop_body
+    присваиваниями; write_density — доля операторов WRITE среди остальных.
+    """
+    rng = random.Random(seed)
+    names = [f"v{k}" for k in range(variables)]
+    # Последнее имя перед ':' остаётся неинициализированным, поэтому 'i' идёт последним
+    lines = [f"VAR {', '.join(names)}, i : integer;", "BEGIN"]
+    lines.extend(f"{name} = {rng.randint(0, 99)}" for name in names)
+    # Делитель 2**depth не даёт значениям расти от оператора к оператору
+    divisor = 2 ** depth
+    count = executed = variables
+    for index in range(statements):
+        if loop_every and index % loop_every == loop_every - 1:
+            lines.append(f"FOR i = 1 TO {iterations} DO BEGIN")
+            for _ in range(loop_body):
+                target = rng.choice(names)
+                lines.append(f"  {target} = ({generate_expression(rng, names + ['i'], depth)}) / {divisor};")
+            lines.append("END")
+            count += 1 + loop_body
+            executed += 1 + loop_body * iterations
+        elif rng.random() < write_density:
+            lines.append(f"WRITE {generate_expression(rng, names, depth)}")
+            count += 1
+            executed += 1
+        else:
+            lines.append(f"{rng.choice(names)} = ({generate_expression(rng, names, depth)}) / {divisor}")
+            count += 1
+            executed += 1
+    lines.append("END")
+    return GeneratedProgram("\n".join(lines) + "\n", count, executed)
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Генератор синтетических программ")
+    arg_parser.add_argument('--statements', type=int, default=2000)
+    arg_parser.add_argument('--depth', type=int, default=3)
+    arg_parser.add_argument('--iterations', type=int, default=50)
+    arg_parser.add_argument('--variables', type=int, default=20)
+    arg_parser.add_argument('--write-density', type=float, default=0.1)
+    arg_parser.add_argument('--loop-every', type=int, default=20)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    return arg_parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(generate_program(args.statements, args.depth, args.iterations, args.variables,
+                           args.write_density, args.loop_every, seed=args.seed).source, end='')
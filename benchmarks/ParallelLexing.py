@@ -0,0 +1,54 @@
+# Лексический анализ большого сгенерированного файла: Lexer.tokenize и
+# Lexer.iter_tokens против ParallelLexer с разным числом процессов.
+#
+#     python benchmarks/ParallelLexing.py --statements 2000000 --jobs 1 2 4 8
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Generators import generate_program  # noqa: E402
+from Interpeter import Lexer  # noqa: E402
+from ParallelLexer import ParallelLexer  # noqa: E402
+
+
+def measure(make_lexer, stream):
+    lexer = make_lexer()
+    started = time.perf_counter()
+    if stream:
+        count = sum(1 for _ in lexer.iter_tokens())
+    else:
+        count = len(lexer.tokenize())
+    lexer.close()
+    return time.perf_counter() - started, count
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Параллельный лексический анализ")
+    arg_parser.add_argument('--statements', type=int, default=1_000_000)
+    arg_parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8])
+    arg_parser.add_argument('--stream', action='store_true', help="лексемы с позициями (iter_tokens)")
+    args = arg_parser.parse_args(argv)
+
+    program = generate_program(statements=args.statements, depth=2, iterations=2, seed=7)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'program.txt')
+        with open(filename, 'w') as file:
+            file.write(program.source)
+        print(f"Файл: {os.path.getsize(filename) / 2 ** 20:.1f} МБ, ядер: {os.cpu_count()}")
+
+        make_reference = (lambda: Lexer.map_file(filename)) if args.stream else (lambda: Lexer.from_file(filename))
+        baseline, count = measure(make_reference, args.stream)
+        print(f"{'Lexer':<20} {baseline:8.2f} с  {count} лексем")
+        for jobs in args.jobs:
+            elapsed, parallel_count = measure(lambda: ParallelLexer.from_file(filename, jobs), args.stream)
+            assert parallel_count == count
+            print(f"{f'ParallelLexer x{jobs}':<20} {elapsed:8.2f} с  ускорение {baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
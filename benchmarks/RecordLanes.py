@@ -0,0 +1,78 @@
+# Одна программа с READ над пакетом записей: отдельный запуск на каждую
+# запись против выполнения всех записей сразу полосами NumPy (Records.py).
+#
+#     python benchmarks/RecordLanes.py --records 100000
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Interpeter import Interpreter  # noqa: E402
+from Records import run_record, run_records  # noqa: E402
+from Vector import numpy_module  # noqa: E402
+
+PROGRAM = """VAR price, count, rate, total, i, score : integer;
+BEGIN
+READ price
+READ count
+READ rate
+total = 0
+score = 0
+FOR i = 1 TO 12 DO BEGIN
+    total = total + price * count * (100 + rate * i) / 100
+    score = score + (total / (count + 1) - i * rate) * 3
+END
+WRITE total
+WRITE score / 7
+END
+"""
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Программа над пакетом записей")
+    arg_parser.add_argument('--records', type=int, default=20_000)
+    arg_parser.add_argument('--engine', default='tree')
+    args = arg_parser.parse_args(argv)
+
+    np = numpy_module()
+    if np is None:
+        print("NumPy не установлен: все записи выполняются по одной.")
+    rng = random.Random(11)
+    rows = [[rng.randint(1, 10_000), rng.randint(0, 500), rng.randint(-20, 20)] for _ in range(args.records)]
+    # Несколько записей с делением на ноль (count = -1) и переполнением int64
+    for k in range(0, args.records, 1000):
+        rows[k][1] = -1
+    for k in range(500, args.records, 1000):
+        rows[k][0] = 1 << 50
+    inputs = np.array(rows, dtype=np.int64) if np is not None else rows
+
+    interpreter = Interpreter(engine=args.engine)
+    started = time.perf_counter()
+    for row in rows:
+        compiled = interpreter.compile_source(PROGRAM)
+        run_record(interpreter, compiled, row)
+    separate_with_compile = time.perf_counter() - started
+
+    compiled = interpreter.compile_source(PROGRAM)
+    started = time.perf_counter()
+    reference = [run_record(interpreter, compiled, row) for row in rows]
+    separate = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = run_records(compiled, inputs, engine=args.engine)
+    lanes = time.perf_counter() - started
+
+    assert all(results.outputs[k] == reference[k][0] and results.errors[k] == reference[k][2]
+               for k in range(args.records))
+    print(f"Записей: {args.records}, выполнено отдельно: {int(sum(results.scalar))}")
+    print(f"{'по записи с компиляцией':<28} {separate_with_compile:8.2f} с")
+    print(f"{'по записи':<28} {separate:8.2f} с")
+    print(f"{'полосами':<28} {lanes:8.2f} с  ускорение {separate / lanes:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Задержка выполнения маленькой программы: новый процесс `python Interpeter.py`
+# на каждый запуск против запроса к уже запущенному серверу (Server.py).
+#
+#     python benchmarks/ServerLatency.py --runs 50
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Client import Client  # noqa: E402
+
+PROGRAM = """VAR a, b, i : integer;
+BEGIN
+a = 3; b = 0
+FOR i = 1 TO 10 DO BEGIN b = b + a * i END
+WRITE b
+END
+"""
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(name, timings):
+    print(f"{name:<28} медиана {statistics.median(timings) * 1000:8.2f} мс   "
+          f"p95 {percentile(timings, 0.95) * 1000:8.2f} мс   min {min(timings) * 1000:8.2f} мс")
+
+
+def cold_runs(filename, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, 'Interpeter.py'), filename],
+                       check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def warm_runs(address, runs, reconnect):
+    timings = []
+    client = await Client(address).connect()
+    try:
+        for _ in range(runs):
+            started = time.perf_counter()
+            if reconnect:
+                await client.close()
+                client = await Client(address).connect()
+            result = await client.run(PROGRAM)
+            timings.append(time.perf_counter() - started)
+            assert result['ok'], result['error']
+    finally:
+        await client.close()
+    return timings
+
+
+async def wait_for_server(address, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await (await Client(address).connect()).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Задержка: холодный запуск CLI против сервера")
+    arg_parser.add_argument('--runs', type=int, default=30)
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'program.txt')
+        with open(filename, 'w') as file:
+            file.write(PROGRAM)
+        address = f"unix:{os.path.join(directory, 'server.sock')}"
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'Interpeter.py'), '--serve', address],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_for_server(address))
+            cold = cold_runs(filename, args.runs)
+            warm = asyncio.run(warm_runs(address, args.runs, reconnect=False))
+            reconnecting = asyncio.run(warm_runs(address, args.runs, reconnect=True))
+        finally:
+            server.terminate()
+            server.wait()
+
+    report("CLI, новый процесс", cold)
+    report("сервер, одно соединение", warm)
+    report("сервер, новое соединение", reconnecting)
+    print(f"Ускорение по медиане: в {statistics.median(cold) / statistics.median(warm):.0f} раз")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Память под лексемы большой программы: список Lexer.tokenize против
+# TokenArray из CompactLexer (Tokens.py) с смещениями лексем и без них.
+#
+#     python benchmarks/TokenMemory.py --statements 500000
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Generators import generate_program  # noqa: E402
+from Interpeter import Lexer  # noqa: E402
+from Tokens import CompactLexer  # noqa: E402
+
+
+def measure(make_lexer):
+    """(время разбора, память после разбора в байтах, число лексем)."""
+    started = time.perf_counter()
+    make_lexer().tokenize()
+    elapsed = time.perf_counter() - started  # Время — без tracemalloc, он замедляет разбор
+    lexer = make_lexer()
+    tracemalloc.start()
+    tokens = lexer.tokenize()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(tokens)
+    del tokens, lexer
+    return elapsed, size, count
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Память под лексемы")
+    arg_parser.add_argument('--statements', type=int, default=300_000)
+    args = arg_parser.parse_args(argv)
+
+    source = generate_program(statements=args.statements, depth=2, iterations=2, seed=7).source
+    print(f"Исходный текст: {len(source) / 2 ** 20:.1f} МБ")
+    variants = [
+        ('Lexer.tokenize', lambda: Lexer(source)),
+        ('CompactLexer', lambda: CompactLexer(source)),
+        ('CompactLexer, смещения', lambda: CompactLexer(source, positions=True)),
+    ]
+    baseline = None
+    for name, make_lexer in variants:
+        elapsed, size, count = measure(make_lexer)
+        baseline = baseline or size
+        print(f"{name:<24} {elapsed:7.2f} с  {size / 2 ** 20:8.1f} МБ  "
+              f"{size / count:5.2f} Б/лексему  меньше в {baseline / size:.1f} раза")
+
+
+if __name__ == "__main__":
+    main()